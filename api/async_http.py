@@ -0,0 +1,97 @@
+"""
+Non-blocking Upstream HTTP Client
+Async counterpart of api/http_client for the ASGI entry point: one httpx
+AsyncClient per upstream host and event loop, with the same bounded
+connection pools, connect/read timeouts and jittered retry/backoff, so a
+request waiting on Alpha Vantage, CoinGecko or Investing.com holds no
+thread and thousands can wait at once.
+
+Responses are httpx.Response objects, which offer the raise_for_status(),
+json() and content used by the fetchers on requests.Response, so the
+request building and parsing code is shared by both clients. httpx is
+imported with the first client, so the WSGI entry points never load it.
+"""
+
+import random
+
+from api.http_client import (BACKOFF_FACTOR, CONNECT_TIMEOUT, MAX_RETRIES, POOL_MAXSIZE,
+                             RETRY_STATUSES, _base_url)
+
+# One client per (event loop, scheme://host): a client's connections belong
+# to the loop that opened them
+_clients = {}
+
+
+def get_client(url):
+    """Return the shared keep-alive client for the host of url on the running loop"""
+    import asyncio
+    import httpx
+
+    key = (asyncio.get_running_loop(), _base_url(url))
+    client = _clients.get(key)
+    if client is None or client.is_closed:
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(max_connections=POOL_MAXSIZE, max_keepalive_connections=POOL_MAXSIZE),
+            retries=MAX_RETRIES  # Connection errors; 5xx answers are retried below
+        )
+        client = _clients[key] = httpx.AsyncClient(transport=transport)
+    return client
+
+
+async def _request(method, url, read_timeout, **kwargs):
+    """
+    Send a request, retrying 5xx answers with jittered exponential backoff.
+    Read timeouts and 429s are not retried, as in api/http_client.
+    """
+    import asyncio
+    import httpx
+
+    client = get_client(url)
+    timeout = httpx.Timeout(read_timeout, connect=CONNECT_TIMEOUT)
+    for attempt in range(MAX_RETRIES + 1):
+        response = await client.request(method, url, timeout=timeout, **kwargs)
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            return response
+        await response.aclose()
+        await asyncio.sleep(BACKOFF_FACTOR * 2 ** attempt * random.uniform(0.5, 1.5))
+
+
+async def async_get(url, params=None, headers=None, read_timeout=10):
+    """
+    GET through the pooled client of the target host.
+
+    Args:
+        url (str): Full URL
+        params (dict): Query string parameters
+        headers (dict): Extra request headers
+        read_timeout (float): Seconds to wait for the response once connected
+
+    Returns:
+        httpx.Response
+    """
+    return await _request('GET', url, read_timeout, params=params, headers=headers)
+
+
+async def async_post(url, data=None, headers=None, read_timeout=10):
+    """
+    POST a form through the pooled client of the target host.
+
+    Args:
+        url (str): Full URL
+        data (dict): Form fields
+        headers (dict): Extra request headers
+        read_timeout (float): Seconds to wait for the response once connected
+
+    Returns:
+        httpx.Response
+    """
+    return await _request('POST', url, read_timeout, data=data, headers=headers)
+
+
+async def close_clients():
+    """Close the clients of the running loop (ASGI lifespan shutdown)"""
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    for key in [key for key in _clients if key[0] is loop]:
+        await _clients.pop(key).aclose()
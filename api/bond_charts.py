@@ -0,0 +1,153 @@
+"""
+Traditional Covered Bonds Chart Aggregations
+Server-side group-bys behind the six charts of traditional-app.js, computed
+with vectorized bincounts over the columns of the bond store instead of
+JavaScript loops over every emission on each filter change.
+"""
+
+import numpy as np
+
+from api.bond_store import get_bond_store, parse_filters
+
+# EUR conversion rates used by the dashboard for volume figures
+EUR_RATES = {'EUR': 1, 'GBP': 1.17, 'SEK': 0.09, 'DKK': 0.13, 'NOK': 0.09}
+
+# Spread buckets of renderTraditionalSpreadChart(), in bps
+SPREAD_EDGES = [40, 50, 60]
+SPREAD_LABELS = ['0-40', '40-50', '50-60', '60+']
+
+TOP_ISSUERS = 5
+
+
+def _column(column, rows):
+    """The whole column when unfiltered, else the selected rows"""
+    return column if rows is None else column[rows]
+
+
+def _count_by(store, field, rows):
+    codes = _column(store.codes[field], rows)
+    return np.bincount(codes, minlength=len(store.categories[field]))
+
+
+def _eur_amounts(store, rows):
+    """Amounts converted to EUR millions"""
+    rates = np.array([EUR_RATES.get(c, 1) for c in store.categories['currency']], dtype=np.float64)
+    return _column(store.numbers['amount'], rows) * rates[_column(store.codes['currency'], rows)]
+
+
+def _year_series(store, field, rows):
+    counts = _count_by(store, field, rows)
+    present = np.nonzero(counts)[0]
+    return {
+        'labels': [store.categories[field][c] for c in present],
+        'data': counts[present].tolist()
+    }
+
+
+def timeline_chart(store, rows):
+    """Emissions per issue year (renderTraditionalTimelineChart)"""
+    return _year_series(store, 'issueYear', rows)
+
+
+def maturity_wall_chart(store, rows):
+    """Emissions per maturity year (renderTraditionalMaturityWallChart)"""
+    return _year_series(store, 'maturityYear', rows)
+
+
+def country_chart(store, rows):
+    """Emissions per country, largest first (renderTraditionalCountryChart)"""
+    counts = _count_by(store, 'country', rows)
+    present = np.nonzero(counts)[0]
+    present = present[np.argsort(-counts[present], kind='stable')]
+    return {
+        'labels': [store.categories['country'][c] for c in present],
+        'data': counts[present].tolist()
+    }
+
+
+def top_issuers_chart(store, rows):
+    """Top issuers by EUR volume (renderTraditionalTopIssuersChart)"""
+    volumes = np.bincount(
+        _column(store.codes['issuer'], rows),
+        weights=_eur_amounts(store, rows),
+        minlength=len(store.categories['issuer'])
+    )
+    present = np.nonzero(volumes)[0]
+    top = present[np.argsort(-volumes[present], kind='stable')][:TOP_ISSUERS]
+    return {
+        'labels': [store.categories['issuer'][c] for c in top],
+        'data': np.round(volumes[top]).astype(int).tolist()
+    }
+
+
+def green_bonds_chart(store, rows):
+    """Green vs traditional emissions (renderTraditionalGreenBondsChart)"""
+    total = store.size if rows is None else len(rows)
+    is_green = np.array(store.categories['greenBond'], dtype=bool)
+    green = int(_count_by(store, 'greenBond', rows)[is_green].sum())
+    return {'labels': ['Green Bonds', 'Traditional'], 'data': [green, total - green]}
+
+
+def spread_chart(store, rows):
+    """Emissions per spread bucket (renderTraditionalSpreadChart)"""
+    spreads = _column(store.numbers['spread'], rows)
+    buckets = sum((spreads >= edge).view(np.int8) for edge in SPREAD_EDGES)
+    return {
+        'labels': SPREAD_LABELS,
+        'data': np.bincount(buckets, minlength=len(SPREAD_LABELS)).tolist()
+    }
+
+
+def summary_metrics(store, rows):
+    """Headline figures of updateTraditionalMetrics()"""
+    total = store.size if rows is None else len(rows)
+    spreads = _column(store.numbers['spread'], rows)
+    return {
+        'totalVolumeEur': int(round(_eur_amounts(store, rows).sum())),
+        'emissions': total,
+        'issuers': int(np.count_nonzero(_count_by(store, 'issuer', rows))),
+        'countries': int(np.count_nonzero(_count_by(store, 'country', rows))),
+        'avgSpread': round(float(spreads.mean()), 1) if total else 0
+    }
+
+
+CHARTS = {
+    'timeline': timeline_chart,
+    'country': country_chart,
+    'top-issuers': top_issuers_chart,
+    'green-bonds': green_bonds_chart,
+    'spread': spread_chart,
+    'maturity-wall': maturity_wall_chart,
+    'metrics': summary_metrics
+}
+
+
+def aggregate(store, filters, charts=None):
+    """
+    Compute chart aggregations over the emissions matching filters.
+
+    Args:
+        store (BondStore): Emission store
+        filters (dict): Same filters as BondStore.query()
+        charts (list): Names from CHARTS, or None for all of them
+
+    Returns:
+        dict: chart name -> {'labels': [...], 'data': [...]} (or metrics)
+    """
+    for name in charts or []:
+        if name not in CHARTS:
+            raise ValueError(f"Unknown chart '{name}'")
+
+    rows = store.matching_rows(filters)
+    if len(rows) == store.size:
+        rows = None
+
+    return {name: CHARTS[name](store, rows) for name in (charts or CHARTS)}
+
+
+def chart_data(args, charts=None):
+    """API payload for the charts requested with filters from request args"""
+    return {
+        'status': 'success',
+        'charts': aggregate(get_bond_store(), parse_filters(args), charts)
+    }
@@ -0,0 +1,186 @@
+"""
+Traditional Covered Bonds Search
+Typeahead over issuer names, bond types and ISINs, replacing the linear
+scan of applyTraditionalFilters() with sorted-array prefix lookups.
+
+Names are folded for matching (accents stripped, case folded, punctuation
+dropped), so 'credit fon' finds 'Crédit Foncier de France' and 'munch'
+finds 'Münchener Hypothekenbank'. Every word start of a name is indexed
+too, so 'foncier' also finds 'Compagnie de Financement Foncier'. The few
+hundred names live in a sorted Python list searched with bisect; the ISINs
+are one sorted fixed-width bytes array searched with np.searchsorted, so a
+query costs two binary searches plus the k results, whatever the number
+of emissions.
+"""
+
+from bisect import bisect_left
+import re
+import threading
+import unicodedata
+
+import numpy as np
+
+from api.bond_store import get_bond_store
+
+# Searchable fields, in result order within a rank
+SEARCH_FIELDS = ('issuer', 'type', 'isin')
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+# Match ranks: the whole name, the start of the name, the start of a word
+EXACT, PREFIX, WORD_PREFIX = 0, 1, 2
+
+_NON_WORD = re.compile(r'[^0-9a-z]+')
+
+
+def fold(text):
+    """Matching form of a name: no accents, case folded, single spaces"""
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_WORD.sub(' ', stripped.casefold()).strip()
+
+
+class SearchIndex:
+    """Prefix index over the names and ISINs of a bond store"""
+
+    def __init__(self, store):
+        """
+        Args:
+            store (BondStore): Emission store to index
+        """
+        self.store = store
+        self.emissions = {
+            field: np.bincount(store.codes[field], minlength=len(store.categories[field]))
+            for field in ('issuer', 'type')
+        }
+
+        # (folded key, field, code, rank when the query is a prefix of key)
+        entries = []
+        for field in ('issuer', 'type'):
+            for code, value in enumerate(store.categories[field]):
+                words = fold(value).split(' ')
+                entries.append((' '.join(words), field, code, PREFIX))
+                for i in range(1, len(words)):
+                    entries.append((' '.join(words[i:]), field, code, WORD_PREFIX))
+        entries.sort()
+        self._keys = [entry[0] for entry in entries]
+        self._entries = entries
+
+        isin = store.isin
+        isin = np.char.encode(isin, 'ascii') if isin.dtype.kind == 'U' else np.asarray(isin)
+        self._isin_order = np.argsort(isin, kind='stable')
+        self._isins = isin[self._isin_order]
+
+    def _names(self, query):
+        """Best (rank, field, code) per name whose key starts with query"""
+        best = {}
+        start = bisect_left(self._keys, query)
+        stop = bisect_left(self._keys, query + '\uffff', lo=start)
+        for key, field, code, rank in self._entries[start:stop]:
+            if key == query and rank == PREFIX:
+                rank = EXACT
+            if rank < best.get((field, code), WORD_PREFIX + 1):
+                best[(field, code)] = rank
+        return best
+
+    def _isin_range(self, query):
+        prefix = query.replace(' ', '').upper().encode('ascii', 'ignore')
+        width = self._isins.dtype.itemsize
+        if not prefix or len(prefix) > width:
+            return 0, 0, prefix
+        # Bounds of the array's own width: a longer key would make NumPy
+        # cast (copy) the whole array for the comparison
+        lowest = np.array(prefix, dtype=self._isins.dtype)
+        highest = np.array(prefix.ljust(width, b'\xff'), dtype=self._isins.dtype)
+        start = int(np.searchsorted(self._isins, lowest, side='left'))
+        stop = int(np.searchsorted(self._isins, highest, side='right'))
+        return start, stop, prefix
+
+    def search(self, query, limit=DEFAULT_LIMIT, fields=SEARCH_FIELDS):
+        """
+        Top matches of a typeahead query.
+
+        Names rank by match (whole name, name start, word start), then by
+        number of emissions; ISINs rank after names of the same match, in
+        ISIN order.
+
+        Args:
+            query (str): Text typed so far
+            limit (int): Number of results
+            fields (tuple): Fields searched, from SEARCH_FIELDS
+
+        Returns:
+            dict: results ([{'field', 'value', 'emissions' (names) or
+            'issuer' (ISINs)}]) and total matches per field
+        """
+        folded = fold(query)
+        totals = {field: 0 for field in fields}
+        if not folded:
+            return {'results': [], 'total': totals}
+
+        ranked = []
+        names = self._names(folded) if 'issuer' in fields or 'type' in fields else {}
+        for (field, code), rank in names.items():
+            if field in fields:
+                count = int(self.emissions[field][code])
+                totals[field] += 1
+                ranked.append((rank, SEARCH_FIELDS.index(field), -count,
+                               self.store.categories[field][code], count))
+        ranked.sort()
+        results = [{'field': SEARCH_FIELDS[f], 'value': value, 'emissions': count}
+                   for rank, f, _, value, count in ranked[:limit]]
+
+        if 'isin' in fields:
+            start, stop, prefix = self._isin_range(folded)
+            totals['isin'] = stop - start
+            isin_rank = EXACT if stop - start == 1 and self._isins[start] == prefix else PREFIX
+            # ISINs go after the names of a better or equal rank, before worse ones
+            position = sum(1 for r in ranked[:limit] if r[0] <= isin_rank)
+            issuers = self.store.categories['issuer']
+            isins = [
+                {
+                    'field': 'isin',
+                    'value': self._isins[i].decode('ascii'),
+                    'issuer': issuers[self.store.codes['issuer'][self._isin_order[i]]]
+                }
+                for i in range(start, min(stop, start + limit))
+            ]
+            results = (results[:position] + isins + results[position:])[:limit]
+
+        return {'results': results, 'total': totals}
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_search_index():
+    """Return the index of the shared store, built on first search"""
+    global _index
+    store = get_bond_store()
+    if _index is None or _index.store is not store:
+        with _index_lock:
+            if _index is None or _index.store is not store:
+                _index = SearchIndex(store)
+    return _index
+
+
+def search_bonds(args):
+    """
+    API payload for request arguments: q (text typed so far), limit and
+    fields (comma-separated, default issuer,type,isin).
+    """
+    try:
+        limit = int(args.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+    fields = tuple(f.strip() for f in args.get('fields', ','.join(SEARCH_FIELDS)).split(',') if f.strip())
+    unknown = [f for f in fields if f not in SEARCH_FIELDS]
+    if unknown or not fields:
+        raise ValueError(f"fields must be among: {', '.join(SEARCH_FIELDS)}")
+
+    query = args.get('q', '')
+    return {'status': 'success', 'query': query, **get_search_index().search(query, limit, fields)}
@@ -0,0 +1,485 @@
+"""
+Traditional Covered Bonds Store
+In-memory, dictionary-encoded store of the covered bond emissions with
+secondary indexes, answering the filter / sort / pagination queries that
+traditional-app.js used to run in the browser.
+
+Each filterable field is stored as integer codes into a sorted list of its
+distinct values, with a posting list (the sorted row ids) per value. A
+query starts from the shortest posting list of its filters and checks the
+remaining filters on those rows only. Sorted orders are built lazily per
+column and direction, then reused by every query; the matching rows of
+recent queries are cached so that paging through them is a slice.
+
+The store loads from a binary snapshot (see api/snapshot.py) when one is
+at least as recent as the JSON data file: its columns and posting lists
+are mapped from disk instead of parsed and rebuilt, and shared between
+gunicorn workers. Build one with:
+    python3 -m api.bond_store traditional-bonds-historical-data.json
+"""
+
+from collections import OrderedDict
+import json
+import os
+import threading
+
+import numpy as np
+
+from api.snapshot import open_snapshot, write_snapshot
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Emission universe loaded at startup
+BONDS_DATA_FILE = os.environ.get(
+    'BONDS_DATA_FILE',
+    os.path.join(ROOT, 'traditional-bonds-historical-data.json')
+)
+
+# Binary snapshot of the same emissions, preferred when up to date
+BONDS_SNAPSHOT_FILE = os.environ.get(
+    'BONDS_SNAPSHOT_FILE',
+    os.path.splitext(BONDS_DATA_FILE)[0] + '.snapshot'
+)
+
+# Dictionary-encoded columns, all indexed for filtering
+CATEGORICAL_FIELDS = ('issuer', 'currency', 'type', 'status', 'rating', 'country', 'greenBond')
+NUMERIC_FIELDS = ('amount', 'coupon', 'spread')
+DATE_FIELDS = ('issueDate', 'maturity')
+
+# Query filters: the categorical fields plus the issue year
+FILTER_FIELDS = CATEGORICAL_FIELDS + ('issueYear',)
+
+# Sortable columns, as in sortTraditionalTable()
+SORT_FIELDS = CATEGORICAL_FIELDS + NUMERIC_FIELDS + DATE_FIELDS + ('isin',)
+
+# Output field order, matching the JSON records
+RECORD_FIELDS = ('issuer', 'amount', 'currency', 'type', 'issueDate', 'maturity',
+                 'coupon', 'spread', 'status', 'rating', 'greenBond', 'country', 'isin')
+
+MAX_PER_PAGE = 500
+
+# Recent filter (and filter + sort) combinations whose matching rows are
+# kept, so paging through a result costs a slice
+MATCH_CACHE_SIZE = 32
+
+
+class BondStore:
+    """Columnar emission store with secondary indexes"""
+
+    def __init__(self, size, categories, codes, numbers, dates, isin, postings=None):
+        """
+        Args:
+            size (int): Number of emissions
+            categories (dict): field -> list of distinct values, sorted
+            codes (dict): field -> int32 array of indexes into categories
+            numbers (dict): field -> float64 array
+            dates (dict): field -> int32 array of days since 1970-01-01
+            isin (ndarray): ISIN per emission (str or ASCII bytes)
+            postings (dict): Prebuilt posting lists per FILTER_FIELDS field,
+                as (order, offsets); built from the codes when omitted
+        """
+        self.size = size
+        self.categories = categories
+        self.codes = codes
+        self.numbers = numbers
+        self.dates = dates
+        self.isin = isin
+
+        # Issue and maturity years as extra categorical columns
+        for field, date_field in (('issueYear', 'issueDate'), ('maturityYear', 'maturity')):
+            if field in codes:
+                continue
+            years = dates[date_field].astype('datetime64[D]').astype('datetime64[Y]').astype(np.int32) + 1970
+            year_values = np.unique(years)
+            self.categories[field] = [int(y) for y in year_values]
+            self.codes[field] = np.searchsorted(year_values, years).astype(np.int32)
+
+        self._value_codes = {
+            field: {str(value).lower() if isinstance(value, bool) else str(value): code
+                    for code, value in enumerate(values)}
+            for field, values in self.categories.items()
+        }
+        self._postings = postings or {field: self._build_postings(field) for field in FILTER_FIELDS}
+
+        self._positions = {}
+        self._orders = {}
+        self._matches = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_records(cls, records):
+        """Build a store from emission dicts as found in the JSON data file"""
+        categories = {}
+        codes = {}
+        for field in CATEGORICAL_FIELDS:
+            raw = [record[field] for record in records]
+            values = sorted(set(raw))
+            lookup = {value: code for code, value in enumerate(values)}
+            categories[field] = values
+            codes[field] = np.fromiter((lookup[v] for v in raw), dtype=np.int32, count=len(raw))
+
+        numbers = {
+            field: np.array([record[field] for record in records], dtype=np.float64)
+            for field in NUMERIC_FIELDS
+        }
+        dates = {
+            field: np.array([record[field] for record in records], dtype='datetime64[D]').astype(np.int32)
+            for field in DATE_FIELDS
+        }
+        isin = np.array([record.get('isin') or '' for record in records])
+
+        return cls(len(records), categories, codes, numbers, dates, isin)
+
+    @classmethod
+    def from_json(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_records(json.load(f))
+
+    @classmethod
+    def from_snapshot(cls, path):
+        """Open a snapshot written by to_snapshot(); columns stay memory-mapped"""
+        header, columns = open_snapshot(path)
+        categories = header['categories']
+
+        def group(prefix):
+            return {name[len(prefix):]: values for name, values in columns.items()
+                    if name.startswith(prefix) and name.count('.') == 1}
+
+        postings = None
+        if all(f'postings.{field}.order' in columns for field in FILTER_FIELDS):
+            postings = {
+                field: (columns[f'postings.{field}.order'], columns[f'postings.{field}.offsets'])
+                for field in FILTER_FIELDS
+            }
+        return cls(header['size'], categories, group('codes.'), group('numbers.'),
+                   group('dates.'), columns['isin'], postings)
+
+    def to_snapshot(self, path):
+        """Write the columns, derived year columns and posting lists to a snapshot"""
+        columns = {f'codes.{field}': values for field, values in self.codes.items()}
+        columns.update({f'numbers.{field}': values for field, values in self.numbers.items()})
+        columns.update({f'dates.{field}': values for field, values in self.dates.items()})
+        columns['isin'] = np.char.encode(self.isin, 'ascii') if self.isin.dtype.kind == 'U' else self.isin
+        for field, (order, offsets) in self._postings.items():
+            columns[f'postings.{field}.order'] = order
+            columns[f'postings.{field}.offsets'] = offsets
+        write_snapshot(path, self.size, self.categories, columns)
+
+    # ------------------------------------------------------------------
+    # Indexes
+    # ------------------------------------------------------------------
+    def _build_postings(self, field):
+        """Posting lists in CSR form: rows of value c are order[offsets[c]:offsets[c+1]]"""
+        codes = self.codes[field]
+        order = np.argsort(codes, kind='stable').astype(np.int64)
+        counts = np.bincount(codes, minlength=len(self.categories[field]))
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        return order, offsets
+
+    def _posting(self, field, code):
+        order, offsets = self._postings[field]
+        return order[offsets[code]:offsets[code + 1]]
+
+    def _sort_key(self, field):
+        """Values whose numeric order is the column's display order"""
+        if field in self.numbers:
+            return self.numbers[field]
+        if field in self.dates:
+            return self.dates[field]
+        if field == 'isin':
+            return self.isin
+        # Categories compare case-insensitively, like the front end
+        values = self.categories[field]
+        ranks = np.empty(len(values), dtype=np.int64)
+        ranks[sorted(range(len(values)), key=lambda c: str(values[c]).lower())] = np.arange(len(values))
+        return ranks[self.codes[field]]
+
+    def _sorted(self, field, descending):
+        """
+        Row order for a column and each row's position in it, built once.
+        Ties keep row order in both directions (a stable sort, as in JS).
+        """
+        key = (field, descending)
+        if key not in self._orders:
+            with self._lock:
+                if key not in self._orders:
+                    values = self._sort_key(field)
+                    if descending:
+                        # Stable descending: reverse the dense ranks, not the order
+                        _, dense = np.unique(values, return_inverse=True)
+                        order = np.argsort(-dense.ravel(), kind='stable')
+                    else:
+                        order = np.argsort(values, kind='stable')
+                    positions = np.empty(self.size, dtype=np.int64)
+                    positions[order] = np.arange(self.size)
+                    self._positions[key] = positions
+                    self._orders[key] = order
+        return self._orders[key], self._positions[key]
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def _resolve(self, filters):
+        """Map {field: value} to [(field, code)], or None if a value is unknown"""
+        resolved = []
+        for field, value in filters.items():
+            code = self._value_codes[field].get(str(value).lower() if field == 'greenBond' else str(value))
+            if code is None:
+                return None
+            resolved.append((field, code))
+        return resolved
+
+    def _match(self, resolved):
+        """Sorted row ids matching every filter, cached per filter set"""
+        cache_key = tuple(sorted(resolved))
+        with self._lock:
+            rows = self._matches.get(cache_key)
+            if rows is not None:
+                self._matches.move_to_end(cache_key)
+                return rows
+
+        if not resolved:
+            rows = np.arange(self.size)
+        else:
+            # Start from the most selective posting list
+            postings = sorted(
+                ((self._posting(field, code), field, code) for field, code in resolved),
+                key=lambda p: len(p[0])
+            )
+            rows = postings[0][0]
+            for _, field, code in postings[1:]:
+                rows = rows[self.codes[field][rows] == code]
+
+        with self._lock:
+            self._matches[cache_key] = rows
+            if len(self._matches) > MATCH_CACHE_SIZE:
+                self._matches.popitem(last=False)
+        return rows
+
+    def _match_sorted(self, resolved, rows, field, descending):
+        """Matching rows in sort order, cached per filter set and sort"""
+        cache_key = (tuple(sorted(resolved)), field, descending)
+        with self._lock:
+            sorted_rows = self._matches.get(cache_key)
+            if sorted_rows is not None:
+                self._matches.move_to_end(cache_key)
+                return sorted_rows
+
+        order, positions = self._sorted(field, descending)
+        if len(rows) * 8 < self.size:
+            # Selective filter: sort the few matching rows by sort position
+            sorted_rows = rows[np.argsort(positions[rows])]
+        else:
+            # Broad filter: keep the matching rows of the full sorted order
+            member = np.zeros(self.size, dtype=bool)
+            member[rows] = True
+            sorted_rows = order[member[order]]
+
+        with self._lock:
+            self._matches[cache_key] = sorted_rows
+            if len(self._matches) > MATCH_CACHE_SIZE:
+                self._matches.popitem(last=False)
+        return sorted_rows
+
+    def record(self, i):
+        """Rebuild the emission dict of row i"""
+        record = {}
+        for field in RECORD_FIELDS:
+            if field in self.codes:
+                value = self.categories[field][self.codes[field][i]]
+            elif field in self.numbers:
+                value = float(self.numbers[field][i])
+                if field != 'coupon' and value.is_integer():
+                    value = int(value)
+            elif field in self.dates:
+                value = str(np.datetime64(int(self.dates[field][i]), 'D'))
+            else:
+                value = self.isin[i]
+                value = value.decode('ascii') if isinstance(value, bytes) else str(value)
+            record[field] = value
+        return record
+
+    def matching_rows(self, filters):
+        """
+        Row ids matching filters, in file order.
+
+        Args:
+            filters (dict): field -> value, fields from FILTER_FIELDS
+
+        Returns:
+            ndarray: Sorted row ids
+        """
+        for field in filters:
+            if field not in FILTER_FIELDS:
+                raise ValueError(f"Unknown filter '{field}'")
+        resolved = self._resolve(filters)
+        if resolved is None:
+            return np.arange(0)
+        return self._match(resolved)
+
+    def iter_rows(self, filters=None, sort=None, descending=False, chunk_size=10_000):
+        """
+        Row ids matching filters, in file or sort order, chunk by chunk.
+        Each chunk of the order is filtered on its own, so memory does not
+        grow with the number of matches (for exports of any size).
+
+        Args:
+            filters (dict): field -> value, fields from FILTER_FIELDS
+            sort (str): Column from SORT_FIELDS, or None for file order
+            descending (bool): Sort direction
+            chunk_size (int): Rows of the order scanned per chunk
+
+        Returns:
+            iterator: ndarrays of row ids (validation happens right away)
+        """
+        filters = filters or {}
+        for field in filters:
+            if field not in FILTER_FIELDS:
+                raise ValueError(f"Unknown filter '{field}'")
+        if sort is not None and sort not in SORT_FIELDS:
+            raise ValueError(f"Unknown sort column '{sort}'")
+        resolved = self._resolve(filters)
+        order = self._sorted(sort, descending)[0] if sort is not None else None
+        return self._iter_chunks(resolved, order, chunk_size)
+
+    def _iter_chunks(self, resolved, order, chunk_size):
+        if resolved is None:
+            return
+        for start in range(0, self.size, chunk_size):
+            stop = min(start + chunk_size, self.size)
+            rows = np.arange(start, stop) if order is None else order[start:stop]
+            for field, code in resolved:
+                rows = rows[self.codes[field][rows] == code]
+            if len(rows):
+                yield rows
+
+    def query(self, filters=None, sort=None, descending=False, page=1, per_page=20):
+        """
+        Filter, sort and paginate the emissions.
+
+        Args:
+            filters (dict): field -> value, fields from FILTER_FIELDS
+            sort (str): Column from SORT_FIELDS, or None for file order
+            descending (bool): Sort direction
+            page (int): 1-based page number
+            per_page (int): Page size (at most MAX_PER_PAGE)
+
+        Returns:
+            dict: total, pages, page, per_page and the page's records
+        """
+        filters = filters or {}
+        if sort is not None and sort not in SORT_FIELDS:
+            raise ValueError(f"Unknown sort column '{sort}'")
+        if page < 1 or not 1 <= per_page <= MAX_PER_PAGE:
+            raise ValueError(f"page must be >= 1 and per_page between 1 and {MAX_PER_PAGE}")
+
+        rows = self.matching_rows(filters)
+        resolved = self._resolve(filters)
+        total = len(rows)
+
+        start = (page - 1) * per_page
+        stop = min(start + per_page, total)
+        if start >= total:
+            page_rows = rows[:0]
+        elif sort is None:
+            page_rows = rows[start:stop]
+        elif total == self.size:
+            page_rows = self._sorted(sort, descending)[0][start:stop]
+        else:
+            page_rows = self._match_sorted(resolved, rows, sort, descending)[start:stop]
+
+        return {
+            'total': total,
+            'pages': -(-total // per_page),
+            'page': page,
+            'per_page': per_page,
+            'data': [self.record(i) for i in page_rows]
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _snapshot_is_current():
+    """True if the snapshot exists and is not older than the JSON data file"""
+    try:
+        snapshot_mtime = os.stat(BONDS_SNAPSHOT_FILE).st_mtime
+    except OSError:
+        return False
+    try:
+        return snapshot_mtime >= os.stat(BONDS_DATA_FILE).st_mtime
+    except OSError:
+        return True
+
+
+def load_bond_store():
+    """Load the emissions from the snapshot if current, else from the JSON file"""
+    if _snapshot_is_current():
+        try:
+            store = BondStore.from_snapshot(BONDS_SNAPSHOT_FILE)
+            print(f"📚 Mapped {store.size} emissions from {os.path.basename(BONDS_SNAPSHOT_FILE)}")
+            return store
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Unreadable snapshot {BONDS_SNAPSHOT_FILE}: {e}")
+
+    store = BondStore.from_json(BONDS_DATA_FILE)
+    print(f"📚 Loaded {store.size} emissions from {os.path.basename(BONDS_DATA_FILE)}")
+    return store
+
+
+def get_bond_store():
+    """Return the shared store, loading the data on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = load_bond_store()
+    return _store
+
+
+def parse_filters(args):
+    """Extract the known filter fields from request arguments"""
+    return {field: args[field] for field in FILTER_FIELDS if args.get(field)}
+
+
+def query_bonds(args):
+    """
+    Run a query described by request arguments.
+
+    Args:
+        args (dict): Filters from FILTER_FIELDS plus optional sort,
+            direction ('asc' or 'desc'), page and per_page
+
+    Returns:
+        dict: API payload
+    """
+    direction = args.get('direction', 'asc')
+    if direction not in ('asc', 'desc'):
+        raise ValueError("direction must be 'asc' or 'desc'")
+    try:
+        page = int(args.get('page', 1))
+        per_page = int(args.get('per_page', 20))
+    except ValueError:
+        raise ValueError("page and per_page must be integers")
+
+    result = get_bond_store().query(
+        parse_filters(args),
+        sort=args.get('sort') or None,
+        descending=direction == 'desc',
+        page=page,
+        per_page=per_page
+    )
+    return {'status': 'success', **result}
+
+
+if __name__ == '__main__':
+    # Build the snapshot of a JSON data file, or add the posting lists to a
+    # snapshot without them: python3 -m api.bond_store [source [out.snapshot]]
+    import sys
+
+    source = sys.argv[1] if len(sys.argv) > 1 else BONDS_DATA_FILE
+    target = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(source)[0] + '.snapshot'
+    store = BondStore.from_snapshot(source) if source.endswith('.snapshot') else BondStore.from_json(source)
+    store.to_snapshot(target)
+    print(f"✅ Wrote {store.size} emissions to {target}")
@@ -0,0 +1,331 @@
+"""
+Shared Upstream Cache
+Process-shared cache with per-source TTL and stale-while-revalidate semantics.
+Entries are stored as JSON files in a directory shared by every gunicorn
+worker and mirrored in a per-process memory layer, so fresh hits only cost
+a single stat() call and never touch the network.
+
+get_or_fetch_async() is the same cache for the coroutines of the ASGI
+entry point: its fetches are awaited and it never blocks the event loop.
+"""
+
+from datetime import datetime
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+
+from api import metrics
+from api.singleflight import coalesce, coalesce_async
+
+# Directory shared by all workers on the same host (Vercel allows /tmp writes)
+CACHE_DIR = os.environ.get(
+    'UPSTREAM_CACHE_DIR',
+    os.path.join(tempfile.gettempdir(), 'covered-bonds-cache')
+)
+
+# Per-process mirror of the files: key -> (file identity, entry)
+_memory = {}
+
+# Keys currently being refreshed by a background thread of this process
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+# Background refresh tasks of the event loops (referenced until done)
+_tasks = set()
+
+
+def _path(key, suffix='.json'):
+    """Map a cache key to a file name inside CACHE_DIR"""
+    safe_key = ''.join(c if c.isalnum() or c in '-_' else '_' for c in key)
+    return os.path.join(CACHE_DIR, safe_key + suffix)
+
+
+def cache_get(key):
+    """
+    Read a cache entry.
+
+    Returns:
+        dict: {'value': ..., 'stored_at': epoch seconds} or None if missing
+    """
+    path = _path(key)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    # Files are replaced atomically, so inode + mtime identify a version
+    identity = (stat.st_ino, stat.st_mtime_ns)
+    cached = _memory.get(key)
+    if cached and cached[0] == identity:
+        return cached[1]
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    _memory[key] = (identity, entry)
+    return entry
+
+
+def cache_set(key, value):
+    """Store a value for every worker, replacing the previous entry atomically"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    entry = {'value': value, 'stored_at': time.time()}
+
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, _path(key))
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    return entry
+
+
+def _try_lock(key, blocking=False):
+    """
+    Take a cross-process lock for refreshing a key.
+    Returns the open lock file, or None if another worker holds it and
+    blocking is False.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    lock_file = open(_path(key, '.lock'), 'w')
+    flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+    try:
+        fcntl.flock(lock_file, flags)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def refresh(key, fetch):
+    """
+    Fetch and store a new value unless another worker is already doing it.
+    Exceptions from fetch() propagate; the last good payload stays cached.
+
+    Returns:
+        bool: True if this call refreshed the entry
+    """
+    lock_file = _try_lock(key)
+    if lock_file is None:
+        return False
+    try:
+        cache_set(key, fetch())
+        return True
+    finally:
+        lock_file.close()
+
+
+def refresh_due_at(key, ttl):
+    """
+    Epoch seconds at which key should be refreshed so that readers never
+    see it stale: 80% into its freshness window, or now if it is missing.
+    """
+    entry = cache_get(key)
+    if entry is None:
+        return 0
+    return entry['stored_at'] + ttl * 0.8
+
+
+def _refresh_in_background(key, fetch):
+    """Start at most one background refresh per key in this process"""
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def run():
+        try:
+            refresh(key, fetch)
+        except Exception as e:
+            print(f"⚠️ Background refresh of '{key}' failed: {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=run, name=f"cache-refresh-{key}", daemon=True).start()
+
+
+def _fetch_and_store(key, fetch, ttl):
+    """
+    Synchronous miss path, run once per key through coalesce().
+    The blocking lock makes workers queue behind the one already fetching;
+    they then find its fresh entry instead of calling the upstream again.
+    """
+    lock_file = _try_lock(key, blocking=True)
+    try:
+        entry = cache_get(key)
+        if entry is not None and time.time() - entry['stored_at'] < ttl:
+            return entry['value']
+        value = fetch()
+        cache_set(key, value)
+        return value
+    finally:
+        lock_file.close()
+
+
+def _last_good(key, entry):
+    """Value of entry, served after a failed synchronous refresh"""
+    stored = datetime.utcfromtimestamp(entry['stored_at']).isoformat()
+    print(f"⚠️ Refresh of '{key}' failed, serving payload stored at {stored}Z")
+    metrics.inc('fallback_total', source=key, data='last_good')
+    return entry['value']
+
+
+def get_or_fetch(key, fetch, ttl, stale_ttl=0):
+    """
+    Return the cached value for key, fetching it when needed.
+
+    - age < ttl: fresh hit, returned as is
+    - age < ttl + stale_ttl: stale hit, returned immediately while a
+      background refresh fetches the next value
+    - older or missing: fetched synchronously, with concurrent misses of
+      all threads and workers coalesced into a single upstream call
+
+    If a synchronous fetch fails, the last good payload is returned when one
+    exists, however old; otherwise the exception propagates to the caller.
+
+    Args:
+        key (str): Cache key, e.g. 'market'
+        fetch (callable): Returns a JSON-serializable value or raises
+        ttl (float): Freshness window in seconds
+        stale_ttl (float): Extra window during which stale data is served
+
+    Returns:
+        The cached or freshly fetched value
+    """
+    entry = cache_get(key)
+
+    if entry is not None:
+        age = time.time() - entry['stored_at']
+        if age < ttl:
+            metrics.inc('cache_requests_total', cache=key, result='hit')
+            return entry['value']
+        if age < ttl + stale_ttl:
+            metrics.inc('cache_requests_total', cache=key, result='stale')
+            _refresh_in_background(key, fetch)
+            return entry['value']
+
+    metrics.inc('cache_requests_total', cache=key, result='miss')
+    try:
+        return coalesce(key, lambda: _fetch_and_store(key, fetch, ttl))
+    except Exception:
+        if entry is None:
+            raise
+        return _last_good(key, entry)
+
+
+async def refresh_async(key, fetch):
+    """refresh() for a coroutine function fetch"""
+    lock_file = _try_lock(key)
+    if lock_file is None:
+        return False
+    try:
+        cache_set(key, await fetch())
+        return True
+    finally:
+        lock_file.close()
+
+
+def _refresh_in_background_async(key, fetch):
+    """Start at most one background refresh per key, as a task of the running loop"""
+    import asyncio
+
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    async def run():
+        try:
+            await refresh_async(key, fetch)
+        except Exception as e:
+            print(f"⚠️ Background refresh of '{key}' failed: {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    task = asyncio.ensure_future(run())
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+def _close_lock(future):
+    """Release a lock taken by a wait whose coroutine was cancelled meanwhile"""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+async def _lock_async(key):
+    """
+    Take the cross-process lock of key from an event loop: at once when it
+    is free, else by waiting for it on a thread, so the loop keeps serving
+    other requests while another worker fetches.
+    """
+    import asyncio
+
+    lock_file = _try_lock(key)
+    if lock_file is not None:
+        return lock_file
+    waiting = asyncio.get_running_loop().run_in_executor(None, _try_lock, key, True)
+    try:
+        return await asyncio.shield(waiting)
+    except asyncio.CancelledError:
+        waiting.add_done_callback(_close_lock)
+        raise
+
+
+async def _fetch_and_store_async(key, fetch, ttl):
+    """
+    Async miss path, run once per key through coalesce_async(). Workers
+    queue behind the one already fetching without blocking their loop.
+    """
+    lock_file = await _lock_async(key)
+    try:
+        entry = cache_get(key)
+        if entry is not None and time.time() - entry['stored_at'] < ttl:
+            return entry['value']
+        value = await fetch()
+        cache_set(key, value)
+        return value
+    finally:
+        lock_file.close()
+
+
+async def get_or_fetch_async(key, fetch, ttl, stale_ttl=0):
+    """
+    get_or_fetch() for the event loop: fetch is a coroutine function,
+    stale hits are refreshed by a background task and concurrent misses of
+    the loop's coroutines (and of other workers) share one upstream call.
+
+    Returns:
+        The cached or freshly fetched value
+    """
+    entry = cache_get(key)
+
+    if entry is not None:
+        age = time.time() - entry['stored_at']
+        if age < ttl:
+            metrics.inc('cache_requests_total', cache=key, result='hit')
+            return entry['value']
+        if age < ttl + stale_ttl:
+            metrics.inc('cache_requests_total', cache=key, result='stale')
+            _refresh_in_background_async(key, fetch)
+            return entry['value']
+
+    metrics.inc('cache_requests_total', cache=key, result='miss')
+    try:
+        return await coalesce_async(key, lambda: _fetch_and_store_async(key, fetch, ttl))
+    except Exception:
+        if entry is None:
+            raise
+        return _last_good(key, entry)
@@ -0,0 +1,226 @@
+"""
+Upstream Circuit Breakers
+One breaker per provider (Alpha Vantage, CoinGecko, Investing.com) so that
+an outage costs a few timed-out calls instead of a timeout per request.
+
+- closed: calls go through; outcomes are kept over a sliding time window.
+  When at least MIN_CALLS calls in the window failed at FAILURE_RATE or
+  more, the breaker opens.
+- open: calls fail immediately with CircuitOpenError, so callers drop to
+  their last good or fallback payload in microseconds. After OPEN_SECONDS
+  (doubled on every consecutive re-open, up to MAX_OPEN_SECONDS) the
+  breaker turns half-open.
+- half-open: up to HALF_OPEN_PROBES calls are let through as probes; a
+  successful probe closes the breaker, a failed one opens it again. A
+  probe ended without an outcome (cancelled, interrupted) gives its slot
+  back without counting as a failure.
+
+Breakers are per process: each gunicorn worker learns about an outage from
+its own calls (or its scheduler's refreshes, which double as probes).
+"""
+
+from collections import deque
+from datetime import datetime
+import functools
+import inspect
+import os
+import threading
+import time
+
+from api import metrics
+
+FAILURE_RATE = float(os.environ.get('CIRCUIT_FAILURE_RATE', 0.5))
+MIN_CALLS = int(os.environ.get('CIRCUIT_MIN_CALLS', 4))
+WINDOW = float(os.environ.get('CIRCUIT_WINDOW', 60))
+OPEN_SECONDS = float(os.environ.get('CIRCUIT_OPEN_SECONDS', 30))
+MAX_OPEN_SECONDS = float(os.environ.get('CIRCUIT_MAX_OPEN_SECONDS', 300))
+HALF_OPEN_PROBES = int(os.environ.get('CIRCUIT_HALF_OPEN_PROBES', 1))
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose breaker is open"""
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker with timed half-open probes"""
+
+    def __init__(self, name):
+        self.name = name
+        self.state = CLOSED
+        self._outcomes = deque()  # (monotonic time, succeeded)
+        self._opened_at = None
+        self._open_for = OPEN_SECONDS
+        self._probes = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.last_error = None
+        self.last_change = None
+
+    def _set_state(self, state):
+        self.state = state
+        self.last_change = time.time()
+        metrics.inc('circuit_transitions_total', breaker=self.name, state=state)
+        print(f"🔌 Circuit '{self.name}' {state.replace('_', '-')}")
+
+    def _prune(self, now):
+        while self._outcomes and self._outcomes[0][0] < now - WINDOW:
+            self._outcomes.popleft()
+
+    def _failure_rate(self):
+        if not self._outcomes:
+            return 0.0
+        return sum(1 for _, ok in self._outcomes if not ok) / len(self._outcomes)
+
+    def _open(self, now):
+        self._opened_at = now
+        self._set_state(OPEN)
+
+    def allow(self):
+        """Whether a call may go through now; counts probes when half-open"""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self._open_for:
+                    self.rejected += 1
+                    metrics.inc('circuit_rejections_total', breaker=self.name)
+                    return False
+                self._probes = 0
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probes >= HALF_OPEN_PROBES:
+                    self.rejected += 1
+                    metrics.inc('circuit_rejections_total', breaker=self.name)
+                    return False
+                self._probes += 1
+            return True
+
+    def is_open(self):
+        """Whether a call would be rejected now, without counting it"""
+        with self._lock:
+            if self.state == OPEN:
+                return time.monotonic() - self._opened_at < self._open_for
+            return self.state == HALF_OPEN and self._probes >= HALF_OPEN_PROBES
+
+    def record(self, succeeded, error=None):
+        """Record the outcome of a call let through by allow()"""
+        now = time.monotonic()
+        with self._lock:
+            if not succeeded:
+                self.last_error = str(error) if error is not None else None
+
+            if self.state == HALF_OPEN:
+                self._probes = max(self._probes - 1, 0)
+                if succeeded:
+                    self._outcomes.clear()
+                    self._open_for = OPEN_SECONDS
+                    self._set_state(CLOSED)
+                else:
+                    self._open_for = min(self._open_for * 2, MAX_OPEN_SECONDS)
+                    self._open(now)
+                return
+
+            self._outcomes.append((now, succeeded))
+            self._prune(now)
+            if (self.state == CLOSED and not succeeded and len(self._outcomes) >= MIN_CALLS
+                    and self._failure_rate() >= FAILURE_RATE):
+                self._open(now)
+
+    def release(self):
+        """Give back the probe slot of a call let through by allow() that ended without an outcome"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes = max(self._probes - 1, 0)
+
+    def call(self, fn, *args, **kwargs):
+        """Run fn through the breaker; raises CircuitOpenError when rejected"""
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit '{self.name}' is open, not calling the provider")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record(False, e)
+            raise
+        except BaseException:
+            self.release()
+            raise
+        self.record(True)
+        return result
+
+    async def call_async(self, fn, *args, **kwargs):
+        """Await coroutine function fn through the breaker, as call() does"""
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit '{self.name}' is open, not calling the provider")
+        try:
+            result = await fn(*args, **kwargs)
+        except Exception as e:
+            self.record(False, e)
+            raise
+        except BaseException:  # Cancelled (deadline, shutdown): no outcome
+            self.release()
+            raise
+        self.record(True)
+        return result
+
+    def stats(self):
+        with self._lock:
+            self._prune(time.monotonic())
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = round(max(self._open_for - (time.monotonic() - self._opened_at), 0), 1)
+            return {
+                'state': self.state,
+                'failure_rate': round(self._failure_rate(), 3),
+                'calls_in_window': len(self._outcomes),
+                'retry_in_s': retry_in,
+                'rejected': self.rejected,
+                'last_error': self.last_error,
+                'last_change': datetime.utcfromtimestamp(self.last_change).isoformat() + 'Z'
+                if self.last_change else None
+            }
+
+
+def get_breaker(name):
+    """Return the breaker of a provider, creating it on first use"""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(name, CircuitBreaker(name))
+    return breaker
+
+
+def guarded(name):
+    """
+    Decorator running every call of a fetch function (plain or coroutine
+    function) through a provider's breaker
+    """
+    get_breaker(name)  # Listed in /health before its first call
+
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                return await get_breaker(name).call_async(fn, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return get_breaker(name).call(fn, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def breaker_stats():
+    """
+    Breaker monitoring data per provider.
+
+    Returns:
+        dict: {name: {'state', 'failure_rate', 'calls_in_window', 'retry_in_s',
+        'rejected', 'last_error', 'last_change'}}
+    """
+    with _breakers_lock:
+        breakers = list(_breakers.items())
+    return {name: breaker.stats() for name, breaker in breakers}
@@ -1,110 +1,328 @@
 """
 Digital Assets & RWA Feed API
-Serverless function for Vercel that fetches real-time tokenized asset data
-using CoinGecko API (free tier, no key required).
+Fetches real-time tokenized asset data using CoinGecko API (free tier, no
+key required). Served on Vercel by the Flask app of api/index_digital.py;
+this module imports neither Flask nor flask_cors.
 """
 
-from flask import Flask, jsonify
-from flask_cors import CORS
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import requests
+import json
+import os
+import sys
+import time
 
-app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
+# Make the project root importable when deployed as a standalone function
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import metrics, timeseries
+from api.async_http import async_get
+from api.cache import get_or_fetch, get_or_fetch_async, refresh, refresh_due_at
+from api.circuit_breaker import CircuitOpenError, get_breaker, guarded
+from api.http_client import http_get
+from api.rate_limit import TokenBucket
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 # CoinGecko API configuration
-COINGECKO_BASE_URL = 'https://api.coingecko.com/api/v3'
+COINGECKO_BASE_URL = os.environ.get('COINGECKO_BASE_URL', 'https://api.coingecko.com/api/v3')
 
-def get_digital_assets_data():
+# Shared cache windows (seconds): prices are fresh for 1 minute, then served
+# stale for up to an hour while a background refresh hits CoinGecko
+CACHE_TTL = int(os.environ.get('DIGITAL_CACHE_TTL', 60))
+CACHE_STALE_TTL = int(os.environ.get('DIGITAL_CACHE_STALE_TTL', 3600))
+
+# Tracked tokenized assets: CoinGecko id, display ticker, type, quote
+# currency, static yield and price decimals, plus an optional default_price
+# shown when CoinGecko omits the asset's price, e.g. 1.0 for stablecoins
+# (see tokenized-assets.json)
+DIGITAL_ASSETS_FILE = os.environ.get('DIGITAL_ASSETS_FILE', os.path.join(ROOT, 'tokenized-assets.json'))
+ASSET_FIELDS = ('id', 'ticker', 'type', 'currency', 'yield', 'decimals')
+
+# Longest ids parameter per /simple/price call, keeping URLs well under
+# the ~2 KB proxies and CDNs accept
+MAX_IDS_LENGTH = int(os.environ.get('COINGECKO_MAX_IDS_LENGTH', 1500))
+
+# Batches fetched at the same time, and the CoinGecko quota shared by all
+# workers (free tier: about 30 calls per minute). A refresh takes one token
+# per batch at once, so the burst must cover the batch count of the universe.
+BATCH_CONCURRENCY = int(os.environ.get('COINGECKO_CONCURRENCY', 4))
+QUOTA = TokenBucket(
+    'coingecko',
+    rate=float(os.environ.get('COINGECKO_QUOTA_PER_MINUTE', 30)) / 60,
+    capacity=float(os.environ.get('COINGECKO_QUOTA_BURST', 30))
+)
+
+_batch_pool = ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY, thread_name_prefix='coingecko')
+
+def load_assets(path=DIGITAL_ASSETS_FILE):
     """
-    Fetch real-time data for tokenized assets from CoinGecko.
+    Load the tracked asset universe.
     
-    Assets tracked:
-    - Ondo USDY (Tokenized US Treasury)
-    - EURC (Circle Euro - Digital Cash)
-    - PAXG (Tether Gold - Commodity-backed)
+    Args:
+        path (str): JSON list of assets with the ASSET_FIELDS keys
     
     Returns:
-        dict: Market data for digital assets
+        list: Asset dicts, in display order
+    
+    Raises:
+        ValueError: If an asset misses a field or an id appears twice
     """
-    try:
-        # CoinGecko IDs for tracked assets
-        asset_ids = "ondo-us-dollar-yield,euro-coin,pax-gold"
-        
-        # API endpoint for simple price data
-        params = {
-            'ids': asset_ids,
-            'vs_currencies': 'usd,eur',
-            'include_24hr_change': 'true',
-            'include_24hr_vol': 'true'
-        }
-        
-        # Make API request
-        response = requests.get(
+    with open(path, 'r', encoding='utf-8') as f:
+        assets = json.load(f)
+    
+    seen = set()
+    for asset in assets:
+        missing = [field for field in ASSET_FIELDS if field not in asset]
+        if missing:
+            raise ValueError(f"Asset {asset.get('id', '?')} misses {', '.join(missing)}")
+        if asset['id'] in seen:
+            raise ValueError(f"Asset {asset['id']} is listed twice")
+        seen.add(asset['id'])
+    return assets
+
+ASSETS = load_assets()
+
+def id_batches(ids, max_length=MAX_IDS_LENGTH):
+    """
+    Split CoinGecko ids into comma-joined batches whose URL-encoded length
+    is at most max_length characters each.
+    
+    Returns:
+        list: ids parameter values
+    """
+    batches, current, length = [], [], 0
+    for asset_id in ids:
+        added = len(asset_id) + (3 if current else 0)  # Commas are sent as %2C
+        if current and length + added > max_length:
+            batches.append(','.join(current))
+            current, length = [], 0
+            added = len(asset_id)
+        current.append(asset_id)
+        length += added
+    if current:
+        batches.append(','.join(current))
+    return batches
+
+def _price_params(ids, vs_currencies):
+    """/simple/price query parameters of one batch"""
+    return {
+        'ids': ids,
+        'vs_currencies': vs_currencies,
+        'include_24hr_change': 'true',
+        'include_24hr_vol': 'true'
+    }
+
+def _fetch_batch(ids, vs_currencies):
+    """One /simple/price call"""
+    with metrics.timer('upstream_fetch_seconds', source='digital-bonds'):
+        response = http_get(
             f"{COINGECKO_BASE_URL}/simple/price",
-            params=params,
-            timeout=10
+            params=_price_params(ids, vs_currencies),
+            read_timeout=10
         )
         response.raise_for_status()
-        data = response.json()
-        
-        # Check if we got valid data
-        if not data:
-            return get_fallback_data()
-        
-        # Format data for frontend
-        feed = []
-        
-        # Ondo USDY (Tokenized Treasury)
-        if 'ondo-us-dollar-yield' in data:
-            usdy = data['ondo-us-dollar-yield']
-            feed.append({
-                "ticker": "USDY (Ondo Treasury)",
-                "type": "Tokenized Bond",
-                "price": round(usdy.get('usd', 1.0), 4),
-                "currency": "USD",
-                "change": round(usdy.get('usd_24h_change', 0), 2),
-                "volume": format_volume(usdy.get('usd_24h_vol', 0)),
-                "yield": "5.10%"  # Static proxy yield for treasury bonds
-            })
-        
-        # EURC (Circle Euro)
-        if 'euro-coin' in data:
-            eurc = data['euro-coin']
-            feed.append({
-                "ticker": "EURC (Circle Euro)",
-                "type": "Digital Cash",
-                "price": round(eurc.get('eur', 1.0), 4),
-                "currency": "EUR",
-                "change": round(eurc.get('eur_24h_change', 0), 2),
-                "volume": format_volume(eurc.get('eur_24h_vol', 0)),
-                "yield": "N/A"
-            })
-        
-        # PAXG (Tether Gold)
-        if 'pax-gold' in data:
-            paxg = data['pax-gold']
-            feed.append({
-                "ticker": "PAXG (Tether Gold)",
-                "type": "Commodity-Backed",
-                "price": round(paxg.get('usd', 0), 2),
-                "currency": "USD",
-                "change": round(paxg.get('usd_24h_change', 0), 2),
-                "volume": format_volume(paxg.get('usd_24h_vol', 0)),
-                "yield": "N/A"
-            })
-        
-        return {
-            "status": "success",
-            "data": feed,
-            "updated": datetime.utcnow().strftime("%H:%M"),
-            "source": "CoinGecko"
+    with metrics.timer('parse_seconds', source='digital-bonds'):
+        return response.json()
+
+async def _fetch_batch_async(ids, vs_currencies, limit):
+    """One /simple/price call over the non-blocking client"""
+    async with limit:
+        with metrics.timer('upstream_fetch_seconds', source='digital-bonds'):
+            response = await async_get(
+                f"{COINGECKO_BASE_URL}/simple/price",
+                params=_price_params(ids, vs_currencies),
+                read_timeout=10
+            )
+            response.raise_for_status()
+    with metrics.timer('parse_seconds', source='digital-bonds'):
+        return response.json()
+
+@guarded('coingecko')
+def fetch_prices(batches, vs_currencies):
+    """
+    Fetch every batch concurrently and merge the prices of those that
+    succeeded.
+    
+    Returns:
+        dict: CoinGecko id -> prices, changes and volumes
+    
+    Raises:
+        Exception: The first batch error, when no batch succeeded
+    """
+    futures = [_batch_pool.submit(_fetch_batch, ids, vs_currencies) for ids in batches]
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            results.append(e)
+    return _merge_batches(batches, results)
+
+@guarded('coingecko')
+async def fetch_prices_async(batches, vs_currencies):
+    """fetch_prices() with the batches awaited concurrently, BATCH_CONCURRENCY at a time"""
+    import asyncio
+
+    limit = asyncio.Semaphore(BATCH_CONCURRENCY)
+    results = await asyncio.gather(*(_fetch_batch_async(ids, vs_currencies, limit) for ids in batches),
+                                   return_exceptions=True)
+    return _merge_batches(batches, results)
+
+def _merge_batches(batches, results):
+    """
+    Merge the prices of the batches that succeeded; a failed batch is
+    logged and its assets are left out (listed as missing in the payload).
+    
+    Args:
+        batches (list): ids parameter of each batch
+        results (list): Prices or exception of each batch, in batch order
+    """
+    data, errors = {}, []
+    for ids, result in zip(batches, results):
+        if isinstance(result, BaseException):
+            if not isinstance(result, Exception):
+                raise result  # Cancelled: not a CoinGecko failure
+            errors.append(result)
+            print(f"⚠️ CoinGecko batch of {ids.count(',') + 1} ids failed: {result}")
+            continue
+        data.update(result)
+
+    if errors and len(errors) == len(batches):
+        raise errors[0]
+    # Check if we got valid data
+    if not data:
+        raise ValueError("Empty response from CoinGecko")
+    return data
+
+def fetch_digital_assets_data(assets=None):
+    """
+    Fetch real-time data for tokenized assets from CoinGecko.
+    
+    The ids are split into URL-length-safe batches fetched concurrently;
+    the tokens of every batch are taken from the shared quota up front, so
+    a refresh either fits the rate limit as a whole or does not start.
+    
+    Args:
+        assets (list): Asset universe, default ASSETS (tokenized-assets.json)
+    
+    Returns:
+        dict: Market data for digital assets
+    
+    Raises:
+        Exception: If a request fails or CoinGecko returns no data
+        RateLimitExceeded: If the quota cannot cover every batch now
+        CircuitOpenError: Without calling CoinGecko while its breaker is open
+    """
+    assets = ASSETS if assets is None else assets
+    batches, vs_currencies = _spend_quota(assets)
+    return _build_payload(assets, fetch_prices(batches, vs_currencies))
+
+async def fetch_digital_assets_data_async(assets=None):
+    """
+    fetch_digital_assets_data() over the non-blocking client (ASGI entry
+    point); the quota file lock and the quote history write run on threads,
+    off the event loop
+    """
+    import asyncio
+
+    assets = ASSETS if assets is None else assets
+    batches, vs_currencies = await asyncio.to_thread(_spend_quota, assets)
+    data = await fetch_prices_async(batches, vs_currencies)
+    return await asyncio.to_thread(_build_payload, assets, data)
+
+def _spend_quota(assets):
+    """
+    Batches and quote currencies of a refresh of assets, once the tokens of
+    every batch are taken from the shared quota.
+    
+    Returns:
+        tuple: (list of ids parameters, vs_currencies parameter)
+    """
+    batches = id_batches([asset['id'] for asset in assets])
+    vs_currencies = ','.join(sorted({asset['currency'].lower() for asset in assets}))
+    
+    if get_breaker('coingecko').is_open():
+        # Keep the tokens for the probe that will close the breaker
+        raise CircuitOpenError("Circuit 'coingecko' is open, not calling the provider")
+    QUOTA.acquire_or_raise(len(batches))
+    return batches, vs_currencies
+
+def _build_payload(assets, data):
+    """Format the fetched prices for the frontend, in one pass over the universe"""
+    build_started = time.perf_counter()
+    rows, missing = [], []
+    for asset in assets:
+        prices = data.get(asset['id'])
+        if prices is None:
+            missing.append(asset['ticker'])
+            continue
+        currency = asset['currency'].lower()
+        price = prices.get(currency)
+        rows.append((asset, price, prices.get(f'{currency}_24h_change') or 0,
+                     prices.get(f'{currency}_24h_vol') or 0))
+    
+    volumes = format_volumes([volume for _, _, _, volume in rows])
+    feed = [
+        {
+            "ticker": asset['ticker'],
+            "type": asset['type'],
+            "price": round(price if price is not None else asset.get('default_price', 0), asset['decimals']),
+            "currency": asset['currency'],
+            "change": round(change, 2),
+            "volume": volume_label,
+            "yield": asset['yield']
         }
-        
+        for (asset, price, change, _), volume_label in zip(rows, volumes)
+    ]
+
+    payload = {
+        "status": "success",
+        "data": feed,
+        "updated": datetime.utcnow().strftime("%H:%M"),
+        "source": "CoinGecko"
+    }
+    if missing:
+        payload["missing"] = missing  # Not returned by CoinGecko (e.g. their batch failed)
+    metrics.observe('payload_build_seconds', time.perf_counter() - build_started, source='digital-bonds')
+    timeseries.record_many([
+        (f"coingecko:{asset['id']}", price, volume) for asset, price, _, volume in rows if price
+    ])
+    return payload
+
+def get_digital_assets_data():
+    """
+    Get digital assets data through the shared upstream cache.
+    Stale payloads are served while a background refresh runs; the static
+    fallback is only used when no good payload has ever been fetched.
+    
+    Returns:
+        dict: Market data for digital assets
+    """
+    try:
+        return get_or_fetch('digital-bonds', fetch_digital_assets_data,
+                            ttl=CACHE_TTL, stale_ttl=CACHE_STALE_TTL)
+    except Exception as e:
+        print(f"Error fetching from CoinGecko: {str(e)}")
+        return get_fallback_data()
+
+async def get_digital_assets_data_async():
+    """get_digital_assets_data() for the ASGI entry point"""
+    try:
+        return await get_or_fetch_async('digital-bonds', fetch_digital_assets_data_async,
+                                        ttl=CACHE_TTL, stale_ttl=CACHE_STALE_TTL)
     except Exception as e:
         print(f"Error fetching from CoinGecko: {str(e)}")
         return get_fallback_data()
 
+def refresh_digital_assets_data():
+    """Refresh the cached prices ahead of expiry (background scheduler job)"""
+    refresh('digital-bonds', fetch_digital_assets_data)
+
+def next_digital_refresh():
+    """Epoch seconds at which the background scheduler should refresh"""
+    return refresh_due_at('digital-bonds', CACHE_TTL)
+
 def format_volume(volume):
     """Format volume in K/M notation"""
     if volume >= 1_000_000:
@@ -114,11 +332,16 @@ def format_volume(volume):
     else:
         return str(int(volume))
 
+def format_volumes(volumes):
+    """format_volume over a whole column"""
+    return [format_volume(volume) for volume in volumes]
+
 def get_fallback_data():
     """
     Fallback data when API is unavailable.
     Returns realistic static data for demo purposes.
     """
+    metrics.inc('fallback_total', source='digital-bonds', data='static')
     return {
         "status": "success",
         "data": [
@@ -155,36 +378,6 @@ def get_fallback_data():
         "note": "Using cached data - API may be unavailable"
     }
 
-@app.route('/')
-def home():
-    """Health check endpoint"""
-    return jsonify({
-        "service": "Digital Assets & RWA Feed API",
-        "status": "online",
-        "version": "1.0.0",
-        "data_provider": "CoinGecko",
-        "endpoints": {
-            "/api/digital-bonds": "Get current digital assets data"
-        }
-    })
-
-@app.route('/api/digital-bonds')
-def digital_bonds():
-    """
-    Main API endpoint for digital assets data.
-    Returns real-time data for tokenized assets.
-    """
-    data = get_digital_assets_data()
-    
-    # Add CORS headers for GitHub Pages
-    response = jsonify(data)
-    response.headers.add('Access-Control-Allow-Origin', '*')
-    response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
-    response.headers.add('Access-Control-Allow-Methods', 'GET')
-    response.headers.add('Cache-Control', 'public, max-age=3600')  # Cache for 1 hour
-    
-    return response
-
 # For local testing
 if __name__ == '__main__':
     print("Testing Digital Assets & RWA Feed API...")
@@ -209,4 +402,5 @@ if __name__ == '__main__':
     
     print("-" * 60)
     print("\nStarting Flask server on http://0.0.0.0:3001")
+    from api.index_digital import app
     app.run(host='0.0.0.0', port=3001, debug=True)
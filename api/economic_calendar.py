@@ -1,25 +1,71 @@
 """
 Economic Calendar API
-Serverless function for Vercel that scrapes Investing.com economic calendar
-and provides real-time economic events data with daily 8 AM updates.
+Scrapes the Investing.com economic calendar and provides real-time economic
+events data with daily 8 AM updates (served on Vercel by index_calendar.py).
+The page parser (lxml, or BeautifulSoup for html.parser) is imported on
+first parse rather than at cold start.
 """
 
-from flask import Flask, jsonify
-from flask_cors import CORS
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
-import requests
-import re
-
-app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
-
-# Cache for scraped data (24-hour expiration)
-_cache = {
-    'data': None,
-    'timestamp': None,
-    'next_update': None
+import functools
+import hashlib
+import os
+import sys
+import threading
+import time
+
+# Make the project root importable when deployed as a standalone function
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import metrics
+from api.cache import cache_get, get_or_fetch, get_or_fetch_async, refresh
+from api.circuit_breaker import guarded
+from api.async_http import async_get, async_post
+from api.http_client import http_get, http_post
+
+# Investing.com economic calendar URL
+INVESTING_CALENDAR_URL = os.environ.get('INVESTING_CALENDAR_URL', 'https://www.investing.com/economic-calendar/')
+
+# Calendar page parser: 'lxml' (fast path, parses only the calendar table)
+# or 'html.parser' (BeautifulSoup over the whole page)
+CALENDAR_PARSER = os.environ.get('CALENDAR_PARSER', 'lxml')
+
+# Multi-day mode, off by default: days scraped from today on, fetched from
+# the calendar's filtered-data service in chunks of CALENDAR_CHUNK_DAYS, at
+# most CALENDAR_CONCURRENCY at a time (CALENDAR_DAYS=0: the calendar page
+# only, first 50 events)
+CALENDAR_SERVICE_URL = os.environ.get(
+    'CALENDAR_SERVICE_URL',
+    'https://www.investing.com/economic-calendar/Service/getCalendarFilteredData'
+)
+CALENDAR_DAYS = max(0, int(os.environ.get('CALENDAR_DAYS', 0)))
+CALENDAR_CHUNK_DAYS = max(1, int(os.environ.get('CALENDAR_CHUNK_DAYS', 1)))
+CALENDAR_CONCURRENCY = max(1, int(os.environ.get('CALENDAR_CONCURRENCY', 3)))
+
+# Seconds between two refreshes of today's chunk only (newly published
+# actuals); the full range is scraped again at the daily update
+CALENDAR_INTRADAY_REFRESH = int(os.environ.get('CALENDAR_INTRADAY_REFRESH', 900))
+
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': 'https://www.investing.com/'
 }
+PAGE_HEADERS = dict(BROWSER_HEADERS, Accept='text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8')
+SERVICE_HEADERS = dict(BROWSER_HEADERS, Accept='application/json', **{'X-Requested-With': 'XMLHttpRequest'})
+
+# Scraped calendar, shared by every worker through the file cache
+# (24-hour expiration)
+CACHE_KEY = 'economic-calendar'
+CACHE_TTL = 24 * 3600
+
+# Multi-day events merged across refreshes: event id -> event, seeded from
+# the shared calendar before each merge
+_events = {}
+_events_lock = threading.Lock()
+
+_chunk_pool = ThreadPoolExecutor(max_workers=CALENDAR_CONCURRENCY, thread_name_prefix='calendar')
 
 def get_country_flag(country_code):
     """Convert country code to flag emoji"""
@@ -39,115 +85,477 @@ def parse_importance(sentiment_class):
     else:
         return 'low'
 
-def scrape_investing_calendar():
+def _row_date(row_datetime, day):
+    """Date of a row from its data-event-datetime ('2026/01/12 08:30:00'), else day"""
+    if row_datetime and len(row_datetime) >= 10:
+        return row_datetime[:10].replace('/', '-')
+    return day.isoformat()
+
+def _header_day(cell_id, text):
     """
-    Scrape economic calendar from Investing.com
-    Returns list of economic events for the next 7 days
+    Date of a day-header row (<td class="theDay" id="theDay1768176000">
+    Monday, January 12, 2026</td>), or None if it cannot be read
     """
+    if cell_id and cell_id.startswith('theDay') and cell_id[len('theDay'):].isdigit():
+        return datetime.utcfromtimestamp(int(cell_id[len('theDay'):])).date()
     try:
-        # Investing.com economic calendar URL
-        url = 'https://www.investing.com/economic-calendar/'
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Referer': 'https://www.investing.com/'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        events = []
-        today = datetime.now().date()
-        
-        # Find the economic calendar table
-        table = soup.find('table', {'id': 'economicCalendarData'})
-        
-        if not table:
-            print("⚠️ Calendar table not found, using fallback")
-            return get_fallback_data()['data']
-        
-        rows = table.find_all('tr', {'class': re.compile(r'js-event-item')})
-        
-        for row in rows[:50]:  # Limit to 50 events
-            try:
-                # Extract data from row
-                time_cell = row.find('td', {'class': 'time'})
-                country_cell = row.find('td', {'class': 'flagCur'})
-                event_cell = row.find('td', {'class': 'event'})
-                sentiment_cell = row.find('td', {'class': 'sentiment'})
-                actual_cell = row.find('td', {'class': 'act'})
-                forecast_cell = row.find('td', {'class': 'fore'})
-                previous_cell = row.find('td', {'class': 'prev'})
-                
-                if not (time_cell and event_cell):
-                    continue
-                
-                # Parse time
-                time_str = time_cell.text.strip()
-                if not time_str or time_str == 'All Day':
-                    time_str = '00:00'
-                
-                # Parse country
-                country_code = 'US'  # Default
-                if country_cell:
-                    flag_span = country_cell.find('span', {'class': re.compile(r'ceFlags')})
-                    if flag_span and flag_span.get('class'):
-                        classes = flag_span.get('class')
-                        for cls in classes:
+        return datetime.strptime(text.strip(), '%A, %B %d, %Y').date()
+    except ValueError:
+        return None
+
+def _event_id(row_id, day, time_str, country_code, event_name):
+    """
+    Stable identity of an event: the Investing.com row id (eventRowId_NNN),
+    else a digest of when, where and what
+    """
+    if row_id and row_id.startswith('eventRowId_'):
+        return row_id[len('eventRowId_'):]
+    key = f"{day}|{time_str}|{country_code}|{event_name}".encode('utf-8')
+    return hashlib.sha1(key).hexdigest()[:16]
+
+def _build_event(day, time_str, country_code, event_name, importance,
+                 actual, forecast, previous, row_id=None):
+    """Create the event dict served to the dashboard from raw cell values"""
+    if not time_str or time_str == 'All Day':
+        time_str = '00:00'
+    
+    return {
+        'id': _event_id(row_id, day, time_str, country_code, event_name),
+        'datetime': f"{day}T{time_str}:00",
+        'country': get_country_flag(country_code),
+        'country_code': country_code,
+        'event': event_name,
+        'importance': importance,
+        'previous': previous if previous else 'N/A',
+        'forecast': forecast if forecast else 'N/A',
+        'actual': actual if actual else None,
+        'impact': 'medium'  # Default impact
+    }
+
+def _parse_rows_soup(page, today, limit):
+    """Reference parser: full BeautifulSoup tree with html.parser"""
+    from bs4 import BeautifulSoup
+    import re
+
+    soup = BeautifulSoup(page, 'html.parser')
+    
+    # Find the economic calendar table
+    table = soup.find('table', {'id': 'economicCalendarData'})
+    
+    if not table:
+        return None
+    
+    events = []
+    event_rows = 0
+    day = today  # Date of rows without their own, from the last day header
+    
+    for row in table.find_all('tr'):
+        header = row.find('td', {'class': 'theDay'})
+        if header is not None:
+            day = _header_day(header.get('id'), header.text) or day
+            continue
+        if not any('js-event-item' in cls for cls in row.get('class') or []):
+            continue
+        if limit is not None and event_rows >= limit:
+            break
+        event_rows += 1
+        try:
+            # Extract data from row
+            time_cell = row.find('td', {'class': 'time'})
+            country_cell = row.find('td', {'class': 'flagCur'})
+            event_cell = row.find('td', {'class': 'event'})
+            sentiment_cell = row.find('td', {'class': 'sentiment'})
+            actual_cell = row.find('td', {'class': 'act'})
+            forecast_cell = row.find('td', {'class': 'fore'})
+            previous_cell = row.find('td', {'class': 'prev'})
+            
+            if not (time_cell and event_cell):
+                continue
+            
+            # Parse country
+            country_code = 'US'  # Default
+            if country_cell:
+                flag_span = country_cell.find('span', {'class': re.compile(r'ceFlags')})
+                if flag_span and flag_span.get('class'):
+                    classes = flag_span.get('class')
+                    for cls in classes:
+                        if cls != 'ceFlags' and len(cls) == 2:
+                            country_code = cls.upper()
+                            break
+            
+            # Parse importance
+            importance = 'low'
+            if sentiment_cell:
+                icon = sentiment_cell.find('i')
+                if icon and icon.get('class'):
+                    importance = parse_importance(' '.join(icon.get('class')))
+            
+            events.append(_build_event(
+                _row_date(row.get('data-event-datetime'), day),
+                time_cell.text.strip(),
+                country_code,
+                event_cell.text.strip(),
+                importance,
+                actual_cell.text.strip() if actual_cell else None,
+                forecast_cell.text.strip() if forecast_cell else None,
+                previous_cell.text.strip() if previous_cell else None,
+                row.get('id')
+            ))
+            
+        except Exception as e:
+            print(f"Error parsing row: {e}")
+            continue
+    
+    return events
+
+# Selector of the lxml fast path, compiled on first use
+_CALENDAR_TABLE = '//table[@id="economicCalendarData"]'
+
+# Row cells we read, by the td class that identifies them
+_CELL_CLASSES = ('time', 'flagCur', 'event', 'sentiment', 'act', 'fore', 'prev')
+
+def _slice_calendar_table(page):
+    """Cut the calendar table out of the page so the rest is never parsed"""
+    marker = page.find('id="economicCalendarData"')
+    if marker < 0:
+        return None
+    start = page.rfind('<table', 0, marker)
+    end = page.find('</table>', marker)
+    if start < 0 or end < 0:
+        return None
+    return page[start:end + len('</table>')]
+
+@functools.lru_cache(maxsize=None)
+def _xpath(expression):
+    from lxml import etree
+    return etree.XPath(expression)
+
+def _parse_rows_lxml(page, today, limit):
+    """
+    Fast parser: slices out the economicCalendarData table, parses only
+    that fragment with lxml and reads each row's cells in a single pass.
+    Produces the same events as _parse_rows_soup().
+    """
+    from lxml import html as lxml_html
+
+    if isinstance(page, bytes):
+        page = page.decode('utf-8', errors='replace')
+    
+    fragment = _slice_calendar_table(page)
+    if fragment is not None:
+        table = lxml_html.fromstring(fragment)
+    else:
+        # Unusual markup: fall back to locating the table in the full page
+        tables = _xpath(_CALENDAR_TABLE)(lxml_html.fromstring(page))
+        if not tables:
+            return None
+        table = tables[0]
+    
+    events = []
+    event_rows = 0
+    day = today  # Date of rows without their own, from the last day header
+    for row in table.iter('tr'):
+        header = next((td for td in row.iter('td') if 'theDay' in td.get('class', '').split()), None)
+        if header is not None:
+            day = _header_day(header.get('id'), header.text_content()) or day
+            continue
+        if 'js-event-item' not in row.get('class', ''):
+            continue
+        if limit is not None and event_rows >= limit:
+            break
+        event_rows += 1
+        try:
+            # First td carrying each class, like BeautifulSoup's find()
+            cells = {}
+            for td in row.iter('td'):
+                for cls in td.get('class', '').split():
+                    if cls in _CELL_CLASSES and cls not in cells:
+                        cells[cls] = td
+            
+            time_cell = cells.get('time')
+            event_cell = cells.get('event')
+            if time_cell is None or event_cell is None:
+                continue
+            
+            # Parse country
+            country_code = 'US'  # Default
+            country_cell = cells.get('flagCur')
+            if country_cell is not None:
+                for span in country_cell.iter('span'):
+                    if 'ceFlags' in span.get('class', ''):
+                        for cls in span.get('class').split():
                             if cls != 'ceFlags' and len(cls) == 2:
                                 country_code = cls.upper()
                                 break
-                
-                # Parse event name
-                event_name = event_cell.text.strip()
-                
-                # Parse importance
-                importance = 'low'
-                if sentiment_cell:
-                    icon = sentiment_cell.find('i')
-                    if icon and icon.get('class'):
-                        importance = parse_importance(' '.join(icon.get('class')))
-                
-                # Parse values
-                actual = actual_cell.text.strip() if actual_cell else None
-                forecast = forecast_cell.text.strip() if forecast_cell else None
-                previous = previous_cell.text.strip() if previous_cell else None
-                
-                # Create event object
-                event = {
-                    'datetime': f"{today}T{time_str}:00",
-                    'country': get_country_flag(country_code),
-                    'country_code': country_code,
-                    'event': event_name,
-                    'importance': importance,
-                    'previous': previous if previous else 'N/A',
-                    'forecast': forecast if forecast else 'N/A',
-                    'actual': actual if actual else None,
-                    'impact': 'medium'  # Default impact
-                }
-                
-                events.append(event)
-                
-            except Exception as e:
-                print(f"Error parsing row: {e}")
-                continue
-        
-        print(f"✅ Scraped {len(events)} events from Investing.com")
-        return events if events else get_fallback_data()['data']
-        
+                        break
+            
+            # Parse importance
+            importance = 'low'
+            sentiment_cell = cells.get('sentiment')
+            if sentiment_cell is not None:
+                icon = next(sentiment_cell.iter('i'), None)
+                if icon is not None and icon.get('class', '').split():
+                    importance = parse_importance(' '.join(icon.get('class').split()))
+            
+            actual_cell = cells.get('act')
+            forecast_cell = cells.get('fore')
+            previous_cell = cells.get('prev')
+            
+            events.append(_build_event(
+                _row_date(row.get('data-event-datetime'), day),
+                time_cell.text_content().strip(),
+                country_code,
+                event_cell.text_content().strip(),
+                importance,
+                actual_cell.text_content().strip() if actual_cell is not None else None,
+                forecast_cell.text_content().strip() if forecast_cell is not None else None,
+                previous_cell.text_content().strip() if previous_cell is not None else None,
+                row.get('id')
+            ))
+            
+        except Exception as e:
+            print(f"Error parsing row: {e}")
+            continue
+    
+    return events
+
+_PARSERS = {
+    'lxml': _parse_rows_lxml,
+    'html.parser': _parse_rows_soup
+}
+
+if CALENDAR_PARSER not in _PARSERS:
+    print(f"⚠️ Unknown CALENDAR_PARSER '{CALENDAR_PARSER}', using 'lxml' (expected one of {', '.join(_PARSERS)})")
+    CALENDAR_PARSER = 'lxml'
+
+def parse_calendar_html(page, today=None, limit=50, parser=None):
+    """
+    Parse the events of an Investing.com economic calendar page.
+    
+    Args:
+        page (bytes or str): Calendar page HTML
+        today (date): Date of rows with neither data-event-datetime nor a
+            preceding day-header row (defaults to today)
+        limit (int): Maximum number of events, None for all
+        parser (str): 'lxml' (fast path) or 'html.parser' (BeautifulSoup);
+            defaults to CALENDAR_PARSER
+    
+    Returns:
+        list: Event dicts, or None if the calendar table is missing
+    
+    Raises:
+        ValueError: If parser is not a known parser name
+    """
+    if parser is not None and parser not in _PARSERS:
+        raise ValueError(f"Unknown calendar parser '{parser}' (expected one of {', '.join(_PARSERS)})")
+    if today is None:
+        today = datetime.now().date()
+    return _PARSERS[parser or CALENDAR_PARSER](page, today, limit)
+
+@guarded('investing')
+def fetch_calendar_page(headers):
+    """
+    Download the Investing.com calendar page; fails fast with
+    CircuitOpenError while the Investing.com breaker is open.
+    """
+    response = http_get(INVESTING_CALENDAR_URL, headers=headers, read_timeout=15)
+    response.raise_for_status()
+    return response.content
+
+@guarded('investing')
+async def fetch_calendar_page_async(headers):
+    """fetch_calendar_page() over the non-blocking client (ASGI entry point)"""
+    response = await async_get(INVESTING_CALENDAR_URL, headers=headers, read_timeout=15)
+    response.raise_for_status()
+    return response.content
+
+def _page_events(page):
+    """Events of a downloaded calendar page, or the fallback events"""
+    with metrics.timer('parse_seconds', source='economic-calendar'):
+        events = parse_calendar_html(page, limit=50)  # Limit to 50 events
+    
+    if events is None:
+        print("⚠️ Calendar table not found, using fallback")
+        return get_fallback_data()['data']
+    
+    print(f"✅ Scraped {len(events)} events from Investing.com")
+    return events if events else get_fallback_data()['data']
+
+def scrape_investing_calendar():
+    """
+    Scrape economic calendar from Investing.com
+    Returns the first 50 events of the calendar page, i.e. the range the
+    page shows by default (today's events), or the fallback events. With
+    CALENDAR_DAYS set, the calendar is scraped from CALENDAR_DAYS day
+    chunks of the filtered-data service instead (scrape_calendar_range),
+    and this page only serves when those return nothing.
+    """
+    try:
+        with metrics.timer('upstream_fetch_seconds', source='economic-calendar'):
+            page = fetch_calendar_page(PAGE_HEADERS)
+        return _page_events(page)
+    except Exception as e:
+        print(f"❌ Error scraping Investing.com: {e}")
+        return get_fallback_data()['data']
+
+async def scrape_investing_calendar_async():
+    """scrape_investing_calendar() awaiting the page download"""
+    try:
+        with metrics.timer('upstream_fetch_seconds', source='economic-calendar'):
+            page = await fetch_calendar_page_async(PAGE_HEADERS)
+        return _page_events(page)
     except Exception as e:
         print(f"❌ Error scraping Investing.com: {e}")
         return get_fallback_data()['data']
 
+@guarded('investing')
+def fetch_calendar_chunk(start, end):
+    """
+    Download the calendar rows of [start, end) from the filtered-data
+    service; fails fast with CircuitOpenError while the breaker is open.
+    
+    Returns:
+        str: Event rows HTML (<tr> elements)
+    """
+    response = http_post(CALENDAR_SERVICE_URL, data=_chunk_form(start, end), headers=SERVICE_HEADERS,
+                         read_timeout=15)
+    response.raise_for_status()
+    return response.json()['data']
+
+@guarded('investing')
+async def fetch_calendar_chunk_async(start, end):
+    """fetch_calendar_chunk() over the non-blocking client (ASGI entry point)"""
+    response = await async_post(CALENDAR_SERVICE_URL, data=_chunk_form(start, end), headers=SERVICE_HEADERS,
+                                read_timeout=15)
+    response.raise_for_status()
+    return response.json()['data']
+
+def _chunk_form(start, end):
+    """Filtered-data service form of the days [start, end)"""
+    return {
+        'dateFrom': start.isoformat(),
+        'dateTo': (end - timedelta(days=1)).isoformat(),
+        'timeFilter': 'timeOnly',
+        'currentTab': 'custom',
+        'limit_from': 0
+    }
+
+def _parse_chunk(start, rows):
+    """Events of a chunk's rows, dated by their day headers (start before the first one)"""
+    with metrics.timer('parse_seconds', source='economic-calendar'):
+        page = f'<table id="economicCalendarData"><tbody>{rows}</tbody></table>'
+        return parse_calendar_html(page, today=start, limit=None) or []
+
+def _scrape_chunk(start, end):
+    with metrics.timer('upstream_fetch_seconds', source='economic-calendar'):
+        rows = fetch_calendar_chunk(start, end)
+    return _parse_chunk(start, rows)
+
+async def _scrape_chunk_async(start, end, limit):
+    async with limit:
+        with metrics.timer('upstream_fetch_seconds', source='economic-calendar'):
+            rows = await fetch_calendar_chunk_async(start, end)
+    return _parse_chunk(start, rows)
+
+def _chunk_ranges(start, days):
+    """(chunk start, chunk end) of [start, start + days) in chunks of CALENDAR_CHUNK_DAYS"""
+    end = start + timedelta(days=days)
+    chunks = []
+    chunk_start = start
+    while chunk_start < end:
+        chunk_end = min(chunk_start + timedelta(days=CALENDAR_CHUNK_DAYS), end)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end
+    return chunks
+
+def scrape_calendar_range(start, days):
+    """
+    Scrape [start, start + days) in chunks of CALENDAR_CHUNK_DAYS fetched
+    in parallel (at most CALENDAR_CONCURRENCY at a time).
+    
+    Returns:
+        list: (chunk start, chunk end, events) of every chunk that succeeded
+    """
+    futures = [(chunk, _chunk_pool.submit(_scrape_chunk, *chunk)) for chunk in _chunk_ranges(start, days)]
+    scraped = []
+    for (chunk_start, chunk_end), future in futures:
+        try:
+            scraped.append((chunk_start, chunk_end, future.result()))
+        except Exception as e:
+            print(f"❌ Error scraping calendar {chunk_start} - {chunk_end}: {e}")
+    return scraped
+
+async def scrape_calendar_range_async(start, days):
+    """scrape_calendar_range() with the chunks awaited concurrently"""
+    import asyncio
+
+    chunks = _chunk_ranges(start, days)
+    limit = asyncio.Semaphore(CALENDAR_CONCURRENCY)
+    results = await asyncio.gather(*(_scrape_chunk_async(*chunk, limit) for chunk in chunks),
+                                   return_exceptions=True)
+    scraped = []
+    for (chunk_start, chunk_end), result in zip(chunks, results):
+        if isinstance(result, Exception):
+            print(f"❌ Error scraping calendar {chunk_start} - {chunk_end}: {result}")
+        else:
+            scraped.append((chunk_start, chunk_end, result))
+    return scraped
+
+def merge_events(scraped, keep_from):
+    """
+    Merge scraped chunks into the event index. Known events only get their
+    changed fields updated (e.g. a newly published actual); events missing
+    from a scraped chunk were removed upstream, and days before keep_from
+    are dropped.
+    
+    Args:
+        scraped (list): Output of scrape_calendar_range()
+        keep_from (date): First day kept in the index
+    
+    Returns:
+        dict: Number of events added, updated, unchanged and removed
+    """
+    stats = {'added': 0, 'updated': 0, 'unchanged': 0, 'removed': 0}
+    first_day = keep_from.isoformat()
+    with _events_lock:
+        for chunk_start, chunk_end, events in scraped:
+            seen = set()
+            for event in events:
+                seen.add(event['id'])
+                known = _events.get(event['id'])
+                if known is None:
+                    _events[event['id']] = event
+                    stats['added'] += 1
+                    continue
+                changed = {field: value for field, value in event.items() if known.get(field) != value}
+                if changed:
+                    known.update(changed)
+                    stats['updated'] += 1
+                else:
+                    stats['unchanged'] += 1
+            
+            chunk_first, chunk_last = chunk_start.isoformat(), chunk_end.isoformat()
+            for event_id in [i for i, e in _events.items()
+                             if chunk_first <= e['datetime'][:10] < chunk_last and i not in seen]:
+                del _events[event_id]
+                stats['removed'] += 1
+        
+        for event_id in [i for i, e in _events.items() if e['datetime'][:10] < first_day]:
+            del _events[event_id]
+    return stats
+
+def indexed_events():
+    """Events of the index in chronological order (copies)"""
+    with _events_lock:
+        events = [dict(event) for event in _events.values()]
+    return sorted(events, key=lambda event: (event['datetime'], event['id']))
+
 def get_fallback_data():
     """
     Fallback data when scraping fails
     Returns realistic economic events for demo
     """
+    metrics.inc('fallback_total', source='economic-calendar', data='static')
     today = datetime.now()
     
     return {
@@ -214,75 +622,134 @@ def get_fallback_data():
         'source': 'Fallback Data'
     }
 
-def get_economic_calendar_data():
+def _load_index():
+    """Seed the event index with the calendar last stored by any worker"""
+    entry = cache_get(CACHE_KEY)
+    events = entry['value']['data'] if entry else []
+    with _events_lock:
+        _events.clear()
+        _events.update((event['id'], dict(event)) for event in events if 'id' in event)
+
+def _scrape_events(now, full):
     """
-    Get economic calendar data with caching
-    Updates daily at 8 AM or when cache expires
+    Events for the cached calendar: the merged multi-day index (the whole
+    range on a full refresh, today's chunk otherwise), or the calendar page
+    when multi-day mode is off or has nothing yet.
     """
-    global _cache
-    
+    if CALENDAR_DAYS > 0:
+        _load_index()
+        days = _scraped_days(full)
+        events = _merge_range(now.date(), days, scrape_calendar_range(now.date(), days))
+        if events:
+            return events
+    return scrape_investing_calendar()
+
+async def _scrape_events_async(now, full):
+    """_scrape_events() awaiting the downloads"""
+    if CALENDAR_DAYS > 0:
+        _load_index()
+        days = _scraped_days(full)
+        events = _merge_range(now.date(), days, await scrape_calendar_range_async(now.date(), days))
+        if events:
+            return events
+    return await scrape_investing_calendar_async()
+
+def _scraped_days(full):
+    """Days to scrape: the whole range on a full refresh or an empty index, today's chunk otherwise"""
+    return CALENDAR_DAYS if full or not _events else min(CALENDAR_CHUNK_DAYS, CALENDAR_DAYS)
+
+def _merge_range(today, days, scraped):
+    """Merge scraped chunks into the index and return the indexed events"""
+    stats = merge_events(scraped, keep_from=today)
+    print(f"🔁 Calendar merge ({days} day(s)): {stats['added']} added, {stats['updated']} updated, "
+          f"{stats['unchanged']} unchanged, {stats['removed']} removed")
+    return indexed_events()
+
+def _update_intraday(calendar):
+    """Refresh today's chunk only and rebuild the calendar around it"""
+    now = datetime.now()
+    print("🔄 Refreshing today's events from Investing.com...")
+    events = _scrape_events(now, full=False)
+    return dict(
+        calendar,
+        data=events,
+        updated=now.isoformat() + 'Z',
+        source='Investing.com' if len(events) > 5 else 'Fallback Data',
+        count=len(events)
+    )
+
+def _scrape_calendar():
+    """Scrape Investing.com into a new calendar"""
     now = datetime.now()
-    
-    # Check if cache is valid (less than 24 hours old)
-    if _cache['data'] and _cache['timestamp']:
-        cache_age = (now - _cache['timestamp']).total_seconds()
-        if cache_age < 24 * 3600:  # 24 hours
-            print(f"📦 Using cached data (age: {cache_age/3600:.1f}h)")
-            return _cache['data']
     
     # Scrape new data
     print("🔄 Fetching fresh data from Investing.com...")
-    events = scrape_investing_calendar()
-    
-    # Calculate next update time (tomorrow at 8 AM)
-    tomorrow_8am = (now + timedelta(days=1)).replace(hour=8, minute=0, second=0, microsecond=0)
+    return _build_calendar(now, _scrape_events(now, full=True))
+
+async def _scrape_calendar_async():
+    """_scrape_calendar() awaiting the downloads"""
+    now = datetime.now()
+    print("🔄 Fetching fresh data from Investing.com...")
+    return _build_calendar(now, await _scrape_events_async(now, full=True))
+
+def _build_calendar(now, events):
+    """Calendar payload of events scraped at now"""
+    # Calculate next update time (next 8 AM, today or tomorrow)
+    next_8am = now.replace(hour=8, minute=0, second=0, microsecond=0)
+    if next_8am <= now:
+        next_8am += timedelta(days=1)
     
-    # Update cache
-    result = {
+    return {
         'status': 'success',
         'data': events,
         'updated': now.isoformat() + 'Z',
-        'next_update': tomorrow_8am.isoformat() + 'Z',
+        'next_update': next_8am.isoformat() + 'Z',
         'source': 'Investing.com' if len(events) > 5 else 'Fallback Data',
         'count': len(events)
     }
-    
-    _cache['data'] = result
-    _cache['timestamp'] = now
-    _cache['next_update'] = tomorrow_8am
-    
-    return result
-
-@app.route('/')
-def home():
-    """Health check endpoint"""
-    return jsonify({
-        'service': 'Economic Calendar API',
-        'status': 'online',
-        'version': '1.0.0',
-        'data_source': 'Investing.com',
-        'update_schedule': 'Daily at 8:00 AM',
-        'endpoints': {
-            '/api/economic-calendar': 'Get economic calendar events'
-        }
-    })
-
-@app.route('/api/economic-calendar')
-def economic_calendar():
+
+def _next_update(calendar):
+    """Epoch seconds of a calendar's next_update (local time, as computed by _build_calendar())"""
+    return datetime.fromisoformat(calendar['next_update'].rstrip('Z')).timestamp()
+
+def _scheduled_refresh():
+    entry = cache_get(CACHE_KEY)
+    if entry is None or time.time() >= _next_update(entry['value']):
+        return _scrape_calendar()
+    return _update_intraday(entry['value'])
+
+def refresh_economic_calendar():
     """
-    Main API endpoint for economic calendar data
-    Returns upcoming economic events with caching
+    Refresh the calendar proactively (background scheduler job): the full
+    range at the computed next_update, today's chunk in between. Skipped
+    when another worker is already refreshing it.
     """
-    data = get_economic_calendar_data()
-    
-    # Add CORS headers for GitHub Pages
-    response = jsonify(data)
-    response.headers.add('Access-Control-Allow-Origin', '*')
-    response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
-    response.headers.add('Access-Control-Allow-Methods', 'GET')
-    response.headers.add('Cache-Control', 'public, max-age=86400')  # Cache for 24 hours
-    
-    return response
+    return refresh(CACHE_KEY, _scheduled_refresh)
+
+def next_calendar_refresh():
+    """
+    Epoch seconds of the next refresh: the shared calendar's next_update,
+    or the next intraday refresh when sooner; now if never scraped
+    """
+    entry = cache_get(CACHE_KEY)
+    if entry is None:
+        return 0
+    due_at = _next_update(entry['value'])
+    if CALENDAR_DAYS > 0 and CALENDAR_INTRADAY_REFRESH > 0:
+        due_at = min(due_at, entry['stored_at'] + CALENDAR_INTRADAY_REFRESH)
+    return due_at
+
+def get_economic_calendar_data():
+    """
+    Get economic calendar data with caching
+    Updates daily at 8 AM or when cache expires; concurrent misses of every
+    worker share a single scrape
+    """
+    return get_or_fetch(CACHE_KEY, _scrape_calendar, CACHE_TTL)
+
+async def get_economic_calendar_data_async():
+    """get_economic_calendar_data() for the ASGI entry point"""
+    return await get_or_fetch_async(CACHE_KEY, _scrape_calendar_async, CACHE_TTL)
 
 # For local testing
 if __name__ == '__main__':
@@ -307,4 +774,5 @@ if __name__ == '__main__':
     
     print("-" * 60)
     print("\nStarting Flask server on http://0.0.0.0:3002")
+    from api.index_calendar import app
     app.run(host='0.0.0.0', port=3002, debug=True)
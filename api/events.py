@@ -0,0 +1,253 @@
+"""
+Live Update Stream
+Server-sent events for the market and digital asset payloads. One
+broadcaster thread per process reads each payload through its cached getter
+every POLL_INTERVAL and publishes it only when its content changed; every
+connected client is woken by the same condition and sent the same encoded
+message, so upstream and serialization cost do not grow with viewers.
+
+An idle client is one generator blocked on the condition (plus a heartbeat
+comment every HEARTBEAT seconds), holding no upstream resources but one
+server thread; app.py turns clients away past MAX_CLIENTS so streams never
+take every thread of a worker.
+stream_async() serves the ASGI entry point: its clients are coroutines
+woken through one asyncio event per event loop, so an open stream holds no
+thread at all.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+# Seconds between two reads of the cached payloads
+POLL_INTERVAL = float(os.environ.get('EVENTS_POLL_INTERVAL', 2))
+
+# Seconds between keep-alive comments on an idle stream (below proxy timeouts)
+HEARTBEAT = float(os.environ.get('EVENTS_HEARTBEAT', 15))
+
+# Streams served by threads (app.py) per process; beyond it /api/stream
+# answers 503 and the dashboard polls instead. Keep it well below the
+# gunicorn --threads of the Procfile
+MAX_CLIENTS = int(os.environ.get('EVENTS_MAX_CLIENTS', 16))
+
+# Client reconnection delay announced to EventSource, in milliseconds
+RETRY_MS = 5000
+
+# Payload fields stamped on every fetch; ignored when detecting changes
+VOLATILE_FIELDS = ('last_updated', 'updated', 'elapsed_ms')
+
+_sources = {}  # topic -> getter
+_latest = {}  # topic -> (sequence, fingerprint, encoded message)
+_sequence = 0
+_changed = threading.Condition()
+_clients = 0
+_published = 0
+_thread = None
+_thread_lock = threading.Lock()
+_wakeups = {}  # event loop -> asyncio.Event set at the next publish
+
+
+def add_source(topic, get_payload):
+    """
+    Register a topic.
+
+    Args:
+        topic (str): Event name sent to clients, e.g. 'market'
+        get_payload (callable): Returns the current (cached) payload
+    """
+    _sources[topic] = get_payload
+
+
+def _fingerprint(payload):
+    if isinstance(payload, dict):
+        payload = {k: v for k, v in payload.items() if k not in VOLATILE_FIELDS}
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def publish(topic, payload):
+    """
+    Make payload the latest message of topic and wake every client,
+    unless it has the same content as the current one.
+
+    Returns:
+        bool: True if a message was published
+    """
+    global _sequence, _published
+    fingerprint = _fingerprint(payload)
+    with _changed:
+        current = _latest.get(topic)
+        if current and current[1] == fingerprint:
+            return False
+        _sequence += 1
+        data = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+        message = f"id: {_sequence}\nevent: {topic}\ndata: {data}\n\n".encode('utf-8')
+        _latest[topic] = (_sequence, fingerprint, message)
+        _published += 1
+        _changed.notify_all()
+        for loop in list(_wakeups):
+            try:
+                loop.call_soon_threadsafe(_wake, loop)
+            except RuntimeError:  # Loop closed
+                del _wakeups[loop]
+    return True
+
+
+def _wake(loop):
+    """Wake the stream_async() clients of loop (runs in the loop)"""
+    import asyncio
+
+    with _changed:
+        wakeup = _wakeups.get(loop)
+        if wakeup is not None:
+            _wakeups[loop] = asyncio.Event()
+    if wakeup is not None:
+        wakeup.set()
+
+
+def poll_once():
+    """Read every source and publish the ones that changed"""
+    for topic, get_payload in list(_sources.items()):
+        try:
+            publish(topic, get_payload())
+        except Exception as e:
+            print(f"⚠️ Could not read '{topic}' for the event stream: {e}")
+
+
+def _loop():
+    while True:
+        if _clients:
+            poll_once()
+        time.sleep(POLL_INTERVAL)
+
+
+def start():
+    """Start the broadcaster thread (idempotent, also after a fork)"""
+    global _thread
+    with _thread_lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_loop, name='events-broadcaster', daemon=True)
+            _thread.start()
+
+
+def stream(topics=None):
+    """
+    Event stream of one client: the latest message of every topic right
+    away, then each change as it is published.
+
+    Args:
+        topics (list): Topics to follow, default all of them
+
+    Yields:
+        bytes: SSE frames
+    """
+    global _clients
+    topics = [topic for topic in (topics or _sources) if topic in _sources]
+    start()
+
+    with _changed:
+        _clients += 1
+    if not any(topic in _latest for topic in topics):
+        poll_once()  # First viewer of this process: do not wait for the loop
+
+    seen = {topic: 0 for topic in topics}
+    try:
+        yield f"retry: {RETRY_MS}\n\n".encode('utf-8')
+        while True:
+            with _changed:
+                pending = _unseen(topics, seen)
+                if not pending:
+                    _changed.wait(HEARTBEAT)
+                    pending = _unseen(topics, seen)
+            if pending:
+                yield b''.join(message for _, _, message in pending)
+            else:
+                yield b": keep-alive\n\n"
+    finally:
+        with _changed:
+            _clients -= 1
+
+
+async def stream_async(topics=None):
+    """
+    stream() as an async generator, for the ASGI entry point: waits for
+    changes on the event loop instead of blocking a thread.
+
+    Yields:
+        bytes: SSE frames
+    """
+    import asyncio
+
+    global _clients
+    topics = [topic for topic in (topics or _sources) if topic in _sources]
+    start()
+
+    loop = asyncio.get_running_loop()
+    with _changed:
+        _clients += 1
+        _wakeups.setdefault(loop, asyncio.Event())
+    if not any(topic in _latest for topic in topics):
+        await loop.run_in_executor(None, poll_once)
+
+    seen = {topic: 0 for topic in topics}
+    try:
+        yield f"retry: {RETRY_MS}\n\n".encode('utf-8')
+        while True:
+            with _changed:
+                wakeup = _wakeups[loop]
+                pending = _unseen(topics, seen)
+            if not pending:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), HEARTBEAT)
+                except asyncio.TimeoutError:
+                    pass
+                with _changed:
+                    pending = _unseen(topics, seen)
+            if pending:
+                yield b''.join(message for _, _, message in pending)
+            else:
+                yield b": keep-alive\n\n"
+    finally:
+        with _changed:
+            _clients -= 1
+
+
+def _unseen(topics, seen):
+    """Latest messages of topics not sent yet, marked as sent (hold _changed)"""
+    pending = [_latest[t] for t in topics if t in _latest and _latest[t][0] > seen[t]]
+    for topic in topics:
+        if topic in _latest:
+            seen[topic] = _latest[topic][0]
+    return pending
+
+
+def parse_topics(value):
+    """
+    Parse the topics query parameter (comma-separated, default all).
+
+    Raises:
+        ValueError: If a topic is unknown
+    """
+    if not value:
+        return list(_sources)
+    topics = [t.strip() for t in value.split(',') if t.strip()]
+    unknown = [t for t in topics if t not in _sources]
+    if unknown:
+        raise ValueError(f"Unknown topic(s): {', '.join(unknown)} (available: {', '.join(_sources)})")
+    return topics
+
+
+def stream_stats():
+    """
+    Event stream monitoring data of this process.
+
+    Returns:
+        dict: {'clients', 'published', 'topics': {topic: sequence}}
+    """
+    with _changed:
+        return {
+            'clients': _clients,
+            'published': _published,
+            'topics': {topic: latest[0] for topic, latest in _latest.items()}
+        }
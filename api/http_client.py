@@ -0,0 +1,156 @@
+"""
+Pooled Upstream HTTP Client
+Shared keep-alive sessions, one per upstream host, with bounded connection
+pools, jittered retry/backoff and separate connect/read timeouts. Reusing
+connections saves the DNS lookup, TCP connect and TLS handshake that a bare
+requests.get() pays on every call.
+
+requests is imported with the first session, so a cold start answered from
+cache never loads it.
+"""
+
+from urllib.parse import urlsplit
+import os
+import random
+import threading
+
+# Connections kept alive per upstream host; callers wait for a free one
+# rather than opening more
+POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 10))
+
+# Seconds to establish a connection; read timeouts are chosen per upstream
+CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 3.05))
+
+# Retries on connection errors and 5xx answers, spaced by 0.3s, 0.6s, ...
+# scaled by a random factor so workers do not retry in lockstep. Read
+# timeouts are not retried (that would multiply the worst-case latency),
+# nor are 429s: they would only burn more of the provider's quota.
+MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', 2))
+BACKOFF_FACTOR = 0.3
+RETRY_STATUSES = (500, 502, 503, 504)
+
+# One session per scheme://host
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _base_url(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _new_session():
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    class JitteredRetry(Retry):
+        """Retry policy whose exponential backoff is randomized by +/-50%"""
+
+        def get_backoff_time(self):
+            backoff = super().get_backoff_time()
+            return backoff * random.uniform(0.5, 1.5) if backoff > 0 else 0
+
+    retry = JitteredRetry(
+        total=MAX_RETRIES,
+        read=0,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'POST']),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=POOL_MAXSIZE,
+        pool_block=True,
+        max_retries=retry
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session(url):
+    """Return the shared keep-alive session for the host of url"""
+    base_url = _base_url(url)
+    session = _sessions.get(base_url)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(base_url)
+            if session is None:
+                session = _sessions[base_url] = _new_session()
+    return session
+
+
+def http_get(url, params=None, headers=None, read_timeout=10):
+    """
+    GET through the pooled session of the target host.
+
+    Args:
+        url (str): Full URL
+        params (dict): Query string parameters
+        headers (dict): Extra request headers
+        read_timeout (float): Seconds to wait for the response once connected
+
+    Returns:
+        requests.Response
+    """
+    return get_session(url).get(
+        url,
+        params=params,
+        headers=headers,
+        timeout=(CONNECT_TIMEOUT, read_timeout)
+    )
+
+
+def http_post(url, data=None, headers=None, read_timeout=10):
+    """
+    POST a form through the pooled session of the target host.
+
+    Args:
+        url (str): Full URL
+        data (dict): Form fields
+        headers (dict): Extra request headers
+        read_timeout (float): Seconds to wait for the response once connected
+
+    Returns:
+        requests.Response
+    """
+    return get_session(url).post(
+        url,
+        data=data,
+        headers=headers,
+        timeout=(CONNECT_TIMEOUT, read_timeout)
+    )
+
+
+def pool_stats():
+    """
+    Connection reuse counters per upstream host.
+
+    Returns:
+        dict: {base_url: {'requests', 'connections_opened', 'pool_hits'}}
+        where pool_hits counts requests served on an already open connection
+    """
+    with _sessions_lock:
+        sessions = list(_sessions.items())
+
+    stats = {}
+    for base_url, session in sessions:
+        pools = session.get_adapter(base_url).poolmanager.pools
+        total_requests = 0
+        opened = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            total_requests += pool.num_requests
+            opened += pool.num_connections
+        stats[base_url] = {
+            'requests': total_requests,
+            'connections_opened': opened,
+            'pool_hits': max(total_requests - opened, 0),
+            'pool_maxsize': POOL_MAXSIZE
+        }
+    return stats
@@ -1,9 +1,51 @@
 """
 Vercel Serverless Function Entry Point
-Imports the Flask app from market.py using relative import
+Flask app of the market data API, over the functions of market.py
 """
 
-from .market import app
+from flask import Flask, jsonify, request
+from flask_cors import CORS
+
+from .market import get_covered_bond_market_data, get_market_basket, parse_symbols
 
 # This is the handler that Vercel will call
 # Vercel looks for 'app' in index.py, app.py, or main.py
+app = Flask(__name__)
+CORS(app)  # Enable CORS for all routes
+
+@app.route('/')
+def home():
+    """Health check endpoint"""
+    return jsonify({
+        "service": "Covered Bonds Market Data API",
+        "status": "online",
+        "version": "2.0.0",
+        "data_provider": "Alpha Vantage",
+        "endpoints": {
+            "/api/market": "Get current covered bond market data",
+            "/api/market?symbols=LQD,MBB": "Quotes of a basket of bond ETFs"
+        }
+    })
+
+@app.route('/api/market')
+def market_data():
+    """
+    Main API endpoint for covered bond market data.
+    This is what the dashboard will call; ?symbols=LQD,MBB returns a basket.
+    """
+    if request.args.get('symbols'):
+        try:
+            data = get_market_basket(parse_symbols(request.args['symbols']))
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+    else:
+        data = get_covered_bond_market_data()
+    
+    # Add CORS headers for GitHub Pages
+    response = jsonify(data)
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
+    response.headers.add('Access-Control-Allow-Methods', 'GET')
+    response.headers.add('Cache-Control', 'public, max-age=3600')  # Cache for 1 hour
+    
+    return response
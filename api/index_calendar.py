@@ -0,0 +1,44 @@
+"""
+Vercel Serverless Function Entry Point for the Economic Calendar
+Flask app of the economic calendar, over the functions of economic_calendar.py
+"""
+
+from flask import Flask, jsonify
+from flask_cors import CORS
+
+from .economic_calendar import get_economic_calendar_data
+
+# This is the handler that Vercel will call
+app = Flask(__name__)
+CORS(app)  # Enable CORS for all routes
+
+@app.route('/')
+def home():
+    """Health check endpoint"""
+    return jsonify({
+        'service': 'Economic Calendar API',
+        'status': 'online',
+        'version': '1.0.0',
+        'data_source': 'Investing.com',
+        'update_schedule': 'Daily at 8:00 AM',
+        'endpoints': {
+            '/api/economic-calendar': 'Get economic calendar events'
+        }
+    })
+
+@app.route('/api/economic-calendar')
+def economic_calendar():
+    """
+    Main API endpoint for economic calendar data
+    Returns upcoming economic events with caching
+    """
+    data = get_economic_calendar_data()
+    
+    # Add CORS headers for GitHub Pages
+    response = jsonify(data)
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
+    response.headers.add('Access-Control-Allow-Methods', 'GET')
+    response.headers.add('Cache-Control', 'public, max-age=86400')  # Cache for 24 hours
+    
+    return response
@@ -1,8 +1,43 @@
 """
 Vercel Serverless Function Entry Point for Digital Bonds
-Imports the Flask app from digital_bonds.py
+Flask app of the digital assets feed, over the functions of digital_bonds.py
 """
 
-from .digital_bonds import app
+from flask import Flask, jsonify
+from flask_cors import CORS
+
+from .digital_bonds import get_digital_assets_data
 
 # This is the handler that Vercel will call
+app = Flask(__name__)
+CORS(app)  # Enable CORS for all routes
+
+@app.route('/')
+def home():
+    """Health check endpoint"""
+    return jsonify({
+        "service": "Digital Assets & RWA Feed API",
+        "status": "online",
+        "version": "1.0.0",
+        "data_provider": "CoinGecko",
+        "endpoints": {
+            "/api/digital-bonds": "Get current digital assets data"
+        }
+    })
+
+@app.route('/api/digital-bonds')
+def digital_bonds():
+    """
+    Main API endpoint for digital assets data.
+    Returns real-time data for tokenized assets.
+    """
+    data = get_digital_assets_data()
+    
+    # Add CORS headers for GitHub Pages
+    response = jsonify(data)
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
+    response.headers.add('Access-Control-Allow-Methods', 'GET')
+    response.headers.add('Cache-Control', 'public, max-age=3600')  # Cache for 1 hour
+    
+    return response
@@ -0,0 +1,28 @@
+"""
+Deferred Imports
+Stand-ins for functions of modules that are only imported on first call,
+so an entry point can register routes, refresh jobs, event sources and
+dashboard sections without loading the upstream modules (and their
+dependencies) at cold start.
+"""
+
+import importlib
+
+
+def deferred(module, name):
+    """
+    Function of a module, imported when first called.
+
+    Args:
+        module (str): Module path, e.g. 'api.market'
+        name (str): Function name, e.g. 'get_covered_bond_market_data'
+
+    Returns:
+        callable: Calls module.name with the given arguments
+    """
+    def call(*args, **kwargs):
+        return getattr(importlib.import_module(module), name)(*args, **kwargs)
+
+    call.__name__ = call.__qualname__ = name
+    call.__doc__ = f"{module}.{name}, imported on first call"
+    return call
@@ -1,85 +1,399 @@
 """
 Covered Bonds Market Data API
-Serverless function for Vercel that fetches real-time market data
-using Alpha Vantage API (free tier with demo key).
+Fetches real-time market data using Alpha Vantage API (free tier with demo
+key). Served on Vercel by the Flask app of api/index.py; this module
+imports neither Flask nor flask_cors, so app.py and asgi.py load it
+without them.
 """
 
-from flask import Flask, jsonify
-from flask_cors import CORS
 from datetime import datetime
-import requests
 import os
+import sys
+import threading
+import time
 
-app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
+# Make the project root importable when deployed as a standalone function
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import metrics, timeseries
+from api.async_http import async_get
+from api.cache import cache_get, get_or_fetch, get_or_fetch_async, refresh, refresh_due_at
+from api.circuit_breaker import CircuitOpenError, get_breaker, guarded
+from api.http_client import http_get
+from api.rate_limit import DemandCounter, TokenBucket
 
 # Alpha Vantage API configuration
 ALPHA_VANTAGE_API_KEY = os.environ.get('ALPHA_VANTAGE_API_KEY', 'demo')
-ALPHA_VANTAGE_BASE_URL = 'https://www.alphavantage.co/query'
+ALPHA_VANTAGE_BASE_URL = os.environ.get('ALPHA_VANTAGE_BASE_URL', 'https://www.alphavantage.co/query')
 
-def get_covered_bond_market_data():
+# Basket of bond ETFs tracked on /api/market: ticker -> asset name.
+# US agency MBS funds are the closest listed proxy for covered bonds.
+SYMBOLS = {
+    'LQD': 'Investment Grade Corporate Bonds (Market Proxy)',
+    'MBB': 'US Agency Mortgage-Backed Securities (Covered Bond Proxy)',
+    'VMBS': 'Vanguard Mortgage-Backed Securities (Covered Bond Proxy)',
+    'AGG': 'US Aggregate Bonds',
+    'BND': 'Vanguard Total Bond Market',
+    'BNDX': 'International Aggregate Bonds (USD Hedged)',
+    'IAGG': 'Core International Aggregate Bonds',
+    'VCIT': 'Intermediate-Term Corporate Bonds',
+    'IEF': '7-10 Year US Treasuries',
+    'TLT': '20+ Year US Treasuries'
+}
+DEFAULT_SYMBOL = 'LQD'
+
+# Shared cache windows (seconds): quotes are fresh for 5 minutes, then served
+# stale for up to an hour while a background refresh hits Alpha Vantage
+CACHE_TTL = int(os.environ.get('MARKET_CACHE_TTL', 300))
+CACHE_STALE_TTL = int(os.environ.get('MARKET_CACHE_STALE_TTL', 3600))
+
+# Alpha Vantage quota of the API key (free tier: 5 calls per minute),
+# shared by every worker; calls beyond it are served from cache
+QUOTA = TokenBucket(
+    'alpha-vantage',
+    rate=float(os.environ.get('MARKET_QUOTA_PER_MINUTE', 5)) / 60,
+    capacity=float(os.environ.get('MARKET_QUOTA_BURST', 5))
+)
+
+# How quickly past requests for a symbol stop raising its refresh priority
+DEMAND_HALF_LIFE = float(os.environ.get('MARKET_DEMAND_HALF_LIFE', 3600))
+_demand = DemandCounter(DEMAND_HALF_LIFE)
+
+# One quota-driven refresh loop per process; requests only start it once a
+# token may be available again
+_refresh_lock = threading.Lock()
+_next_refresh_attempt = 0.0
+
+def _cache_key(symbol):
+    return f'market-{symbol.lower()}'
+
+def _quote_params(symbol):
+    """Alpha Vantage query parameters of the latest quote of symbol"""
+    return {
+        'function': 'GLOBAL_QUOTE',
+        'symbol': symbol,
+        'apikey': ALPHA_VANTAGE_API_KEY
+    }
+
+def _quote_payload(symbol, data):
+    """Build the quote payload from an Alpha Vantage GLOBAL_QUOTE answer"""
+    # Check if we got valid data (empty when the API limit is reached)
+    if 'Global Quote' not in data or not data['Global Quote']:
+        raise ValueError("No quote returned - API limit may have been reached")
+    
+    build_started = time.perf_counter()
+    quote = data['Global Quote']
+    
+    # Extract key metrics
+    current_price = float(quote.get('05. price', 0))
+    prev_close = float(quote.get('08. previous close', 0))
+    change_percent = float(quote.get('10. change percent', '0').replace('%', ''))
+    volume = int(float(quote.get('06. volume', 0)))
+    
+    # Determine trend
+    trend = "Hausse" if change_percent >= 0 else "Baisse"
+    
+    payload = {
+        "status": "success",
+        "date": quote.get('07. latest trading day', datetime.utcnow().date().isoformat()),
+        "asset": SYMBOLS.get(symbol, symbol),
+        "ticker": symbol,
+        "price": round(current_price, 2),
+        "currency": "USD",
+        "daily_change_percent": round(change_percent, 2),
+        "trend": trend,
+        "volume": volume,
+        "data_source": "Alpha Vantage",
+        "last_updated": datetime.utcnow().isoformat() + "Z"
+    }
+    metrics.observe('payload_build_seconds', time.perf_counter() - build_started, source='market')
+    timeseries.record(f'alpha-vantage:{symbol}', current_price, volume)
+    return payload
+
+@guarded('alpha-vantage')
+def fetch_quote(symbol):
     """
-    Fetch the latest covered bond market data using Alpha Vantage API.
-    Uses LQD (iShares iBoxx $ Investment Grade Corporate Bond ETF) as proxy.
+    Fetch the latest quote of one bond ETF from Alpha Vantage.
+    
+    Args:
+        symbol (str): Ticker from SYMBOLS, e.g. 'LQD'
     
     Returns:
         dict: Market data including price, change, trend, and metadata
+    
+    Raises:
+        Exception: If the request fails or no quote is returned
+        CircuitOpenError: Without calling Alpha Vantage while its breaker is open
     """
-    try:
-        # Using LQD as proxy for covered bonds market
-        ticker_symbol = "LQD"
-        
-        # Alpha Vantage API endpoint for daily time series
-        params = {
-            'function': 'GLOBAL_QUOTE',
-            'symbol': ticker_symbol,
-            'apikey': ALPHA_VANTAGE_API_KEY
-        }
-        
-        # Make API request
-        response = requests.get(ALPHA_VANTAGE_BASE_URL, params=params, timeout=10)
+    with metrics.timer('upstream_fetch_seconds', source='market'):
+        response = http_get(ALPHA_VANTAGE_BASE_URL, params=_quote_params(symbol), read_timeout=10)
         response.raise_for_status()
+    with metrics.timer('parse_seconds', source='market'):
         data = response.json()
-        
-        # Check if we got valid data
-        if 'Global Quote' not in data or not data['Global Quote']:
-            # Fallback to demo data if API limit reached or error
-            return get_fallback_data()
-        
-        quote = data['Global Quote']
-        
-        # Extract key metrics
-        current_price = float(quote.get('05. price', 0))
-        prev_close = float(quote.get('08. previous close', 0))
-        change_percent = float(quote.get('10. change percent', '0').replace('%', ''))
-        volume = int(float(quote.get('06. volume', 0)))
-        
-        # Determine trend
-        trend = "Hausse" if change_percent >= 0 else "Baisse"
-        
-        return {
-            "status": "success",
-            "date": quote.get('07. latest trading day', datetime.utcnow().date().isoformat()),
-            "asset": "Investment Grade Corporate Bonds (Market Proxy)",
-            "ticker": ticker_symbol,
-            "price": round(current_price, 2),
-            "currency": "USD",
-            "daily_change_percent": round(change_percent, 2),
-            "trend": trend,
-            "volume": volume,
-            "data_source": "Alpha Vantage",
-            "last_updated": datetime.utcnow().isoformat() + "Z"
-        }
-        
-    except Exception as e:
-        print(f"Error fetching from Alpha Vantage: {str(e)}")
+    return _quote_payload(symbol, data)
+
+@guarded('alpha-vantage')
+async def fetch_quote_async(symbol):
+    """
+    fetch_quote() over the non-blocking client (ASGI entry point); the
+    quote history write runs on a thread, off the event loop
+    """
+    import asyncio
+
+    with metrics.timer('upstream_fetch_seconds', source='market'):
+        response = await async_get(ALPHA_VANTAGE_BASE_URL, params=_quote_params(symbol), read_timeout=10)
+        response.raise_for_status()
+    with metrics.timer('parse_seconds', source='market'):
+        data = response.json()
+    return await asyncio.to_thread(_quote_payload, symbol, data)
+
+def fetch_covered_bond_market_data():
+    """
+    Fetch the latest covered bond market data from Alpha Vantage.
+    Uses LQD (iShares iBoxx $ Investment Grade Corporate Bond ETF) as proxy.
+    
+    Returns:
+        dict: Market data including price, change, trend, and metadata
+    """
+    return fetch_quote(DEFAULT_SYMBOL)
+
+def _spend_token():
+    """Take one Alpha Vantage token for a quote, or raise RateLimitExceeded"""
+    if get_breaker('alpha-vantage').is_open():
+        # Keep the token for the probe that will close the breaker
+        raise CircuitOpenError("Circuit 'alpha-vantage' is open, not calling the provider")
+    QUOTA.acquire_or_raise()
+
+def _fetch_within_quota(symbol):
+    """Spend one Alpha Vantage token on a quote, or raise RateLimitExceeded"""
+    _spend_token()
+    return fetch_quote(symbol)
+
+async def _fetch_within_quota_async(symbol):
+    """_fetch_within_quota() taking the token (a file lock) on a thread"""
+    import asyncio
+
+    await asyncio.to_thread(_spend_token)
+    return await fetch_quote_async(symbol)
+
+def parse_symbols(value):
+    """
+    Parse the symbols query parameter.
+    
+    Args:
+        value (str): Comma-separated tickers, e.g. 'LQD,MBB'
+    
+    Returns:
+        list: Known tickers, upper-cased, without duplicates
+    
+    Raises:
+        ValueError: If a ticker is not part of the tracked basket
+    """
+    symbols = []
+    for symbol in (s.strip().upper() for s in value.split(',')):
+        if not symbol or symbol in symbols:
+            continue
+        if symbol not in SYMBOLS:
+            raise ValueError(f"Unknown symbol '{symbol}' (available: {', '.join(SYMBOLS)})")
+        symbols.append(symbol)
+    if not symbols:
+        raise ValueError("No symbol given")
+    return symbols
+
+def _refresh_priorities(now):
+    """
+    Symbols due for a refresh, most urgent first.
+    A symbol is due 80% into its freshness window; urgency is its age in
+    TTLs weighted by recent demand, so with equal demand the basket is
+    refreshed round-robin (the freshest basket a quota allows) and popular
+    symbols are refreshed proportionally more often.
+    """
+    due = []
+    for symbol in SYMBOLS:
+        entry = cache_get(_cache_key(symbol))
+        age = now - entry['stored_at'] if entry else float('inf')
+        if age >= CACHE_TTL * 0.8:
+            due.append(((1 + _demand.score(symbol)) * age / CACHE_TTL, symbol))
+    return [symbol for _, symbol in sorted(due, reverse=True)]
+
+def refresh_market_quotes():
+    """
+    Spend the available Alpha Vantage tokens on the most urgent quotes.
+    Runs at most once at a time per process; the shared bucket keeps all
+    workers together within the quota.
+    
+    Returns:
+        int: Number of quotes refreshed
+    """
+    global _next_refresh_attempt
+    if not _refresh_lock.acquire(blocking=False):
+        return 0
+    try:
+        refreshed = 0
+        for symbol in _refresh_priorities(time.time()):
+            if get_breaker('alpha-vantage').is_open() or not QUOTA.try_acquire():
+                break
+            try:
+                refresh(_cache_key(symbol), lambda: fetch_quote(symbol))
+            except Exception as e:
+                # The token is spent; the other symbols still get theirs
+                print(f"⚠️ Refresh of {symbol} failed: {e}")
+                continue
+            refreshed += 1
+        return refreshed
+    finally:
+        _next_refresh_attempt = time.time() + QUOTA.next_token_in()
+        _refresh_lock.release()
+
+def _refresh_in_background():
+    """Start refresh_market_quotes() from a request once a token may be available"""
+    if time.time() < _next_refresh_attempt or _refresh_lock.locked():
+        return
+    
+    def run():
+        try:
+            refresh_market_quotes()
+        except Exception as e:
+            print(f"⚠️ Background refresh of market quotes failed: {e}")
+    
+    threading.Thread(target=run, name='market-quotes-refresh', daemon=True).start()
+
+def _get_quote(symbol):
+    """
+    Cached quote of one symbol, whatever its age. Only a symbol that was
+    never fetched is fetched synchronously (coalesced, within the quota);
+    stale ones are left to refresh_market_quotes().
+    
+    Returns:
+        tuple: (payload, age in seconds)
+    """
+    _demand.record(symbol)
+    key = _cache_key(symbol)
+    entry = cache_get(key)
+    if entry is None:
+        value = get_or_fetch(key, lambda: _fetch_within_quota(symbol), ttl=CACHE_TTL)
+        return value, 0.0
+    return _serve_cached(entry)
+
+async def _get_quote_async(symbol):
+    """_get_quote() awaiting the first fetch of a symbol instead of blocking on it"""
+    _demand.record(symbol)
+    key = _cache_key(symbol)
+    entry = cache_get(key)
+    if entry is None:
+        value = await get_or_fetch_async(key, lambda: _fetch_within_quota_async(symbol), ttl=CACHE_TTL)
+        return value, 0.0
+    return _serve_cached(entry)
+
+def _serve_cached(entry):
+    """(payload, age) of a cached quote, starting the quota refresh when due"""
+    age = time.time() - entry['stored_at']
+    metrics.inc('cache_requests_total', cache='market', result='hit' if age < CACHE_TTL else 'stale')
+    if age >= CACHE_TTL * 0.8:
+        _refresh_in_background()
+    return entry['value'], age
+
+def _default_quote(result):
+    """LQD payload from a _get_quote() result or exception"""
+    if isinstance(result, Exception):
+        print(f"Error fetching from Alpha Vantage: {str(result)}")
         return get_fallback_data()
+    payload, age = result
+    if age >= CACHE_TTL + CACHE_STALE_TTL:
+        print(f"⚠️ Serving LQD quote fetched {age / 3600:.1f}h ago")
+    return payload
+
+def get_covered_bond_market_data():
+    """
+    Get covered bond market data (LQD) through the shared upstream cache.
+    Stale payloads are served while a quota-aware background refresh runs;
+    the static fallback is only used when no good payload has ever been
+    fetched.
+    
+    Returns:
+        dict: Market data including price, change, trend, and metadata
+    """
+    try:
+        result = _get_quote(DEFAULT_SYMBOL)
+    except Exception as e:
+        result = e
+    return _default_quote(result)
+
+async def get_covered_bond_market_data_async():
+    """get_covered_bond_market_data() for the ASGI entry point"""
+    try:
+        result = await _get_quote_async(DEFAULT_SYMBOL)
+    except Exception as e:
+        result = e
+    return _default_quote(result)
+
+def _basket(symbols, results):
+    """Basket payload from one _get_quote() result or exception per symbol"""
+    quotes = []
+    for symbol, result in zip(symbols, results):
+        if isinstance(result, Exception):
+            print(f"⚠️ No quote for {symbol} yet: {result}")
+            quotes.append({"status": "pending", "ticker": symbol, "asset": SYMBOLS[symbol]})
+            continue
+        payload, age = result
+        quotes.append(dict(payload, age_s=round(age, 1), fresh=age < CACHE_TTL))
+    
+    return {
+        "status": "success",
+        "count": len(quotes),
+        "quotes": quotes,
+        "quota": QUOTA.stats(),
+        "data_source": "Alpha Vantage",
+        "last_updated": datetime.utcnow().isoformat() + "Z"
+    }
+
+def get_market_basket(symbols):
+    """
+    Get the quotes of several bond ETFs, each served from cache with its
+    age; quotes never fetched yet are fetched while the quota allows and
+    reported as pending otherwise.
+    
+    Args:
+        symbols (list): Tickers from SYMBOLS (see parse_symbols)
+    
+    Returns:
+        dict: Quotes in request order, with age and freshness per quote,
+        and the remaining Alpha Vantage quota
+    """
+    results = []
+    for symbol in symbols:
+        try:
+            results.append(_get_quote(symbol))
+        except Exception as e:
+            results.append(e)
+    return _basket(symbols, results)
+
+async def get_market_basket_async(symbols):
+    """get_market_basket() fetching the missing quotes concurrently"""
+    import asyncio
+
+    results = await asyncio.gather(*(_get_quote_async(symbol) for symbol in symbols),
+                                   return_exceptions=True)
+    return await asyncio.to_thread(_basket, symbols, results)  # Reads the quota under its file lock
+
+def refresh_covered_bond_market_data():
+    """Refresh the most urgent quotes within the quota (background scheduler job)"""
+    refresh_market_quotes()
+
+def next_market_refresh():
+    """
+    Epoch seconds at which the background scheduler should refresh: when
+    the first quote is due, but not before a token is available.
+    """
+    due_at = min(refresh_due_at(_cache_key(symbol), CACHE_TTL) for symbol in SYMBOLS)
+    return max(due_at, time.time() + QUOTA.next_token_in())
 
 def get_fallback_data():
     """
     Fallback data when API is unavailable or rate limited.
     Returns realistic static data based on typical LQD values.
     """
+    metrics.inc('fallback_total', source='market', data='static')
     return {
         "status": "success",
         "date": datetime.utcnow().date().isoformat(),
@@ -95,36 +409,6 @@ def get_fallback_data():
         "note": "Using cached data - API limit may have been reached"
     }
 
-@app.route('/')
-def home():
-    """Health check endpoint"""
-    return jsonify({
-        "service": "Covered Bonds Market Data API",
-        "status": "online",
-        "version": "2.0.0",
-        "data_provider": "Alpha Vantage",
-        "endpoints": {
-            "/api/market": "Get current covered bond market data"
-        }
-    })
-
-@app.route('/api/market')
-def market_data():
-    """
-    Main API endpoint for covered bond market data.
-    This is what the dashboard will call.
-    """
-    data = get_covered_bond_market_data()
-    
-    # Add CORS headers for GitHub Pages
-    response = jsonify(data)
-    response.headers.add('Access-Control-Allow-Origin', '*')
-    response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
-    response.headers.add('Access-Control-Allow-Methods', 'GET')
-    response.headers.add('Cache-Control', 'public, max-age=3600')  # Cache for 1 hour
-    
-    return response
-
 # For local testing
 if __name__ == '__main__':
     print("Testing Covered Bonds Market Data API...")
@@ -144,4 +428,5 @@ if __name__ == '__main__':
     
     print("-" * 50)
     print("\nStarting Flask server on http://0.0.0.0:3000")
+    from api.index import app
     app.run(host='0.0.0.0', port=3000, debug=True)
@@ -0,0 +1,300 @@
+"""
+Prometheus Metrics
+Counters and latency histograms for the hot paths (upstream fetch, parsing,
+response building, cache outcomes, fallbacks), exposed in the Prometheus
+text format.
+
+Each process keeps its samples in memory and writes them about once per
+FLUSH_INTERVAL to its own file in METRICS_DIR, shared by every gunicorn
+worker; a scrape merges all files, so /metrics reports the same totals
+whichever worker answers it. Files are named after the pid and start time
+of their process, so a worker reusing the pid of an exited one starts a
+file of its own. At scrape time, the files of exited processes are folded
+into RETIRED_FILE and removed, so counters never go backwards while the
+directory stays one file per live worker.
+"""
+
+from contextlib import contextmanager
+import atexit
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+
+METRICS_DIR = os.environ.get(
+    'METRICS_DIR',
+    os.path.join(tempfile.gettempdir(), 'covered-bonds-metrics')
+)
+
+# Summed samples of the processes that exited
+RETIRED_FILE = 'retired.json'
+
+# Seconds between two writes of this process's samples
+FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 1.0))
+
+PREFIX = 'covered_bonds_'
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name -> (type, help)
+METRICS = {
+    'upstream_fetch_seconds': ('histogram', 'Upstream HTTP call duration per source'),
+    'parse_seconds': ('histogram', 'Upstream payload parsing (JSON or HTML) per source'),
+    'payload_build_seconds': ('histogram', 'Building the API payload from parsed upstream data'),
+    'response_build_seconds': ('histogram', 'Serializing the JSON response per route'),
+    'request_seconds': ('histogram', 'Total request handling time per route'),
+    'cache_requests_total': ('counter', 'Cache lookups per cache and result (hit, stale, miss)'),
+    'fallback_total': ('counter', 'Fallback payloads served per source: static data or the last good payload'),
+    'circuit_transitions_total': ('counter', 'Circuit breaker state changes per provider and new state'),
+    'circuit_rejections_total': ('counter', 'Upstream calls short-circuited by an open breaker per provider'),
+    'rate_limited_total': ('counter', 'Upstream calls skipped because the provider quota was used up'),
+}
+
+# (name, labels) -> float for counters, [bucket counts..., sum, count] for histograms
+_samples = {}
+_lock = threading.Lock()
+_dirty = False
+_flusher = None
+_pid = os.getpid()
+_file_name = None
+
+
+def _labels_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _after_fork():
+    """Forked (e.g. gunicorn --preload): samples so far belong to the parent"""
+    global _lock, _flusher, _pid, _dirty, _file_name
+    _lock = threading.Lock()  # Another parent thread may have held it
+    _samples.clear()
+    _dirty = False
+    _pid, _flusher, _file_name = os.getpid(), None, None
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def _start_flusher():
+    global _flusher
+    if _pid != os.getpid():
+        _after_fork()
+    if _flusher is None:
+        _flusher = threading.Thread(target=_flush_loop, name='metrics-flush', daemon=True)
+        _flusher.start()
+
+
+def inc(name, amount=1, **labels):
+    """Increase a counter"""
+    global _dirty
+    key = (name, _labels_key(labels))
+    with _lock:
+        _samples[key] = _samples.get(key, 0) + amount
+        _dirty = True
+    _start_flusher()
+
+
+def observe(name, seconds, **labels):
+    """Record a duration in a histogram"""
+    global _dirty
+    key = (name, _labels_key(labels))
+    with _lock:
+        sample = _samples.get(key)
+        if sample is None:
+            sample = _samples[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                sample[i] += 1
+                break
+        sample[-2] += seconds
+        sample[-1] += 1
+        _dirty = True
+    _start_flusher()
+
+
+@contextmanager
+def timer(name, **labels):
+    """Time the enclosed block into a histogram, including when it raises"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+
+def _start_time(pid):
+    """
+    Start time of a running process (clock ticks since boot, from /proc),
+    0 where /proc is not available, None if the process exited.
+    """
+    if os.path.isdir('/proc/self'):
+        try:
+            with open(f'/proc/{pid}/stat', 'rb') as f:
+                stat = f.read()
+        except OSError:
+            return None
+        # Fields after the parenthesized command name; starttime is field 22
+        return int(stat[stat.rindex(b')') + 2:].split()[19])
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return None
+    except PermissionError:
+        pass
+    return 0
+
+
+def _own_file():
+    """File name of this process's samples: pid and start time"""
+    global _file_name
+    if _file_name is None or _pid != os.getpid():
+        _file_name = f'{os.getpid()}-{_start_time(os.getpid())}.json'
+    return _file_name
+
+
+def _is_live(file_name):
+    """Whether the process that wrote file_name is still running"""
+    try:
+        pid, started = (int(part) for part in file_name[:-len('.json')].split('-'))
+    except ValueError:
+        return False
+    return _start_time(pid) == started
+
+
+def _write(path, samples):
+    """Replace path with samples atomically"""
+    fd, tmp_path = tempfile.mkstemp(dir=METRICS_DIR, prefix='.tmp-')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(samples, f)
+    os.replace(tmp_path, path)
+
+
+def flush():
+    """Write this process's samples to its file in METRICS_DIR"""
+    global _dirty
+    with _lock:
+        if not _dirty:
+            return
+        samples = [[name, dict(labels), value] for (name, labels), value in _samples.items()]
+        _dirty = False
+
+    try:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        _write(os.path.join(METRICS_DIR, _own_file()), samples)
+    except OSError as e:
+        print(f"⚠️ Could not write metrics: {e}")
+
+
+def _flush_loop():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        flush()
+
+
+atexit.register(flush)
+
+
+def _read(path):
+    """Samples of a file, [] if it is missing or unreadable"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def _add(merged, samples):
+    """Sum samples into merged, per metric and label set"""
+    for name, labels, value in samples:
+        key = (name, _labels_key(labels))
+        if isinstance(value, list):
+            total = merged.setdefault(key, [0] * len(value))
+            for i, v in enumerate(value):
+                total[i] += v
+        else:
+            merged[key] = merged.get(key, 0) + value
+
+
+def _retire(names, retired):
+    """Fold the files of exited processes into RETIRED_FILE and remove them"""
+    paths = [os.path.join(METRICS_DIR, name) for name in names]
+    for path in paths:
+        _add(retired, _read(path))
+    _write(os.path.join(METRICS_DIR, RETIRED_FILE),
+           [[name, dict(labels), value] for (name, labels), value in retired.items()])
+    for path in paths:
+        os.unlink(path)
+
+
+def _merged_samples():
+    """Samples of every process, summed per metric and label set"""
+    flush()
+    merged = {}
+    try:
+        lock_file = open(os.path.join(METRICS_DIR, '.merge.lock'), 'w')
+    except FileNotFoundError:
+        return merged
+
+    # One scrape at a time, so files are never counted twice or missed
+    # while another scrape retires them
+    with lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        names = [n for n in os.listdir(METRICS_DIR) if n.endswith('.json') and n != RETIRED_FILE]
+        _add(merged, _read(os.path.join(METRICS_DIR, RETIRED_FILE)))
+
+        exited = [name for name in names if not _is_live(name)]
+        if exited:
+            try:
+                _retire(exited, merged)
+                names = [name for name in names if name not in exited]
+            except OSError as e:
+                print(f"⚠️ Could not retire metrics of exited workers: {e}")
+                merged = {}
+                _add(merged, _read(os.path.join(METRICS_DIR, RETIRED_FILE)))
+
+        for file_name in names:
+            _add(merged, _read(os.path.join(METRICS_DIR, file_name)))
+    return merged
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def render():
+    """
+    All metrics, merged across workers, in the Prometheus text format.
+
+    Returns:
+        str: Exposition text (version 0.0.4)
+    """
+    merged = _merged_samples()
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        full_name = PREFIX + name
+        lines.append(f'# HELP {full_name} {help_text}')
+        lines.append(f'# TYPE {full_name} {kind}')
+        for (sample_name, labels), value in sorted(merged.items()):
+            if sample_name != name:
+                continue
+            if kind == 'counter':
+                lines.append(f'{full_name}{_format_labels(labels)} {value:g}')
+                continue
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, value):
+                cumulative += count
+                lines.append(f'{full_name}_bucket{_format_labels(labels, [("le", f"{bound:g}")])} {cumulative}')
+            lines.append(f'{full_name}_bucket{_format_labels(labels, [("le", "+Inf")])} {value[-1]}')
+            lines.append(f'{full_name}_sum{_format_labels(labels)} {value[-2]:.6f}')
+            lines.append(f'{full_name}_count{_format_labels(labels)} {value[-1]}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,129 @@
+"""
+Upstream Rate Limiting
+Token buckets shared by every gunicorn worker (the quota belongs to the API
+key, not to a process) and decayed demand counters used to decide which
+upstream calls are worth spending the quota on.
+
+A bucket's state is a small JSON file in the shared cache directory, read
+and updated under an exclusive flock, so workers never spend the same token
+twice. Taking a token costs one locked file read and write; it is only done
+right before an upstream call.
+"""
+
+import fcntl
+import json
+import math
+import os
+import threading
+import time
+
+from api import metrics
+from api.cache import CACHE_DIR
+
+
+class RateLimitExceeded(Exception):
+    """Raised instead of calling a provider whose quota is used up"""
+
+
+class TokenBucket:
+    """Cross-process token bucket: capacity tokens, refilled at rate per second"""
+
+    def __init__(self, name, rate, capacity):
+        """
+        Args:
+            name (str): Bucket name, e.g. 'alpha-vantage'
+            rate (float): Tokens added per second
+            capacity (float): Maximum tokens (burst size)
+        """
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.path = os.path.join(CACHE_DIR, f'{name}.bucket')
+
+    def _refilled(self, state, now):
+        elapsed = max(now - state['updated'], 0.0)
+        return min(self.capacity, state['tokens'] + elapsed * self.rate)
+
+    def _update(self, take):
+        """Refill, then take `take` tokens if all are available; return (taken, tokens left)"""
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(self.path, 'a+', encoding='utf-8') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            try:
+                state = json.loads(f.read())
+            except ValueError:
+                state = {'tokens': self.capacity, 'updated': 0.0}
+
+            now = time.time()
+            tokens = self._refilled(state, now)
+            taken = take > 0 and tokens >= take
+            if taken:
+                tokens -= take
+            if take:
+                f.seek(0)
+                f.truncate()
+                json.dump({'tokens': tokens, 'updated': now}, f)
+            return taken, tokens
+
+    def try_acquire(self, count=1):
+        """
+        Take count tokens if all of them are available (all or nothing).
+
+        Returns:
+            bool: True if the caller may make count upstream calls
+        """
+        taken, _ = self._update(take=count)
+        if not taken:
+            metrics.inc('rate_limited_total', provider=self.name)
+        return taken
+
+    def acquire_or_raise(self, count=1):
+        """Take count tokens or raise RateLimitExceeded"""
+        if count > self.capacity:
+            raise RateLimitExceeded(f"'{self.name}' needs {count} calls at once, more than its burst of {self.capacity:g}")
+        if not self.try_acquire(count):
+            raise RateLimitExceeded(f"'{self.name}' quota cannot cover {count} call(s) now")
+
+    def available(self):
+        """Tokens available right now (fractional)"""
+        return self._update(take=0)[1]
+
+    def next_token_in(self):
+        """Seconds until at least one token is available"""
+        tokens = self.available()
+        return 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+
+    def stats(self):
+        return {
+            'per_minute': round(self.rate * 60, 3),
+            'burst': self.capacity,
+            'tokens_available': round(self.available(), 2)
+        }
+
+
+class DemandCounter:
+    """Per-process request counts per key, decaying with a half-life"""
+
+    def __init__(self, half_life):
+        """
+        Args:
+            half_life (float): Seconds after which a request counts half
+        """
+        self.decay = math.log(2) / half_life
+        self._scores = {}  # key -> (score, updated)
+        self._lock = threading.Lock()
+
+    def _decayed(self, key, now):
+        score, updated = self._scores.get(key, (0.0, now))
+        return score * math.exp(-self.decay * (now - updated))
+
+    def record(self, key):
+        now = time.time()
+        with self._lock:
+            self._scores[key] = (self._decayed(key, now) + 1, now)
+
+    def score(self, key):
+        """Decayed number of recent requests for key"""
+        with self._lock:
+            return self._decayed(key, time.time())
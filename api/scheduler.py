@@ -0,0 +1,163 @@
+"""
+Background Refresh Scheduler
+Refreshes every upstream source before its cached payload expires, so user
+requests are served from cache instead of paying the upstream latency.
+
+Each job reports when it is next due through a callable (e.g. 80% into the
+market cache TTL, or the calendar's computed next_update). Due times are
+re-read on every tick, so a refresh done by another gunicorn worker pushes
+this worker's next run back instead of causing a duplicate fetch.
+"""
+
+from datetime import datetime
+import threading
+import time
+
+# Longest sleep between two ticks; bounds how late a due time moved
+# earlier by another worker is noticed
+MAX_SLEEP = 30
+
+# Minimum delay between two runs of the same job, and after a failure
+MIN_INTERVAL = 5
+RETRY_DELAY = 60
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+_wakeup = threading.Event()
+_thread = None
+
+
+def _iso(epoch):
+    return datetime.utcfromtimestamp(epoch).isoformat() + 'Z' if epoch else None
+
+
+def add_job(name, run, next_run):
+    """
+    Register a refresh job.
+
+    Args:
+        name (str): Job name shown in the stats
+        run (callable): Performs the refresh; exceptions count as failures
+        next_run (callable): Returns the epoch seconds at which run is due
+    """
+    with _jobs_lock:
+        _jobs[name] = {
+            'run': run,
+            'next_run': next_run,
+            'running': False,
+            'not_before': 0,
+            'runs': 0,
+            'failures': 0,
+            'last_run': None,
+            'last_duration_ms': None,
+            'last_lag_s': None,
+            'max_lag_s': 0.0,
+            'last_error': None,
+            'due_at': None
+        }
+    _wakeup.set()
+
+
+def _execute(name, job, due_at):
+    """Run one job and record its duration, lag and outcome"""
+    started = time.time()
+    lag = max(started - due_at, 0.0) if due_at else 0.0
+    error = None
+    try:
+        job['run']()
+    except Exception as e:
+        error = str(e)
+        print(f"⚠️ Scheduled refresh '{name}' failed: {e}")
+
+    finished = time.time()
+    with _jobs_lock:
+        job['running'] = False
+        job['runs'] += 1
+        job['last_run'] = started
+        job['last_duration_ms'] = round((finished - started) * 1000, 1)
+        job['last_lag_s'] = round(lag, 3)
+        job['max_lag_s'] = max(job['max_lag_s'], round(lag, 3))
+        job['last_error'] = error
+        if error:
+            job['failures'] += 1
+        job['not_before'] = finished + (RETRY_DELAY if error else MIN_INTERVAL)
+    _wakeup.set()
+
+
+def _tick():
+    """Start every due job and return the number of seconds until the next one"""
+    now = time.time()
+    sleep = MAX_SLEEP
+
+    with _jobs_lock:
+        jobs = list(_jobs.items())
+
+    for name, job in jobs:
+        if job['running']:
+            continue
+        try:
+            due_at = job['next_run']()
+        except Exception as e:
+            print(f"⚠️ Could not compute next run of '{name}': {e}")
+            due_at = now + RETRY_DELAY
+        job['due_at'] = due_at
+
+        start_at = max(due_at, job['not_before'])
+        if start_at <= now:
+            job['running'] = True
+            threading.Thread(
+                target=_execute, args=(name, job, due_at),
+                name=f"refresh-{name}", daemon=True
+            ).start()
+        else:
+            sleep = min(sleep, start_at - now)
+
+    return max(sleep, 0.1)
+
+
+def _loop(delay):
+    time.sleep(delay)
+    while True:
+        sleep = _tick()
+        _wakeup.wait(sleep)
+        _wakeup.clear()
+
+
+def start(delay=0):
+    """
+    Start the scheduler thread (idempotent).
+
+    Args:
+        delay (float): Seconds before the first tick
+    """
+    global _thread
+    if _thread is None:
+        _thread = threading.Thread(target=_loop, args=(delay,), name='refresh-scheduler', daemon=True)
+        _thread.start()
+        print(f"⏰ Background refresh scheduler started ({len(_jobs)} jobs, first tick in {delay:g}s)")
+
+
+def job_stats():
+    """
+    Scheduler monitoring data per job.
+
+    Returns:
+        dict: {name: {'runs', 'failures', 'running', 'due_at', 'last_run',
+        'last_duration_ms', 'last_lag_s', 'max_lag_s', 'last_error'}},
+        lag being how late a run started relative to its due time
+    """
+    with _jobs_lock:
+        return {
+            name: {
+                'runs': job['runs'],
+                'failures': job['failures'],
+                'running': job['running'],
+                'due_at': _iso(job['due_at']),
+                'last_run': _iso(job['last_run']),
+                'last_duration_ms': job['last_duration_ms'],
+                'last_lag_s': job['last_lag_s'],
+                'max_lag_s': job['max_lag_s'],
+                'last_error': job['last_error']
+            }
+            for name, job in _jobs.items()
+        }
@@ -0,0 +1,91 @@
+"""
+Single-Flight Request Coalescing
+Ensures that N concurrent callers asking for the same key run exactly one
+upstream fetch and share its result (or its exception). coalesce() serves
+threads; coalesce_async() serves the coroutines of an event loop.
+"""
+
+import threading
+
+# In-flight calls of this process: key -> _Call
+_calls = {}
+_calls_lock = threading.Lock()
+
+# In-flight calls of the event loops of this process: (loop, key) -> Task
+_tasks = {}
+
+
+class _Call:
+    """A fetch in progress whose outcome is shared by every waiter"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def coalesce(key, fetch):
+    """
+    Run fetch() once for all concurrent callers using the same key.
+
+    The first caller (the leader) runs the fetch; callers arriving while it
+    is in flight block until it completes and receive the same result, or
+    the same exception. Once the call completes the key is released, so the
+    next caller starts a new fetch.
+
+    Args:
+        key (str): Identity of the upstream resource, e.g. 'market'
+        fetch (callable): Function performing the upstream call
+
+    Returns:
+        The value returned by the leader's fetch()
+    """
+    with _calls_lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+
+    if not leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = fetch()
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _calls_lock:
+            del _calls[key]
+        call.done.set()
+
+    return call.result
+
+
+
+async def coalesce_async(key, fetch):
+    """
+    Await fetch() once for all concurrent coroutines using the same key.
+
+    The first caller starts fetch() as a task; every caller awaits that
+    task (shielded, so a caller cancelled by its own deadline leaves the
+    fetch running for the others) and gets its result or exception.
+
+    Args:
+        key (str): Identity of the upstream resource, e.g. 'digital-bonds'
+        fetch (callable): Coroutine function performing the upstream call
+
+    Returns:
+        The value returned by the task's fetch()
+    """
+    import asyncio
+
+    tasks_key = (asyncio.get_running_loop(), key)
+    task = _tasks.get(tasks_key)
+    if task is None:
+        task = _tasks[tasks_key] = asyncio.ensure_future(fetch())
+        task.add_done_callback(lambda _: _tasks.pop(tasks_key, None))
+    return await asyncio.shield(task)
@@ -0,0 +1,151 @@
+"""
+Binary Column Snapshots
+Single-file snapshot of columnar data: fixed-width NumPy columns plus the
+string dictionaries their codes index into. Opening one maps the file with
+mmap and wraps each column as a read-only array over the mapping, so load
+time does not grow with the number of rows, and gunicorn workers opening
+the same file share its pages through the OS page cache.
+
+Layout:
+    8 bytes   magic b'CBSNAP01'
+    8 bytes   header length, little-endian uint64
+    header    JSON: {'size', 'categories', 'columns': {name: [dtype, offset, length]}}
+    columns   raw little-endian arrays, each starting on a 64-byte boundary
+"""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+MAGIC = b'CBSNAP01'
+ALIGNMENT = 64
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+class SnapshotWriter:
+    """
+    Writes a snapshot column by column, chunk by chunk, into a temporary
+    file that replaces path atomically on close(). Column lengths must be
+    known up front so that offsets can go in the header.
+    """
+
+    def __init__(self, path, size, categories, lengths, dtypes):
+        """
+        Args:
+            path (str): Snapshot file to create or replace
+            size (int): Number of rows
+            categories (dict): field -> list of dictionary values (JSON serializable)
+            lengths (dict): column name -> number of elements
+            dtypes (dict): column name -> NumPy dtype, in file order
+        """
+        self.path = path
+        self.lengths = lengths
+        self.written = {name: 0 for name in dtypes}
+
+        columns = {}
+        offset = 0
+        for name, dtype in dtypes.items():
+            dtype = np.dtype(dtype).newbyteorder('<')
+            offset = _align(offset)
+            columns[name] = [dtype.str, offset, lengths[name]]
+            offset += dtype.itemsize * lengths[name]
+        header = json.dumps(
+            {'size': size, 'categories': categories, 'columns': columns},
+            ensure_ascii=False
+        ).encode('utf-8')
+        self.data_start = _align(len(MAGIC) + 8 + len(header))
+        self.columns = columns
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, self.tmp_path = tempfile.mkstemp(dir=directory, prefix='.snapshot-', suffix='.tmp')
+        self.file = os.fdopen(fd, 'wb')
+        self.file.write(MAGIC + struct.pack('<Q', len(header)) + header)
+        self.file.truncate(self.data_start + offset)
+
+    def write(self, name, values):
+        """Append values to column name"""
+        dtype_str, offset, length = self.columns[name]
+        values = np.ascontiguousarray(values, dtype=np.dtype(dtype_str))
+        if self.written[name] + len(values) > length:
+            raise ValueError(f"Column '{name}' overflows its {length} elements")
+        self.file.seek(self.data_start + offset + self.written[name] * values.itemsize)
+        self.file.write(values.tobytes())
+        self.written[name] += len(values)
+
+    def close(self):
+        try:
+            for name, written in self.written.items():
+                if written != self.lengths[name]:
+                    raise ValueError(f"Column '{name}' has {written} of {self.lengths[name]} elements")
+            self.file.close()
+            os.chmod(self.tmp_path, 0o644)
+            os.replace(self.tmp_path, self.path)
+        except BaseException:
+            self.abort()
+            raise
+
+    def abort(self):
+        self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.unlink(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_snapshot(path, size, categories, columns):
+    """
+    Write whole columns to a snapshot file.
+
+    Args:
+        path (str): Snapshot file to create or replace
+        size (int): Number of rows
+        categories (dict): field -> list of dictionary values
+        columns (dict): column name -> 1-D array
+    """
+    columns = {name: np.asarray(values) for name, values in columns.items()}
+    with SnapshotWriter(
+        path, size, categories,
+        {name: len(values) for name, values in columns.items()},
+        {name: values.dtype for name, values in columns.items()}
+    ) as writer:
+        for name, values in columns.items():
+            writer.write(name, values)
+
+
+def open_snapshot(path):
+    """
+    Map a snapshot file.
+
+    Returns:
+        tuple: (header dict, {column name: read-only array over the mapping})
+    """
+    with open(path, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if mapping[:len(MAGIC)] != MAGIC:
+        mapping.close()
+        raise ValueError(f"{path} is not a bond snapshot")
+    header_length, = struct.unpack_from('<Q', mapping, len(MAGIC))
+    header_start = len(MAGIC) + 8
+    header = json.loads(mapping[header_start:header_start + header_length].decode('utf-8'))
+    data_start = _align(header_start + header_length)
+
+    columns = {
+        name: np.frombuffer(mapping, dtype=np.dtype(dtype_str), count=length, offset=data_start + offset)
+        for name, (dtype_str, offset, length) in header['columns'].items()
+    }
+    return header, columns
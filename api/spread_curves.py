@@ -0,0 +1,309 @@
+"""
+Traditional Covered Bonds Spread Curves
+One spread-versus-remaining-maturity curve per country and rating bucket,
+fitted with the Nelson-Siegel form
+
+    s(T) = b0 + b1 * (1 - e^(-T/tau)) / (T/tau) + b2 * ((1 - e^(-T/tau)) / (T/tau) - e^(-T/tau))
+
+and each bond's rich/cheap residual against its curve (its spread minus the
+fitted spread, in bps: positive is cheap, negative rich).
+
+For a fixed tau the fit is linear (ridge) least squares, so every group is
+solved at once: the normal equations of all groups are accumulated with
+weighted bincounts over the bonds and solved as one batch of 3x3 systems,
+for each tau of a small grid; each group keeps its best tau. The ridge
+shrinks the slope and curvature towards a flat curve, which keeps the
+small groups of the real data set from fitting their noise. A group whose
+bonds all share one maturity has no curve to fit: it is returned flagged
+insufficient_data, without curve points, and its bonds without residuals.
+
+Fits are cached per content fingerprint of the emissions and as-of date,
+so they are only recomputed when the bonds (or the day, which moves
+remaining maturities) change.
+"""
+
+from collections import OrderedDict
+import hashlib
+import threading
+import weakref
+
+import numpy as np
+
+from api.bond_analytics import live_bonds, parse_as_of
+from api.bond_store import get_bond_store, parse_filters
+from api.singleflight import coalesce
+
+# Decay parameters tried for every group, in years
+TAUS = np.geomspace(0.5, 10, 12)
+
+# Groups with fewer bonds get a flat curve at their mean spread
+MIN_GROUP_BONDS = 5
+
+# Groups with fewer distinct maturities get no curve (insufficient_data)
+MIN_GROUP_MATURITIES = 2
+
+# Penalty per bond on the squared slope and curvature factors (bps^2 of
+# SSE per bps^2 of factor): a 100bp factor costs 10 bps^2 per bond. Also
+# keeps groups whose bonds share one maturity solvable
+SHRINKAGE = 1e-3
+
+# Points of each returned curve, spread over its group's maturity range
+CURVE_POINTS = 12
+
+# Fits kept for the most recent (emissions, as-of date) pairs
+FIT_CACHE_SIZE = 8
+
+MAX_PER_PAGE = 500
+
+
+def nelson_siegel_basis(years, tau):
+    """Loadings (1, slope, curvature) of the Nelson-Siegel factors"""
+    u = years / tau
+    decay = np.exp(-u)
+    slope = -np.expm1(-u) / u
+    return slope, slope - decay
+
+
+def nelson_siegel(years, params, tau):
+    """Fitted spreads; params is (..., 3) broadcast against years"""
+    slope, curvature = nelson_siegel_basis(years, tau)
+    return params[..., 0] + params[..., 1] * slope + params[..., 2] * curvature
+
+
+def fit_groups(years, spreads, groups, group_count):
+    """
+    Nelson-Siegel fit of every group at once.
+
+    Args:
+        years (ndarray): Remaining maturity per bond
+        spreads (ndarray): Spread per bond (bps)
+        groups (ndarray): Group id per bond, in [0, group_count)
+        group_count (int): Number of groups
+
+    Returns:
+        dict: params (group_count x 3), tau, rmse and bonds per group
+    """
+    def total(weights):
+        return np.bincount(groups, weights=weights, minlength=group_count)
+
+    counts = total(None)
+    sum_y = total(spreads)
+    sum_yy = total(spreads * spreads)
+
+    best_objective = np.full(group_count, np.inf)
+    best_sse = np.zeros(group_count)
+    params = np.zeros((group_count, 3))
+    best_tau = np.full(group_count, TAUS[0])
+    for tau in TAUS:
+        slope, curvature = nelson_siegel_basis(years, tau)
+        s1, s2 = total(slope), total(curvature)
+        s11, s12, s22 = total(slope * slope), total(slope * curvature), total(curvature * curvature)
+        normal = np.stack([
+            np.stack([counts, s1, s2], axis=-1),
+            np.stack([s1, s11, s12], axis=-1),
+            np.stack([s2, s12, s22], axis=-1)
+        ], axis=1)
+        rhs = np.stack([sum_y, total(slope * spreads), total(curvature * spreads)], axis=-1)
+
+        penalty = (SHRINKAGE * np.maximum(counts, 1))[:, None, None] * np.diag([1e-12, 1.0, 1.0])
+        solved = np.linalg.solve(normal + penalty, rhs[..., None])[..., 0]
+        sse = (sum_yy - 2 * np.einsum('gi,gi->g', solved, rhs)
+               + np.einsum('gi,gij,gj->g', solved, normal, solved))
+        objective = sse + np.einsum('gi,gij,gj->g', solved, penalty, solved)
+
+        better = objective < best_objective
+        best_objective[better] = objective[better]
+        best_sse[better] = sse[better]
+        params[better] = solved[better]
+        best_tau[better] = tau
+
+    # Too few bonds for three factors: flat curve at the mean spread
+    small = counts < MIN_GROUP_BONDS
+    params[small] = 0
+    params[small, 0] = sum_y[small] / np.maximum(counts[small], 1)
+    best_sse[small] = sum_yy[small] - counts[small] * params[small, 0] ** 2
+
+    return {
+        'params': params,
+        'tau': best_tau,
+        'rmse': np.sqrt(np.maximum(best_sse, 0) / np.maximum(counts, 1)),
+        'bonds': counts.astype(np.int64)
+    }
+
+
+def fit_store(store, as_of):
+    """
+    Fit the curves of every country x rating group of the bonds alive at as_of.
+
+    Returns:
+        dict: rows, years, group (per live bond), group_keys (country code,
+        rating code per group), shortest and longest (maturity range per
+        group), maturities (distinct maturity dates per group), sufficient
+        (whether a group has a curve), the fit_groups() arrays and fitted
+        (the curve spread of every live bond, NaN without a curve)
+    """
+    rows, years = live_bonds(store, as_of)
+    ratings = len(store.categories['rating'])
+    keys = store.codes['country'][rows].astype(np.int64) * ratings + store.codes['rating'][rows]
+    group_keys, groups = np.unique(keys, return_inverse=True)
+    groups = groups.ravel()
+
+    fit = fit_groups(years, store.numbers['spread'][rows], groups, len(group_keys))
+    shortest = np.full(len(group_keys), np.inf)
+    longest = np.full(len(group_keys), -np.inf)
+    np.minimum.at(shortest, groups, years)
+    np.maximum.at(longest, groups, years)
+
+    maturities = np.zeros(len(group_keys), dtype=np.int64)
+    if len(rows):
+        days = store.dates['maturity'][rows].astype(np.int64)
+        span = int(days.max() - days.min()) + 1
+        distinct = np.unique(groups.astype(np.int64) * span + (days - days.min()))
+        maturities = np.bincount(distinct // span, minlength=len(group_keys))
+    sufficient = maturities >= MIN_GROUP_MATURITIES
+
+    fitted = nelson_siegel(years, fit['params'][groups], fit['tau'][groups])
+    fitted[~sufficient[groups]] = np.nan
+    fit.update({
+        'shortest': shortest,
+        'longest': longest,
+        'maturities': maturities,
+        'sufficient': sufficient,
+        'rows': rows,
+        'years': years,
+        'group': groups,
+        'group_keys': np.stack([group_keys // ratings, group_keys % ratings], axis=-1),
+        'fitted': fitted
+    })
+    return fit
+
+
+_fingerprints = weakref.WeakKeyDictionary()
+
+
+def store_fingerprint(store):
+    """Content hash of the columns the fits depend on (once per store)"""
+    fingerprint = _fingerprints.get(store)
+    if fingerprint is None:
+        digest = hashlib.blake2b(digest_size=16)
+        for field in ('country', 'rating'):
+            digest.update('\x1f'.join(map(str, store.categories[field])).encode('utf-8'))
+            digest.update(np.ascontiguousarray(store.codes[field]).tobytes())
+        digest.update(np.ascontiguousarray(store.numbers['spread']).tobytes())
+        for field in ('issueDate', 'maturity'):
+            digest.update(np.ascontiguousarray(store.dates[field]).tobytes())
+        fingerprint = _fingerprints[store] = digest.hexdigest()
+    return fingerprint
+
+
+_fits = OrderedDict()
+_fits_lock = threading.Lock()
+
+
+def get_fit(store, as_of):
+    """Curves of store at as_of, refitted only when the bonds or the date change"""
+    key = (store_fingerprint(store), as_of)
+    with _fits_lock:
+        fit = _fits.get(key)
+        if fit is not None:
+            _fits.move_to_end(key)
+            return fit
+
+    fit = coalesce(f'spread-curves:{key[0]}:{as_of}', lambda: fit_store(store, as_of))
+    with _fits_lock:
+        _fits[key] = fit
+        if len(_fits) > FIT_CACHE_SIZE:
+            _fits.popitem(last=False)
+    return fit
+
+
+def _curve(store, fit, g):
+    country, rating = fit['group_keys'][g]
+    curve = {
+        'country': store.categories['country'][country],
+        'rating': store.categories['rating'][rating],
+        'bonds': int(fit['bonds'][g]),
+        'maturities': int(fit['maturities'][g]),
+        'maturityRange': [round(float(fit['shortest'][g]), 2), round(float(fit['longest'][g]), 2)]
+    }
+    if not fit['sufficient'][g]:
+        curve.update({'insufficient_data': True, 'params': None, 'rmse': None, 'labels': [], 'data': []})
+        return curve
+
+    params = fit['params'][g]
+    tenors = np.linspace(fit['shortest'][g], fit['longest'][g], CURVE_POINTS)
+    curve.update({
+        'insufficient_data': False,
+        'params': {'beta0': round(float(params[0]), 4), 'beta1': round(float(params[1]), 4),
+                   'beta2': round(float(params[2]), 4), 'tau': round(float(fit['tau'][g]), 4)},
+        'rmse': round(float(fit['rmse'][g]), 2),
+        'labels': np.round(tenors, 2).tolist(),
+        'data': np.round(nelson_siegel(tenors, params, fit['tau'][g]), 2).tolist()
+    })
+    return curve
+
+
+def _rounded(value, digits):
+    """value rounded, None when NaN (no curve)"""
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def spread_curves(args):
+    """
+    API payload for request arguments: asOf (default today), the /api/bonds
+    filters, direction ('desc': cheapest first, default; 'asc': richest
+    first), page and per_page.
+
+    Returns:
+        dict: Curves of the groups holding matching bonds, and one page of
+        the matching live bonds ranked by residual (the bonds of
+        insufficient_data groups last, without fitted spread or residual)
+    """
+    as_of = parse_as_of(args.get('asOf'))
+    direction = args.get('direction', 'desc')
+    if direction not in ('asc', 'desc'):
+        raise ValueError("direction must be 'asc' or 'desc'")
+    try:
+        page = int(args.get('page', 1))
+        per_page = int(args.get('per_page', 20))
+    except ValueError:
+        raise ValueError("page and per_page must be integers")
+    if page < 1 or not 1 <= per_page <= MAX_PER_PAGE:
+        raise ValueError(f"page must be >= 1 and per_page between 1 and {MAX_PER_PAGE}")
+
+    store = get_bond_store()
+    fit = get_fit(store, as_of)
+    filters = parse_filters(args)
+    if filters:
+        selected = np.flatnonzero(np.isin(fit['rows'], store.matching_rows(filters)))
+    else:
+        selected = np.arange(len(fit['rows']))
+
+    spreads = store.numbers['spread'][fit['rows'][selected]]
+    residuals = spreads - fit['fitted'][selected]
+    order = np.argsort(-residuals if direction == 'desc' else residuals, kind='stable')  # NaN last
+
+    start = (page - 1) * per_page
+    bonds = []
+    for k in order[start:start + per_page]:
+        i = selected[k]
+        record = store.record(fit['rows'][i])
+        bond = {field: record[field] for field in ('isin', 'issuer', 'country', 'rating', 'maturity', 'spread')}
+        bond.update({
+            'years': round(float(fit['years'][i]), 3),
+            'fitted': _rounded(fit['fitted'][i], 2),
+            'residual': _rounded(residuals[k], 2)
+        })
+        bonds.append(bond)
+
+    return {
+        'status': 'success',
+        'asOf': as_of.isoformat(),
+        'avgSpread': round(float(spreads.mean()), 1) if len(selected) else None,
+        'curves': [_curve(store, fit, g) for g in np.unique(fit['group'][selected])],
+        'total': len(selected),
+        'pages': -(-len(selected) // per_page),
+        'page': page,
+        'per_page': per_page,
+        'data': bonds
+    }
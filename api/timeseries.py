@@ -0,0 +1,218 @@
+"""
+Quote History Store
+Every successful Alpha Vantage and CoinGecko fetch appends its prices to an
+embedded SQLite database shared by all workers, so charts can show history
+instead of hand-typed arrays.
+
+Range queries are downsampled inside SQLite: ticks are grouped into minute,
+hour or day buckets and only one point per bucket leaves the database
+(the close, or open/high/low/close/volume), so a year of history costs at
+most a few hundred rows whatever the tick rate.
+
+Ticks older than RETENTION_DAYS are deleted as new ones of their series
+are written, so the database stops growing after the retention window.
+Both the range queries and the deletes are primary key range scans.
+"""
+
+from datetime import datetime, timedelta, timezone
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+TIMESERIES_DB = os.environ.get(
+    'TIMESERIES_DB',
+    os.path.join(tempfile.gettempdir(), 'covered-bonds-timeseries.sqlite')
+)
+
+# Bucket size (seconds) per resolution
+RESOLUTIONS = {'minute': 60, 'hour': 3600, 'day': 86400}
+
+# Resolution 'auto' picks the finest one returning at most this many points
+MAX_POINTS = 1500
+
+DEFAULT_RANGE = timedelta(days=7)
+
+# Ticks older than this are deleted (days)
+RETENTION_DAYS = float(os.environ.get('TIMESERIES_RETENTION_DAYS', 365))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ticks (
+    series TEXT NOT NULL,
+    ts REAL NOT NULL,
+    price REAL NOT NULL,
+    volume REAL,
+    PRIMARY KEY (series, ts)
+) WITHOUT ROWID
+"""
+
+# One bucket per row: its first and last tick are looked up by primary key
+DOWNSAMPLE_QUERY = """
+SELECT g.bucket, o.price, g.high, g.low, c.price, g.volume, g.ticks
+FROM (
+    SELECT CAST(ts / :size AS INTEGER) AS bucket, MIN(ts) AS first_ts, MAX(ts) AS last_ts,
+           MAX(price) AS high, MIN(price) AS low, SUM(volume) AS volume, COUNT(*) AS ticks
+    FROM ticks
+    WHERE series = :series AND ts >= :start AND ts < :end
+    GROUP BY bucket
+) AS g
+JOIN ticks AS o ON o.series = :series AND o.ts = g.first_ts
+JOIN ticks AS c ON c.series = :series AND c.ts = g.last_ts
+ORDER BY g.bucket
+"""
+
+PRUNE_QUERY = 'DELETE FROM ticks WHERE series = ? AND ts < ?'
+
+
+class HistoryUnavailableError(Exception):
+    """Raised when the history database cannot be read (locked, corrupt)"""
+
+_local = threading.local()
+
+
+def _connection():
+    """Per-thread (and per-process, after a fork) connection in WAL mode"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.pid != os.getpid():
+        directory = os.path.dirname(os.path.abspath(TIMESERIES_DB))
+        os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(TIMESERIES_DB, timeout=5)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(SCHEMA)
+        _local.conn, _local.pid = conn, os.getpid()
+    return conn
+
+
+def record_many(points):
+    """
+    Append ticks and drop those of the same series older than
+    RETENTION_DAYS; a failure is logged and never breaks the fetch that
+    produced them.
+
+    Args:
+        points (list): (series, price, volume) tuples, e.g.
+            ('alpha-vantage:LQD', 108.42, 9876543); all stamped now
+    """
+    now = time.time()
+    try:
+        conn = _connection()
+        with conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO ticks (series, ts, price, volume) VALUES (?, ?, ?, ?)',
+                [(series, now, price, volume) for series, price, volume in points]
+            )
+            cutoff = now - RETENTION_DAYS * 86400
+            conn.executemany(PRUNE_QUERY, [(series, cutoff) for series in {point[0] for point in points}])
+    except sqlite3.Error as e:
+        print(f"⚠️ Could not record quote history: {e}")
+
+
+def record(series, price, volume=None):
+    """Append one tick (see record_many)"""
+    record_many([(series, price, volume)])
+
+
+def list_series():
+    """
+    Recorded series with their tick count and time range.
+
+    Returns:
+        list: [{'series', 'ticks', 'first', 'last'}]
+    """
+    rows = _connection().execute(
+        'SELECT series, COUNT(*), MIN(ts), MAX(ts) FROM ticks GROUP BY series ORDER BY series'
+    ).fetchall()
+    return [
+        {'series': series, 'ticks': count, 'first': _iso(first), 'last': _iso(last)}
+        for series, count, first, last in rows
+    ]
+
+
+def _iso(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _parse_time(value, name):
+    """Epoch seconds of an ISO date or datetime (UTC when naive)"""
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO date or datetime, e.g. 2026-01-31")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _auto_resolution(start, end):
+    for name, size in RESOLUTIONS.items():
+        if (end - start) / size <= MAX_POINTS:
+            return name
+    return 'day'
+
+
+def query_range(series, start, end, resolution='auto', ohlc=False):
+    """
+    Downsampled history of one series.
+
+    Args:
+        series (str): Series name, e.g. 'alpha-vantage:LQD'
+        start (float): Range start, epoch seconds (inclusive)
+        end (float): Range end, epoch seconds (exclusive)
+        resolution (str): 'minute', 'hour', 'day' or 'auto'
+        ohlc (bool): Return open/high/low/close/volume instead of closes
+
+    Returns:
+        dict: Chart-ready columns: labels (bucket start) and data (close),
+        or labels, open, high, low, close, volume and ticks
+    """
+    if resolution == 'auto':
+        resolution = _auto_resolution(start, end)
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"resolution must be one of: auto, {', '.join(RESOLUTIONS)}")
+    if end <= start:
+        raise ValueError("end must be after start")
+
+    size = RESOLUTIONS[resolution]
+    rows = _connection().execute(DOWNSAMPLE_QUERY, {
+        'series': series, 'start': start, 'end': end, 'size': size
+    }).fetchall()
+
+    result = {'series': series, 'resolution': resolution, 'labels': [_iso(row[0] * size) for row in rows]}
+    if not ohlc:
+        result['data'] = [row[4] for row in rows]
+        return result
+    for i, column in enumerate(('open', 'high', 'low', 'close', 'volume', 'ticks'), start=1):
+        result[column] = [row[i] for row in rows]
+    return result
+
+
+def history(args):
+    """
+    API payload for request arguments: series, start, end (ISO, default
+    the last 7 days), resolution and format ('line' or 'ohlc'). Without a
+    series, lists the recorded series.
+
+    Raises:
+        ValueError: Invalid argument
+        HistoryUnavailableError: The database could not be read
+    """
+    series = args.get('series')
+    try:
+        if not series:
+            return {'status': 'success', 'series': list_series()}
+
+        output = args.get('format', 'line')
+        if output not in ('line', 'ohlc'):
+            raise ValueError("format must be 'line' or 'ohlc'")
+        end = _parse_time(args['end'], 'end') if args.get('end') else time.time()
+        start = _parse_time(args['start'], 'start') if args.get('start') else end - DEFAULT_RANGE.total_seconds()
+
+        return {
+            'status': 'success',
+            **query_range(series, start, end, args.get('resolution', 'auto'), ohlc=output == 'ohlc')
+        }
+    except sqlite3.Error as e:
+        print(f"⚠️ Could not read quote history: {e}")
+        raise HistoryUnavailableError(f"Quote history unavailable: {e}")
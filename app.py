@@ -3,21 +3,106 @@ Unified Flask Application for Railway Deployment
 Combines all API endpoints: Market, Digital Bonds, Economic Calendar
 """
 
-from flask import Flask, jsonify
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
+from concurrent.futures import ThreadPoolExecutor
 import os
+import time
 
 # Import API functions from individual modules
 import sys
 sys.path.insert(0, os.path.dirname(__file__))
 
-from api.market import get_covered_bond_market_data
-from api.digital_bonds import get_digital_assets_data
-from api.economic_calendar import get_economic_calendar_data
+from api.lazy import deferred
+from api.http_client import pool_stats
+from api.circuit_breaker import breaker_stats
+from api import events, metrics, scheduler
+
+# The upstream API modules and the bond store (NumPy, emission universe)
+# are imported on first call: a worker boots and answers /health without
+# loading them; the emissions are loaded by the first /api/bonds* request
+# and the refresh scheduler loads the upstream modules in its own thread
+# once its first tick comes
+get_covered_bond_market_data = deferred('api.market', 'get_covered_bond_market_data')
+get_market_fallback = deferred('api.market', 'get_fallback_data')
+refresh_covered_bond_market_data = deferred('api.market', 'refresh_covered_bond_market_data')
+next_market_refresh = deferred('api.market', 'next_market_refresh')
+get_market_basket = deferred('api.market', 'get_market_basket')
+parse_symbols = deferred('api.market', 'parse_symbols')
+get_digital_assets_data = deferred('api.digital_bonds', 'get_digital_assets_data')
+get_digital_fallback = deferred('api.digital_bonds', 'get_fallback_data')
+refresh_digital_assets_data = deferred('api.digital_bonds', 'refresh_digital_assets_data')
+next_digital_refresh = deferred('api.digital_bonds', 'next_digital_refresh')
+get_economic_calendar_data = deferred('api.economic_calendar', 'get_economic_calendar_data')
+get_calendar_fallback = deferred('api.economic_calendar', 'get_fallback_data')
+refresh_economic_calendar = deferred('api.economic_calendar', 'refresh_economic_calendar')
+next_calendar_refresh = deferred('api.economic_calendar', 'next_calendar_refresh')
+query_bonds = deferred('api.bond_store', 'query_bonds')
+chart_data = deferred('api.bond_charts', 'chart_data')
+bond_analytics = deferred('api.bond_analytics', 'bond_analytics')
+spread_curves = deferred('api.spread_curves', 'spread_curves')
+search_bonds = deferred('api.bond_search', 'search_bonds')
+export_bonds = deferred('api.bond_export', 'export_bonds')
+history = deferred('api.timeseries', 'history')
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+# Sections of /api/dashboard: fetcher, fallback and deadline in seconds.
+# A section missing its deadline is served from its fallback data while
+# the fetch keeps running in the pool and warms the cache for next time.
+DASHBOARD_SECTIONS = {
+    'market': (get_covered_bond_market_data, get_market_fallback, 5.0),
+    'digital_bonds': (get_digital_assets_data, get_digital_fallback, 5.0),
+    'economic_calendar': (get_economic_calendar_data, get_calendar_fallback, 8.0)
+}
+
+# Threads of each section: a slow provider only fills its own pool, so
+# the other sections (cache hits included) keep meeting their deadlines
+DASHBOARD_SECTION_THREADS = int(os.environ.get('DASHBOARD_SECTION_THREADS', 4))
+
+_dashboard_pools = {
+    name: ThreadPoolExecutor(max_workers=DASHBOARD_SECTION_THREADS, thread_name_prefix=f'dashboard-{name}')
+    for name in DASHBOARD_SECTIONS
+}
+
+# Refresh every source in the background before its cache expires
+# (set BACKGROUND_REFRESH=0 to only fetch on demand), starting
+# BACKGROUND_REFRESH_DELAY seconds after boot so a cold worker answers its
+# health check before loading the upstream modules
+scheduler.add_job('market', refresh_covered_bond_market_data, next_market_refresh)
+scheduler.add_job('digital_bonds', refresh_digital_assets_data, next_digital_refresh)
+scheduler.add_job('economic_calendar', refresh_economic_calendar, next_calendar_refresh)
+if os.environ.get('BACKGROUND_REFRESH', '1') == '1':
+    scheduler.start(delay=float(os.environ.get('BACKGROUND_REFRESH_DELAY', 10)))
+
+# Payloads pushed on /api/stream when their content changes
+events.add_source('market', get_covered_bond_market_data)
+events.add_source('digital_bonds', get_digital_assets_data)
+
+def _route_label():
+    """Route pattern of the current request (bounded label cardinality)"""
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+def _json_response(data, max_age=3600):
+    """JSON response with the CORS and caching headers of the data routes"""
+    with metrics.timer('response_build_seconds', route=_route_label()):
+        response = jsonify(data)
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        response.headers.add('Cache-Control', f'public, max-age={max_age}')
+    return response
+
+@app.before_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def _record_request_time(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        metrics.observe('request_seconds', time.perf_counter() - started, route=_route_label())
+    return response
+
 @app.route('/')
 def home():
     """Health check and API documentation"""
@@ -27,44 +112,228 @@ def home():
         "version": "3.0.0",
         "platform": "Railway",
         "endpoints": {
-            "/api/market": "Covered bond market data (Alpha Vantage/Fallback)",
+            "/api/market": "Covered bond market data (Alpha Vantage/Fallback), ?symbols= for a basket",
             "/api/digital-bonds": "Digital assets & RWA feed (CoinGecko)",
-            "/api/economic-calendar": "Economic events calendar (Investing.com)"
+            "/api/economic-calendar": "Economic events calendar (Investing.com)",
+            "/api/dashboard": "All of the above in a single response",
+            "/api/bonds": "Traditional covered bond emissions (filter, sort, paginate)",
+            "/api/bonds/charts": "Chart aggregations over the filtered emissions",
+            "/api/bonds/analytics": "Yield, duration, convexity and DV01 of the filtered emissions at an as-of date",
+            "/api/bonds/spread-curves": "Spread curves per country and rating, with rich/cheap residuals",
+            "/api/bonds/search": "Typeahead over issuers, bond types and ISINs (accent-insensitive)",
+            "/api/bonds/export": "Streaming CSV or NDJSON export of the filtered emissions",
+            "/api/history": "Recorded quote history, downsampled (minute, hour, day, OHLC)",
+            "/api/stream": "Server-sent events pushing market and digital asset changes",
+            "/metrics": "Prometheus metrics (upstream, parse and response timings, cache, fallbacks)"
         },
         "documentation": "https://github.com/JoanLabTest/covered-bonds-dashboard"
     })
 
 @app.route('/api/market')
 def market():
-    """Covered Bonds Market Data API"""
-    data = get_covered_bond_market_data()
-    response = jsonify(data)
-    response.headers.add('Access-Control-Allow-Origin', '*')
-    response.headers.add('Cache-Control', 'public, max-age=3600')
-    return response
+    """
+    Covered Bonds Market Data API
+    LQD by default; ?symbols=LQD,MBB,... returns a basket of bond ETFs
+    """
+    if request.args.get('symbols'):
+        try:
+            data = get_market_basket(parse_symbols(request.args['symbols']))
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+    else:
+        data = get_covered_bond_market_data()
+    return _json_response(data)
 
 @app.route('/api/digital-bonds')
 def digital_bonds():
     """Digital Assets & RWA Feed API"""
     data = get_digital_assets_data()
-    response = jsonify(data)
-    response.headers.add('Access-Control-Allow-Origin', '*')
-    response.headers.add('Cache-Control', 'public, max-age=3600')
-    return response
+    return _json_response(data)
 
 @app.route('/api/economic-calendar')
 def economic_calendar():
     """Economic Calendar API"""
     data = get_economic_calendar_data()
-    response = jsonify(data)
-    response.headers.add('Access-Control-Allow-Origin', '*')
-    response.headers.add('Cache-Control', 'public, max-age=86400')  # 24h cache
+    return _json_response(data, max_age=86400)  # 24h cache
+
+@app.route('/api/dashboard')
+def dashboard():
+    """
+    Aggregated Dashboard API
+    Fetches every section concurrently so wall time is the slowest section
+    (bounded by its deadline) rather than the sum of all of them. Each
+    section runs on its own pool; a fetch still queued when its section
+    degrades is dropped.
+    """
+    started = time.monotonic()
+    futures = {
+        name: _dashboard_pools[name].submit(fetch)
+        for name, (fetch, _, _) in DASHBOARD_SECTIONS.items()
+    }
+    
+    data = {"status": "success", "degraded": []}
+    for name, future in futures.items():
+        _, fallback, deadline = DASHBOARD_SECTIONS[name]
+        remaining = deadline - (time.monotonic() - started)
+        try:
+            data[name] = future.result(timeout=max(remaining, 0))
+        except Exception as e:
+            reason = "timeout" if isinstance(e, TimeoutError) else str(e)
+            print(f"⚠️ Dashboard section '{name}' degraded: {reason}")
+            data[name] = fallback()
+            data["degraded"].append(name)
+            future.cancel()
+    
+    data["elapsed_ms"] = round((time.monotonic() - started) * 1000, 1)
+    
+    return _json_response(data)
+
+@app.route('/api/bonds')
+def bonds():
+    """
+    Traditional Covered Bonds Query API
+    Filters: issuer, country, currency, status, rating, type, greenBond, issueYear
+    Paging: sort, direction (asc/desc), page, per_page
+    """
+    try:
+        data = query_bonds(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    
+    return _json_response(data)
+
+@app.route('/api/bonds/charts')
+@app.route('/api/bonds/charts/<chart>')
+def bond_charts(chart=None):
+    """
+    Traditional Covered Bonds Chart API
+    One chart (timeline, country, top-issuers, green-bonds, spread,
+    maturity-wall, metrics) or all of them, with the /api/bonds filters
+    """
+    try:
+        data = chart_data(request.args, [chart] if chart else None)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    
+    return _json_response(data)
+
+@app.route('/api/bonds/analytics')
+def bond_risk_analytics():
+    """
+    Traditional Covered Bonds Analytics API
+    asOf (ISO date, default today) plus the /api/bonds filters; sort by
+    yield, price, modifiedDuration, convexity or dv01; page, per_page
+    """
+    try:
+        data = bond_analytics(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    
+    return _json_response(data)
+
+@app.route('/api/bonds/spread-curves')
+def bond_spread_curves():
+    """
+    Traditional Covered Bonds Spread Curves API
+    Nelson-Siegel spread curve per country x rating and each bond's
+    residual; asOf plus the /api/bonds filters, direction (desc: cheapest
+    first, asc: richest first), page, per_page
+    """
+    try:
+        data = spread_curves(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    
+    return _json_response(data)
+
+@app.route('/api/bonds/search')
+def bond_search():
+    """
+    Traditional Covered Bonds Search API
+    q (text typed so far), limit, fields (issuer,type,isin)
+    """
+    try:
+        data = search_bonds(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    
+    return _json_response(data, max_age=300)
+
+@app.route('/api/bonds/export')
+def bond_export():
+    """
+    Traditional Covered Bonds Export API
+    format (csv, ndjson) plus the /api/bonds filters, sort and direction;
+    streamed with chunked transfer encoding
+    """
+    try:
+        chunks, mimetype, filename = export_bonds(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    
+    response = Response(chunks, mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
+
+@app.route('/api/history')
+def quote_history():
+    """
+    Quote History API
+    series (e.g. alpha-vantage:LQD, coingecko:pax-gold; omitted: list them),
+    start/end (ISO), resolution (minute, hour, day, auto), format (line, ohlc)
+    """
+    from api.timeseries import HistoryUnavailableError
+
+    try:
+        data = history(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except HistoryUnavailableError as e:
+        return jsonify({"status": "error", "message": str(e)}), 503
+    
+    return _json_response(data, max_age=60)
+
+@app.route('/api/stream')
+def live_stream():
+    """
+    Live Updates (server-sent events)
+    Pushes the market and digital_bonds payloads when they change;
+    ?topics=market,digital_bonds selects the topics. Each client holds a
+    server thread here, so past events.MAX_CLIENTS streams per worker new
+    clients get a 503 and poll instead (asgi.py serves streams with
+    coroutines, without that limit).
+    """
+    try:
+        topics = events.parse_topics(request.args.get('topics'))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    
+    if events.stream_stats()['clients'] >= events.MAX_CLIENTS:
+        response = jsonify({"status": "error", "message": "Too many live update clients, poll instead"})
+        response.headers['Retry-After'] = '300'
+        return response, 503
+    
+    response = Response(events.stream(topics), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Do not let proxies buffer the stream
     return response
 
 @app.route('/health')
 def health():
     """Health check endpoint for Railway"""
-    return jsonify({"status": "healthy"}), 200
+    return jsonify({
+        "status": "healthy",
+        "http_pools": pool_stats(),  # Upstream connection reuse of this worker
+        "scheduler": scheduler.job_stats(),  # Background refresh runs and lag
+        "circuit_breakers": breaker_stats(),  # Upstream providers failing fast
+        "event_stream": events.stream_stats()  # Live update clients of this worker
+    }), 200
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus scrape endpoint, merged across all gunicorn workers"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,346 @@
+"""
+Unified ASGI Application
+Opt-in async entry point serving the same routes as app.py (the Procfile
+runs app.py on gunicorn; see RAILWAY_DEPLOYMENT.md). The routes that wait
+on Alpha Vantage, CoinGecko and Investing.com (/api/market,
+/api/digital-bonds, /api/economic-calendar, /api/dashboard) run as
+coroutines over the non-blocking upstream clients, so one worker keeps
+hundreds of them in flight while the providers answer, where a sync
+gunicorn worker is stuck on one. /api/stream clients are coroutines too,
+so thousands of open dashboards hold no thread. Every other route is
+served by the Flask app of app.py on a thread pool, with streamed bodies
+(/api/bonds/export) sent chunk by chunk.
+
+The Flask app is imported as is, so both entry points share the same
+startup: delayed background refresh scheduler and live update sources,
+with the upstream modules and the bond store loaded on first use.
+
+Run with:
+    uvicorn asgi:app --host 0.0.0.0 --port $PORT --workers 2 --timeout-graceful-shutdown 10
+(open event streams never end on their own: the graceful shutdown timeout
+lets a restart close them)
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import io
+import json
+import os
+import sys
+import threading
+import time
+from urllib.parse import parse_qsl
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app import DASHBOARD_SECTIONS, app as flask_app
+from api.async_http import close_clients
+from api.lazy import deferred
+from api import events, metrics
+
+# Like app.py, the upstream modules are imported on first call
+get_covered_bond_market_data_async = deferred('api.market', 'get_covered_bond_market_data_async')
+get_market_basket_async = deferred('api.market', 'get_market_basket_async')
+parse_symbols = deferred('api.market', 'parse_symbols')
+get_digital_assets_data_async = deferred('api.digital_bonds', 'get_digital_assets_data_async')
+get_economic_calendar_data_async = deferred('api.economic_calendar', 'get_economic_calendar_data_async')
+
+# Threads serving the Flask routes
+WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS', 32))
+
+# Seconds a WSGI thread waits for a client to take one body chunk; a
+# stalled client loses its response instead of holding the thread
+SEND_TIMEOUT = float(os.environ.get('ASGI_SEND_TIMEOUT', 30))
+
+# Async fetcher of each /api/dashboard section (fallbacks and deadlines
+# are those of app.DASHBOARD_SECTIONS)
+DASHBOARD_FETCHERS = {
+    'market': get_covered_bond_market_data_async,
+    'digital_bonds': get_digital_assets_data_async,
+    'economic_calendar': get_economic_calendar_data_async
+}
+
+_wsgi_pool = ThreadPoolExecutor(max_workers=WSGI_THREADS, thread_name_prefix='wsgi')
+
+# Background dashboard sections still running after their deadline
+_pending = set()
+
+
+async def market(args):
+    """Covered bond market data; ?symbols= returns a basket of bond ETFs"""
+    if args.get('symbols'):
+        try:
+            symbols = parse_symbols(args['symbols'])
+        except ValueError as e:
+            return 400, {"status": "error", "message": str(e)}, None
+        return 200, await get_market_basket_async(symbols), 3600
+    return 200, await get_covered_bond_market_data_async(), 3600
+
+
+async def digital_bonds(args):
+    """Digital Assets & RWA Feed"""
+    return 200, await get_digital_assets_data_async(), 3600
+
+
+async def economic_calendar(args):
+    """Economic Calendar (24h cache)"""
+    return 200, await get_economic_calendar_data_async(), 86400
+
+
+async def dashboard(args):
+    """
+    Aggregated Dashboard
+    Awaits every section concurrently; a section missing its deadline is
+    served from its fallback data while its fetch keeps running and warms
+    the cache for next time.
+    """
+    started = time.monotonic()
+    tasks = {name: asyncio.ensure_future(fetch()) for name, fetch in DASHBOARD_FETCHERS.items()}
+
+    data = {"status": "success", "degraded": []}
+    for name, task in tasks.items():
+        _, fallback, deadline = DASHBOARD_SECTIONS[name]
+        remaining = deadline - (time.monotonic() - started)
+        try:
+            data[name] = await asyncio.wait_for(asyncio.shield(task), max(remaining, 0))
+        except Exception as e:
+            reason = "timeout" if isinstance(e, asyncio.TimeoutError) else str(e)
+            print(f"⚠️ Dashboard section '{name}' degraded: {reason}")
+            data[name] = fallback()
+            data["degraded"].append(name)
+            if not task.done():
+                _pending.add(task)
+                task.add_done_callback(_pending.discard)
+
+    data["elapsed_ms"] = round((time.monotonic() - started) * 1000, 1)
+    return 200, data, 3600
+
+
+ROUTES = {
+    '/api/market': market,
+    '/api/digital-bonds': digital_bonds,
+    '/api/economic-calendar': economic_calendar,
+    '/api/dashboard': dashboard
+}
+
+
+def _query_args(scope):
+    """Query parameters of a request, first value of each as request.args.get()"""
+    args = {}
+    for name, value in parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True):
+        args.setdefault(name, value)
+    return args
+
+
+async def _respond(scope, send, handler):
+    """Run an async route and send its JSON with the headers of app._json_response()"""
+    started = time.perf_counter()
+    status, data, max_age = await handler(_query_args(scope))
+    await _send_json(scope, send, status, data, max_age)
+    metrics.observe('request_seconds', time.perf_counter() - started, route=scope['path'])
+
+
+async def _send_json(scope, send, status, data, max_age):
+    """Send data as JSON, with the CORS header and a Cache-Control max_age when not None"""
+    route = scope['path']
+    with metrics.timer('response_build_seconds', route=route):
+        body = (flask_app.json.dumps(data, separators=(',', ':')) + '\n').encode('utf-8')
+        headers = [(b'content-type', b'application/json'),
+                   (b'content-length', str(len(body)).encode('ascii')),
+                   (b'access-control-allow-origin', b'*')]
+        if max_age is not None:
+            headers.append((b'cache-control', f'public, max-age={max_age}'.encode('ascii')))
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def live_stream(scope, receive, send):
+    """
+    Live Updates (server-sent events), as app.live_stream() but served by a
+    coroutine: the stream ends when the client disconnects.
+    """
+    try:
+        topics = events.parse_topics(_query_args(scope).get('topics'))
+    except ValueError as e:
+        await _send_json(scope, send, 400, {"status": "error", "message": str(e)}, None)
+        return
+
+    await send({'type': 'http.response.start', 'status': 200, 'headers': [
+        (b'content-type', b'text/event-stream; charset=utf-8'),
+        (b'cache-control', b'no-cache'),
+        (b'x-accel-buffering', b'no'),  # Do not let proxies buffer the stream
+        (b'access-control-allow-origin', b'*')
+    ]})
+
+    async def pump():
+        frames = events.stream_async(topics)
+        try:
+            async for frame in frames:
+                await send({'type': 'http.response.body', 'body': frame, 'more_body': True})
+        finally:
+            await frames.aclose()
+
+    async def watch_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    tasks = [asyncio.ensure_future(pump()), asyncio.ensure_future(watch_disconnect())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+    if tasks[0] in done:
+        tasks[0].result()  # Raise what stopped the stream
+
+
+def _environ(scope, body):
+    """WSGI environ of an ASGI HTTP request"""
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+        'SERVER_NAME': (scope.get('server') or ('localhost', 80))[0],
+        'SERVER_PORT': str((scope.get('server') or ('localhost', 80))[1]),
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        key = name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else f'HTTP_{name}'
+        value = value.decode('latin-1')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+async def _wsgi(scope, receive, send):
+    """
+    Serve a request with the Flask app on the WSGI thread pool, sending
+    each body chunk as it is produced (PEP 3333: headers go out with the
+    first non-empty chunk, so start_response may still replace them with
+    exc_info until then). A client disconnect stops the response at its
+    next chunk, and so does a client taking no chunk for SEND_TIMEOUT. An
+    error before the headers are sent is a 500 with the error JSON; after
+    that, the response is ended where it stopped.
+    """
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+
+    loop = asyncio.get_running_loop()
+    disconnected = threading.Event()
+
+    async def watch_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        disconnected.set()
+
+    def send_from_thread(message):
+        """Send message; False once the client is gone or stalled"""
+        if disconnected.is_set():
+            return False
+        future = asyncio.run_coroutine_threadsafe(send(message), loop)
+        try:
+            future.result(timeout=SEND_TIMEOUT)
+            return True
+        except FutureTimeoutError:
+            future.cancel()
+            print(f"⚠️ Client of {scope['path']} took no data for {SEND_TIMEOUT:g}s, response dropped")
+        except Exception as e:
+            print(f"⚠️ Could not send {scope['path']}: {e}")
+        disconnected.set()
+        return False
+
+    def run():
+        response = {'start': None, 'sent': False}
+
+        def send_body(chunk):
+            if not response['sent']:
+                response['sent'] = True
+                if not send_from_thread(response['start']):
+                    return False
+            return send_from_thread({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info is not None:
+                if response['sent']:
+                    raise exc_info[1].with_traceback(exc_info[2])
+            elif response['start'] is not None:
+                raise AssertionError("start_response called again without exc_info")
+            response['start'] = {
+                'type': 'http.response.start', 'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+            }
+            return lambda chunk: send_body(chunk) if chunk else None  # WSGI write()
+
+        chunks = None
+        try:
+            chunks = flask_app(_environ(scope, body), start_response)
+            for chunk in chunks:
+                if chunk and not send_body(chunk):
+                    return
+                if disconnected.is_set():
+                    return
+            if not response['sent']:
+                response['sent'] = True
+                if not send_from_thread(response['start']):
+                    return
+            send_from_thread({'type': 'http.response.body', 'body': b''})
+        except Exception as e:
+            print(f"❌ {scope['method']} {scope['path']} failed: {e!r}")
+            if not response['sent']:
+                response['sent'] = True
+                error = json.dumps({"status": "error", "message": "Internal server error"}).encode('utf-8')
+                if not send_from_thread({'type': 'http.response.start', 'status': 500, 'headers': [
+                        (b'content-type', b'application/json'),
+                        (b'content-length', str(len(error)).encode('ascii')),
+                        (b'access-control-allow-origin', b'*')]}):
+                    return
+                send_from_thread({'type': 'http.response.body', 'body': error})
+            else:
+                send_from_thread({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+
+    watcher = asyncio.ensure_future(watch_disconnect())
+    try:
+        await loop.run_in_executor(_wsgi_pool, run)
+    finally:
+        watcher.cancel()
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await close_clients()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI application: async upstream routes and event stream, the Flask app for the rest"""
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+    elif scope['type'] != 'http':
+        await send({'type': 'websocket.close'})
+    elif scope['method'] == 'GET' and scope['path'] in ROUTES:
+        await _respond(scope, send, ROUTES[scope['path']])
+    elif scope['method'] == 'GET' and scope['path'] == '/api/stream':
+        await live_stream(scope, receive, send)
+    else:
+        await _wsgi(scope, receive, send)
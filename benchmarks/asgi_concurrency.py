@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+ASGI concurrency benchmark, fully offline: app.py on gunicorn (two sync
+workers) and the opt-in ASGI entry point (uvicorn, one worker) are
+pointed at local Alpha Vantage, CoinGecko and Investing.com stubs, then
+driven with 2 to hundreds of concurrent clients on a route that waits on
+an upstream round trip for every request (/api/digital-bonds with its
+cache disabled).
+
+Sync workers hold one request each, so their latency grows with the
+number of clients; the ASGI worker must keep them all in flight: its p50
+latency has to stay within a few upstream round trips at every level and
+its throughput has to grow with the concurrency. Every route of app.py is
+also requested from both servers, which must answer with the same status
+and content type.
+
+Usage:
+    python3 benchmarks/asgi_concurrency.py [--concurrency 2,8,32,128,256]
+        [--duration 5] [--upstream-latency 0.5] [--wsgi-max-concurrency 32]
+"""
+
+import argparse
+import os
+import sys
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from endpoints import drive, free_port, start_server, start_stubs
+
+ROUTE = '/api/digital-bonds'
+
+# Every route of app.py, with the first bytes expected from /api/stream
+PARITY_ROUTES = ['/', '/health', '/metrics', '/api/market', '/api/market?symbols=LQD,MBB',
+                 '/api/market?symbols=NOPE', '/api/digital-bonds', '/api/economic-calendar',
+                 '/api/dashboard', '/api/bonds?per_page=5', '/api/bonds?sort=nope',
+                 '/api/bonds/charts', '/api/bonds/charts/country', '/api/bonds/analytics',
+                 '/api/bonds/spread-curves', '/api/bonds/search?q=cred', '/api/bonds/export?format=ndjson',
+                 '/api/history', '/api/missing']
+
+
+def parity(base_url):
+    """(status, content type) of every route, and the first bytes of /api/stream"""
+    answers = {}
+    for route in PARITY_ROUTES:
+        response = requests.get(base_url + route, timeout=30)
+        answers[route] = (response.status_code, response.headers.get('Content-Type'))
+    with requests.get(base_url + '/api/stream', stream=True, timeout=30) as response:
+        answers['/api/stream'] = (response.status_code, next(response.iter_content(chunk_size=None))[:6])
+    return answers
+
+
+def run_levels(args, server, levels):
+    """Start one server and drive ROUTE at each concurrency level"""
+    args.server, args.workers, args.threads = server
+    stubs = start_stubs(args)
+    process, base_url = start_server(args, stubs, free_port())
+    try:
+        answers = parity(base_url)
+        results = {}
+        for concurrency in levels:
+            result = results[concurrency] = drive(base_url, [ROUTE], concurrency, args.duration)
+            print(f"{args.server:<9} {concurrency:>6} {result['requests']:>9,} {result['rps']:>8,.1f} "
+                  f"{result['p50_ms']:>9} {result['p99_ms']:>9} {result['errors']:>7}")
+        return answers, results, stubs['COINGECKO_BASE_URL'][0].hits
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+        for stub, _ in stubs.values():
+            stub.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--concurrency', default='2,8,32,128,256', help='Comma-separated client counts')
+    parser.add_argument('--duration', type=float, default=5, help='Seconds per level')
+    parser.add_argument('--upstream-latency', type=float, default=0.5, help='Stub response delay (s)')
+    parser.add_argument('--wsgi-max-concurrency', type=int, default=32,
+                        help='Highest level run against the sync workers (they queue every client)')
+    parser.add_argument('--max-latency', type=float, default=3.0,
+                        help='ASGI p50 allowed, in upstream round trips')
+    parser.add_argument('--min-scaling', type=float, default=0.25,
+                        help='Share of the ideal throughput growth required from the ASGI worker')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    levels = [int(level) for level in args.concurrency.split(',')]
+
+    # Every request misses the cache and waits on CoinGecko
+    os.environ.update({
+        'DIGITAL_CACHE_TTL': '0',
+        'DIGITAL_CACHE_STALE_TTL': '0',
+        'COINGECKO_QUOTA_PER_MINUTE': '1000000',
+        'COINGECKO_QUOTA_BURST': '1000000',
+    })
+    args.upstream_jitter, args.failure_rate = 0.0, 0.0
+    args.cache_ttl, args.background_refresh = 0, False
+
+    print(f"{ROUTE}, upstream {args.upstream_latency * 1000:.0f}ms, {args.duration:g}s per level\n")
+    print(f"{'server':<9} {'in-flight':>6} {'requests':>9} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    wsgi_answers, _, _ = run_levels(args, ('gunicorn', 2, 1),
+                                    [level for level in levels if level <= args.wsgi_max_concurrency])
+    asgi_answers, results, upstream_hits = run_levels(args, ('uvicorn', 1, 1), levels)
+
+    ok = True
+    print()
+    for route, answer in asgi_answers.items():
+        if answer != wsgi_answers[route]:
+            ok = False
+            print(f"❌ {route}: {answer} from ASGI, {wsgi_answers[route]} from WSGI")
+    print(f"{'✅' if ok else '❌'} {len(asgi_answers)} routes answer the same on both entry points")
+
+    for concurrency, result in results.items():
+        within = (not result['errors'] and result['p50_ms'] is not None
+                  and result['p50_ms'] <= args.max_latency * args.upstream_latency * 1000)
+        ok &= within
+        print(f"{'✅' if within else '❌'} ASGI at {concurrency} in flight: p50 {result['p50_ms']}ms "
+              f"(budget {args.max_latency * args.upstream_latency * 1000:.0f}ms), {result['errors']} errors")
+
+    first, last = levels[0], levels[-1]
+    scaling = results[last]['rps'] / results[first]['rps'] if results[first]['rps'] else 0
+    required = args.min_scaling * last / first
+    ok &= scaling >= required
+    print(f"{'✅' if scaling >= required else '❌'} ASGI throughput x{scaling:.1f} from {first} to {last} "
+          f"in flight (required x{required:.1f}), {upstream_hits} CoinGecko calls")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Bond analytics benchmark: yield, price, modified duration, convexity and
+DV01 of every synthetic emission (1M by default) with api/bond_analytics,
+against a scalar reference discounting each bond's cash flows one by one.
+The vectorized pass must stay within the time budget and match the
+reference on a sample of bonds, including near-zero yields.
+
+Usage:
+    python3 benchmarks/bond_analytics.py [--size 1000000] [--repeat 5]
+        [--sample 2000] [--as-of 2026-01-15] [--budget 1.0]
+"""
+
+import argparse
+from datetime import date
+import bisect
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api.bond_analytics import (ANALYTICS_FIELDS, DAYS_PER_YEAR, MID_SWAP_CURVES, TENORS,
+                                bond_risk, compute_analytics)
+from bond_queries import synthetic_store
+
+RELATIVE_TOLERANCE = 1e-9
+
+
+def scalar_curve(currency, years):
+    rates = MID_SWAP_CURVES.get(currency, MID_SWAP_CURVES['EUR'])
+    if years <= TENORS[0]:
+        return rates[0] / 100
+    if years >= TENORS[-1]:
+        return rates[-1] / 100
+    k = bisect.bisect_right(TENORS, years) - 1
+    weight = (years - TENORS[k]) / (TENORS[k + 1] - TENORS[k])
+    return (rates[k] * (1 - weight) + rates[k + 1] * weight) / 100
+
+
+def scalar_risk(coupon, y, years):
+    """Reference: discount every annual cash flow, then take the sums"""
+    periods = math.ceil(years)
+    first = years - (periods - 1)
+    pv = pv_t = pv_t2 = 0.0
+    for j in range(periods):
+        t = first + j
+        cash_flow = coupon + (100 if j == periods - 1 else 0)
+        discounted = cash_flow / (1 + y) ** t
+        pv += discounted
+        pv_t += t * discounted
+        pv_t2 += t * t * discounted
+    duration = pv_t / (1 + y) / pv
+    return {
+        'yield': y * 100,
+        'price': pv - coupon * (1 - first),
+        'modifiedDuration': duration,
+        'convexity': (pv_t2 + pv_t) / (1 + y) ** 2 / pv,
+        'dv01': duration * pv * 1e-4
+    }
+
+
+def scalar_bond(store, row, as_of):
+    record = store.record(row)
+    years = (date.fromisoformat(record['maturity']) - as_of).days / DAYS_PER_YEAR
+    y = scalar_curve(record['currency'], years) + record['spread'] / 10_000
+    return scalar_risk(record['coupon'], y, years)
+
+
+def max_error(expected, actual):
+    return max(abs(actual[field] - expected[field]) / max(abs(expected[field]), 1e-12)
+               for field in ANALYTICS_FIELDS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--sample', type=int, default=2000, help='Bonds checked against the scalar reference')
+    parser.add_argument('--as-of', default='2026-01-15')
+    parser.add_argument('--budget', type=float, default=1.0, help='Seconds allowed for the vectorized pass')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    as_of = date.fromisoformat(args.as_of)
+
+    store = synthetic_store(args.size, args.seed)
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        analytics = compute_analytics(store, as_of)
+        timings.append(time.perf_counter() - started)
+    live = len(analytics['rows'])
+    best, median = min(timings), float(np.median(timings))
+    print(f"{store.size:,} emissions ({live:,} alive at {as_of}): "
+          f"vectorized best {best * 1000:.0f}ms, median {median * 1000:.0f}ms")
+
+    # The pricing pass alone over every emission, as if all were alive
+    rng = np.random.default_rng(args.seed)
+    years = rng.uniform(0.05, 30, store.size)
+    yields = rng.uniform(0.01, 0.06, store.size)
+    started = time.perf_counter()
+    bond_risk(store.numbers['coupon'], yields, years)
+    full_pass = time.perf_counter() - started
+    print(f"Pricing pass over all {store.size:,} emissions (0-30y): {full_pass * 1000:.0f}ms")
+
+    sample = rng.choice(live, size=min(args.sample, live), replace=False)
+    started = time.perf_counter()
+    expected = [scalar_bond(store, int(analytics['rows'][i]), as_of) for i in sample]
+    scalar_seconds = (time.perf_counter() - started) / len(sample) * live
+    error = max(max_error(e, {field: float(analytics[field][i]) for field in ANALYTICS_FIELDS})
+                for e, i in zip(expected, sample))
+    print(f"Scalar reference: {scalar_seconds:.1f}s extrapolated to {live:,} bonds "
+          f"({scalar_seconds / median:.0f}x slower)")
+
+    # Yields around zero take the period-by-period path
+    years = rng.uniform(0.05, 30, 1000)
+    coupons = rng.uniform(0, 5, 1000)
+    yields = rng.uniform(-0.01, 0.01, 1000)
+    low = bond_risk(coupons, yields, years)
+    low['yield'] = yields * 100
+    low_error = max(max_error(scalar_risk(c, y, t), {field: float(low[field][k]) for field in ANALYTICS_FIELDS})
+                    for k, (c, y, t) in enumerate(zip(coupons, yields, years)))
+
+    ok = (median < args.budget and full_pass < args.budget
+          and error < RELATIVE_TOLERANCE and low_error < RELATIVE_TOLERANCE)
+    print(f"Max relative error vs reference: {error:.1e} ({len(sample):,} bonds), "
+          f"{low_error:.1e} (1,000 near-zero yields)")
+    print(f"{'✅' if ok else '❌'} analytics {'passed' if ok else 'failed'} (budget {args.budget:.1f}s)")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Chart aggregation benchmark: vectorized group-bys of api/bond_charts vs a
+per-emission Python loop mirroring the traditional-app.js renderers, at
+10k, 100k and 1M synthetic emissions. Results are checked for equality
+wherever the loop baseline runs.
+
+Usage:
+    python3 benchmarks/bond_charts.py [--sizes 10000,100000,1000000] [--baseline-max 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api.bond_charts import aggregate, EUR_RATES
+from bond_queries import synthetic_store
+
+FILTERS = [
+    ('no filter', {}),
+    ('country=Germany', {'country': 'Germany'}),
+    ('status=Active + EUR', {'status': 'Active', 'currency': 'EUR'}),
+]
+
+
+def loop_charts(records):
+    """Per-record reference implementation of the six charts"""
+    timeline, countries, maturities = Counter(), Counter(), Counter()
+    issuers = defaultdict(float)
+    spreads = [0, 0, 0, 0]
+    green = 0
+    for e in records:
+        timeline[int(e['issueDate'][:4])] += 1
+        maturities[int(e['maturity'][:4])] += 1
+        countries[e['country']] += 1
+        issuers[e['issuer']] += e['amount'] * EUR_RATES.get(e['currency'], 1)
+        green += e['greenBond']
+        s = e['spread']
+        spreads[0 if s < 40 else 1 if s < 50 else 2 if s < 60 else 3] += 1
+    top = sorted(issuers.items(), key=lambda kv: -kv[1])[:5]
+    return {
+        'timeline': sorted(timeline.items()),
+        'maturity-wall': sorted(maturities.items()),
+        'country': sorted(countries.items()),
+        'top-issuers': [(name, round(volume)) for name, volume in top],
+        'green-bonds': [green, len(records) - green],
+        'spread': spreads,
+    }
+
+
+def comparable(charts):
+    """Reshape vectorized output to the reference's structure"""
+    pairs = lambda c: list(zip(c['labels'], c['data']))
+    return {
+        'timeline': pairs(charts['timeline']),
+        'maturity-wall': pairs(charts['maturity-wall']),
+        'country': sorted(pairs(charts['country'])),
+        'top-issuers': pairs(charts['top-issuers']),
+        'green-bonds': charts['green-bonds']['data'],
+        'spread': charts['spread']['data'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--baseline-max', type=int, default=100_000,
+                        help='Largest size for which the Python loop baseline runs')
+    args = parser.parse_args()
+
+    print(f"{'emissions':>10} {'filter':<22} {'matches':>9} {'vectorized ms':>14} {'loop ms':>9} {'speedup':>8}")
+    for size in [int(n) for n in args.sizes.split(',')]:
+        store = synthetic_store(size)
+        for label, filters in FILTERS:
+            store._matches.clear()
+            started = time.perf_counter()
+            charts = aggregate(store, filters)
+            vectorized = time.perf_counter() - started
+
+            loop_ms = speedup = '-'
+            if size <= args.baseline_max:
+                records = [store.record(i) for i in store.matching_rows(filters)]
+                started = time.perf_counter()
+                expected = loop_charts(records)
+                loop = time.perf_counter() - started
+                if comparable(charts) != expected:
+                    print(f"❌ Aggregations differ at {size} emissions ({label})")
+                    sys.exit(1)
+                loop_ms, speedup = f"{loop * 1000:.1f}", f"{loop / vectorized:.0f}x"
+
+            print(f"{size:>10,} {label:<22} {charts['metrics']['emissions']:>9,} "
+                  f"{vectorized * 1000:>14.2f} {loop_ms:>9} {speedup:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Export memory check: 1M synthetic emissions are exported as CSV and NDJSON
+through /api/bonds/export over HTTP (Werkzeug server in this process).
+The response must be chunked, hold every row, and match the /api/bonds
+records, while the process RSS, sampled during the download, stays within
+a fixed budget above its level before the export, far below the size of
+the exported file.
+
+Usage:
+    python3 benchmarks/bond_export.py [--size 1000000] [--rss-budget-mb 64]
+"""
+
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ['UPSTREAM_CACHE_DIR'] = tempfile.mkdtemp(prefix='bond-export-')
+os.environ['BACKGROUND_REFRESH'] = '0'
+
+import requests
+from werkzeug.serving import make_server
+
+from app import app
+import api.bond_store as bond_store
+from bond_queries import synthetic_store
+
+# Rows compared with the /api/bonds records
+CHECKED_ROWS = 1000
+
+
+def rss_mb():
+    with open('/proc/self/status', 'r', encoding='ascii') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class RssSampler(threading.Thread):
+    """Highest RSS seen while running, sampled every few milliseconds"""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = rss_mb()
+        self.running = True
+
+    def run(self):
+        while self.running:
+            self.peak = max(self.peak, rss_mb())
+            time.sleep(0.005)
+
+    def stop(self):
+        self.running = False
+        self.join()
+        return self.peak
+
+
+def download(url, on_line):
+    """Stream url line by line; return (Transfer-Encoding, bytes, lines, seconds)"""
+    started = time.perf_counter()
+    size = lines = 0
+    with requests.get(url, stream=True, timeout=60) as response:
+        response.raise_for_status()
+        pending = b''
+        for chunk in response.iter_content(chunk_size=1 << 16):
+            size += len(chunk)
+            pending += chunk
+            *complete, pending = pending.split(b'\n')
+            for line in complete:
+                on_line(lines, line)
+                lines += 1
+        encoding = response.headers.get('Transfer-Encoding')
+    return encoding, size, lines, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size', type=int, default=1_000_000)
+    parser.add_argument('--rss-budget-mb', type=float, default=64)
+    args = parser.parse_args()
+
+    store = synthetic_store(args.size)
+    bond_store._store = store
+    expected = [store.record(i) for i in range(CHECKED_ROWS)]
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/api/bonds/export"
+
+    def check_csv(n, line):
+        if 1 <= n <= CHECKED_ROWS:
+            cells = next(csv.reader(io.StringIO(line.decode('utf-8'))))
+            record = expected[n - 1]
+            wanted = [record[f] for f in ('issuer', 'amount', 'currency', 'country', 'type', 'issueDate',
+                                          'maturity', 'coupon', 'spread', 'rating', 'isin', 'status')]
+            mismatches.append(cells != [str(value) for value in wanted])
+
+    def check_ndjson(n, line):
+        if n < CHECKED_ROWS:
+            mismatches.append(json.loads(line) != expected[n])
+
+    ok = True
+    try:
+        for output, check, header_lines in (('csv', check_csv, 1), ('ndjson', check_ndjson, 0)):
+            mismatches = []
+            before = rss_mb()
+            sampler = RssSampler()
+            sampler.start()
+            encoding, size, lines, seconds = download(f"{base_url}?format={output}", check)
+            growth = sampler.stop() - before
+            passed = (encoding == 'chunked' and lines == store.size + header_lines
+                      and len(mismatches) == CHECKED_ROWS and not any(mismatches)
+                      and growth < args.rss_budget_mb)
+            ok &= passed
+            print(f"{'✅' if passed else '❌'} {output:<6} {lines:,} lines, {size / 2**20:,.0f} MB in {seconds:.1f}s "
+                  f"({size / 2**20 / seconds:.0f} MB/s, {encoding}), RSS +{growth:.1f} MB "
+                  f"(budget {args.rss_budget_mb:.0f} MB), {sum(mismatches)} mismatching rows")
+
+        # A selective filter scans the same chunks but sends few rows
+        started = time.perf_counter()
+        response = requests.get(f"{base_url}?format=ndjson&country=Germany&status=Active", timeout=60)
+        matches = len(store.matching_rows({'country': 'Germany', 'status': 'Active'}))
+        filtered = response.text.count('\n') == matches
+        ok &= filtered
+        print(f"{'✅' if filtered else '❌'} filtered export: {matches:,} rows in {time.perf_counter() - started:.1f}s")
+    finally:
+        server.shutdown()
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+/api/bonds query benchmark: filter, sort and page latency of the indexed
+bond store on a synthetic universe resampled from the real emissions.
+
+Usage:
+    python3 benchmarks/bond_queries.py [--size 1000000] [--repeat 200]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from api.bond_store import BondStore, BONDS_DATA_FILE, CATEGORICAL_FIELDS
+
+QUERIES = [
+    ('first page, file order', {}, None, False, 1),
+    ('first page, sorted by coupon desc', {}, 'coupon', True, 1),
+    ('page 500, sorted by issuer', {}, 'issuer', False, 500),
+    ('country=Germany, sorted by spread', {'country': 'Germany'}, 'spread', False, 1),
+    ('status=Active, sorted by maturity', {'status': 'Active'}, 'maturity', False, 1),
+    ('issuer+year, sorted by coupon', {'issuer': 'Berlin Hyp', 'issueYear': '2021'}, 'coupon', False, 1),
+    ('country+currency+green, sorted by amount', {'country': 'France', 'currency': 'EUR', 'greenBond': 'true'}, 'amount', True, 2),
+    ('rating+status, file order', {'rating': 'Aaa/AAA', 'status': 'Mature'}, None, False, 3),
+]
+
+
+def synthetic_store(size, seed=42):
+    """Resample the real emissions column by column up to size rows"""
+    base = BondStore.from_json(BONDS_DATA_FILE)
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, base.size, size)
+    return BondStore(
+        size,
+        {field: list(base.categories[field]) for field in CATEGORICAL_FIELDS},
+        {field: base.codes[field][rows] for field in CATEGORICAL_FIELDS},
+        {field: values[rows] for field, values in base.numbers.items()},
+        {field: values[rows] + rng.integers(-180, 180, size).astype(np.int32)
+         for field, values in base.dates.items()},
+        np.char.add('XS', np.char.zfill(np.arange(size).astype(str), 10))
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    store = synthetic_store(args.size)
+    print(f"Built store of {store.size:,} emissions in {time.perf_counter() - started:.2f}s")
+
+    # Build the sorted orders up front, as a warm server would have them
+    started = time.perf_counter()
+    for _, _, sort, descending, _ in QUERIES:
+        if sort:
+            store._sorted(sort, descending)
+    print(f"Built sort indexes in {time.perf_counter() - started:.2f}s\n")
+
+    print(f"{'query':<44} {'matches':>9} {'first ms':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for label, filters, sort, descending, page in QUERIES:
+        store._matches.clear()
+        started = time.perf_counter()
+        result = store.query(filters, sort, descending, page, 20)
+        first = time.perf_counter() - started
+
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            store.query(filters, sort, descending, page, 20)
+            timings.append(time.perf_counter() - started)
+        p50, p99 = np.percentile(timings, [50, 99]) * 1000
+        print(f"{label:<44} {result['total']:>9,} {first * 1000:>9.2f} {p50:>8.3f} {p99:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Search benchmark: typeahead queries (single letters, accented and
+unaccented names, word starts, ISIN prefixes, full ISINs, misses) against
+api/bond_search over 1M synthetic emissions. Every query's p99 must stay
+under the latency budget, and results must equal a linear scan over all
+records folded the same way.
+
+Usage:
+    python3 benchmarks/bond_search.py [--size 1000000] [--repeat 500] [--budget-ms 1.0]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api.bond_search import EXACT, PREFIX, SEARCH_FIELDS, WORD_PREFIX, SearchIndex, fold
+from bond_queries import synthetic_store
+
+QUERIES = ['c', 'cr', 'Crédit', 'credit fon', 'munch', 'MÜNCHENER', 'cedulas', 'cédulas hipo',
+           'foncier', 'pfandbrief', 'hyp', 'XS', 'XS00001', 'XS0000123456', 'xs0000999999', 'zzz']
+
+
+def linear_search(store, query, limit):
+    """Reference: fold every name and ISIN and test it, as the browser scan would"""
+    folded = fold(query)
+    ranked, totals = [], {field: 0 for field in SEARCH_FIELDS}
+    for field in ('issuer', 'type'):
+        counts = np.bincount(store.codes[field], minlength=len(store.categories[field]))
+        for code, value in enumerate(store.categories[field]):
+            name = fold(value)
+            words = name.split(' ')
+            if name == folded:
+                rank = EXACT
+            elif name.startswith(folded):
+                rank = PREFIX
+            elif any(' '.join(words[i:]).startswith(folded) for i in range(1, len(words))):
+                rank = WORD_PREFIX
+            else:
+                continue
+            totals[field] += 1
+            ranked.append((rank, SEARCH_FIELDS.index(field), -int(counts[code]), value))
+    ranked.sort()
+
+    prefix = folded.replace(' ', '').upper()
+    isins = sorted(
+        (str(isin), i) for i, isin in enumerate(store.isin.tolist()) if str(isin).startswith(prefix)
+    )
+    totals['isin'] = len(isins)
+    isin_rank = EXACT if len(isins) == 1 and isins[0][0] == prefix else PREFIX
+    position = sum(1 for r in ranked[:limit] if r[0] <= isin_rank)
+    names = [(SEARCH_FIELDS[f], value) for _, f, _, value in ranked[:limit]]
+    results = names[:position] + [('isin', isin) for isin, _ in isins[:limit]] + names[position:]
+    return results[:limit], totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=500)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--budget-ms', type=float, default=1.0, help='p99 latency allowed per query')
+    args = parser.parse_args()
+
+    store = synthetic_store(args.size)
+    started = time.perf_counter()
+    index = SearchIndex(store)
+    print(f"Indexed {store.size:,} emissions in {time.perf_counter() - started:.2f}s\n")
+
+    ok = True
+    print(f"{'query':<16} {'names':>6} {'isins':>9} {'p50 µs':>8} {'p99 µs':>8} {'scan ms':>9}  match")
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            result = index.search(query, args.limit)
+            timings.append(time.perf_counter() - t0)
+        p50, p99 = np.percentile(timings, [50, 99]) * 1e6
+
+        t0 = time.perf_counter()
+        expected, totals = linear_search(store, query, args.limit)
+        scan = time.perf_counter() - t0
+        got = [(r['field'], r['value']) for r in result['results']]
+        match = got == expected and result['total'] == totals
+        ok &= match and p99 < args.budget_ms * 1000
+        print(f"{query:<16} {totals['issuer'] + totals['type']:>6} {totals['isin']:>9,} "
+              f"{p50:>8.1f} {p99:>8.1f} {scan * 1000:>9.0f}  {'✅' if match else '❌'}")
+
+    print(f"\n{'✅' if ok else '❌'} search {'passed' if ok else 'failed'} "
+          f"(p99 budget {args.budget_ms:.1f}ms, top {args.limit})")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Bond store cold-load benchmark: JSON parse + index build vs mapping a
+binary snapshot, each in a fresh interpreter as a new worker would do.
+Reports load time, time to the first query, RSS growth and the private
+(non-shareable) part of it, and fails if both paths answer differently.
+
+Usage:
+    python3 benchmarks/bond_snapshot.py [--sizes 462,100000,1000000]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api.bond_store import BondStore, BONDS_DATA_FILE
+from bond_queries import synthetic_store
+
+# Run in a child process: load one file, touch it with a query, report
+WORKER = r'''
+import hashlib, json, sys, time
+sys.path.insert(0, sys.argv[1])
+from api.bond_store import BondStore
+
+def memory():
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return fields['Rss'], fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+
+rss_before, private_before = memory()
+started = time.perf_counter()
+path = sys.argv[2]
+store = BondStore.from_snapshot(path) if path.endswith('.snapshot') else BondStore.from_json(path)
+loaded = time.perf_counter()
+page = store.query({'country': 'Germany', 'status': 'Active'}, 'coupon', True, 1, 50)
+queried = time.perf_counter()
+rss_after, private_after = memory()
+
+print(json.dumps({
+    'load_ms': (loaded - started) * 1000,
+    'first_query_ms': (queried - loaded) * 1000,
+    'rss_mb': (rss_after - rss_before) / 1024,
+    'private_mb': (private_after - private_before) / 1024,
+    'digest': hashlib.sha1(json.dumps(page, sort_keys=True).encode()).hexdigest()
+}))
+'''
+
+
+def measure(path):
+    output = subprocess.run([sys.executable, '-c', WORKER, ROOT, path],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def prepare(size, directory):
+    """JSON file and snapshot of size emissions (the real file for its own size)"""
+    json_path = os.path.join(directory, f'bonds-{size}.json')
+    snapshot_path = os.path.join(directory, f'bonds-{size}.snapshot')
+    store = BondStore.from_json(BONDS_DATA_FILE)
+    if size != store.size:
+        store = synthetic_store(size)
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump([store.record(i) for i in range(store.size)], f, ensure_ascii=False)
+    store.to_snapshot(snapshot_path)
+    return json_path, snapshot_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', default='462,100000,1000000')
+    args = parser.parse_args()
+
+    print(f"{'emissions':>10} {'format':<9} {'file MB':>8} {'load ms':>9} "
+          f"{'1st query ms':>13} {'RSS MB':>8} {'private MB':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in [int(n) for n in args.sizes.split(',')]:
+            digests = set()
+            for path in prepare(size, tmp):
+                result = measure(path)
+                digests.add(result['digest'])
+                label = 'snapshot' if path.endswith('.snapshot') else 'json'
+                print(f"{size:>10,} {label:<9} {os.path.getsize(path) / 2**20:>8.1f} "
+                      f"{result['load_ms']:>9.1f} {result['first_query_ms']:>13.2f} "
+                      f"{result['rss_mb']:>8.1f} {result['private_mb']:>11.1f}")
+                os.remove(path)
+            if len(digests) != 1:
+                print(f"❌ JSON and snapshot stores answer differently at {size} emissions")
+                sys.exit(1)
+
+    print("✅ Snapshot and JSON stores return the same results")
+
+
+if __name__ == '__main__':
+    main()
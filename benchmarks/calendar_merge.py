@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Economic calendar scrape check: a multi-day range is fetched in parallel
+day chunks from a stubbed filtered-data service (wall time must stay close
+to ceil(days / concurrency) upstream latencies, not days of them), then an
+intraday refresh must call the service once, for today only, and merge a
+changed actual and a removed event without touching the other events.
+
+Usage:
+    python3 benchmarks/calendar_merge.py [--days 7] [--concurrency 3]
+        [--upstream-latency 0.3]
+"""
+
+import argparse
+from datetime import datetime
+import math
+import os
+import re
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--concurrency', type=int, default=3)
+    parser.add_argument('--upstream-latency', type=float, default=0.3)
+    args = parser.parse_args()
+
+    os.environ['UPSTREAM_CACHE_DIR'] = tempfile.mkdtemp(prefix='calendar-merge-')
+    os.environ['CALENDAR_DAYS'] = str(args.days)
+    os.environ['CALENDAR_CHUNK_DAYS'] = '1'
+    os.environ['CALENDAR_CONCURRENCY'] = str(args.concurrency)
+
+    from stub_upstream import StubUpstream, calendar_service, load_fixture
+    import api.economic_calendar as economic_calendar
+
+    page = load_fixture('investing_calendar.html').decode('utf-8')
+    stub = StubUpstream(calendar_service(page), delay=args.upstream_latency)
+    economic_calendar.CALENDAR_SERVICE_URL = stub.start()
+    ok = True
+    try:
+        started = time.perf_counter()
+        full = economic_calendar.get_economic_calendar_data()
+        elapsed = time.perf_counter() - started
+        days = sorted({event['datetime'][:10] for event in full['data']})
+        budget = (math.ceil(args.days / args.concurrency) + 1) * args.upstream_latency
+        serial = args.days * args.upstream_latency
+        ok &= stub.hits == args.days and len(days) == args.days and elapsed < budget
+        print(f"{'✅' if ok else '❌'} full scrape: {full['count']} events over {len(days)} days, "
+              f"{stub.hits} upstream calls in {elapsed:.2f}s (serial would take {serial:.1f}s, budget {budget:.2f}s)")
+
+        ids = [event['id'] for event in full['data']]
+        unique = len(set(ids)) == len(ids)
+        ok &= unique
+        print(f"{'✅' if unique else '❌'} event ids unique ({len(ids)})")
+
+        # Upstream: one actual published and one event withdrawn today
+        prefix = str(datetime.now().date().toordinal())
+        with_actual = set(re.findall(r'id="eventActual_(\d+)"', page))
+        todays = [event['id'][len(prefix):] for event in full['data'] if event['id'].startswith(prefix)]
+        changed_row = next(row for row in todays if row in with_actual)
+        withdrawn_row = todays[-1]
+        changed, withdrawn = prefix + changed_row, prefix + withdrawn_row
+        updated_page = re.sub(rf'<tr[^>]*id="eventRowId_{withdrawn_row}".*?</tr>', '', page, flags=re.S)
+        updated_page = re.sub(rf'(id="eventActual_{changed_row}">)[^<]*', r'\g<1>9.9%', updated_page)
+        stub.body = calendar_service(updated_page)
+
+        hits_before = stub.hits
+        before = {event['id']: event for event in economic_calendar.indexed_events()}
+        started = time.perf_counter()
+        economic_calendar.refresh_economic_calendar()
+        elapsed = time.perf_counter() - started
+        after = {event['id']: event for event in economic_calendar.get_economic_calendar_data()['data']}
+
+        modified = [i for i in after if i in before and after[i] != before[i]]
+        intraday_ok = (
+            stub.hits - hits_before == 1
+            and after[changed]['actual'] == '9.9%'
+            and withdrawn not in after
+            and modified == [changed]
+            and len(after) == len(before) - 1
+        )
+        ok &= intraday_ok
+        print(f"{'✅' if intraday_ok else '❌'} intraday refresh: {stub.hits - hits_before} upstream call in "
+              f"{elapsed:.2f}s, {len(modified)} event updated, {len(before) - len(after)} removed, "
+              f"{len(after)} kept")
+    finally:
+        stub.stop()
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
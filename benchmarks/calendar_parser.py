@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Economic calendar parser benchmark: BeautifulSoup (html.parser) vs the
+lxml fast path, on the saved Investing.com fixture scaled to 50-10,000 rows.
+Both parsers must return identical events before any timing is reported,
+and must date rows without data-event-datetime from their day-header row.
+
+Usage:
+    python3 benchmarks/calendar_parser.py [--rows 50,500,2000,10000] [--repeat 5]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from api.economic_calendar import parse_calendar_html
+
+FIXTURE = os.path.join(ROOT, 'benchmarks', 'fixtures', 'investing_calendar.html')
+TODAY = date(2026, 1, 12)
+
+
+def scale_page(page, n_rows):
+    """Return the fixture page with its event rows repeated up to n_rows"""
+    start = page.index('<tbody')
+    start = page.index('>', start) + 1
+    end = page.index('</tbody>', start)
+    rows = re.findall(r'<tr[^>]*class="js-event-item".*?</tr>', page[start:end], re.DOTALL)
+    scaled = (rows * (n_rows // len(rows) + 1))[:n_rows]
+    return page[:start] + '\n'.join(scaled) + page[end:]
+
+
+def best_time(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', default='50,500,2000,10000')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with open(FIXTURE, 'r', encoding='utf-8') as f:
+        fixture = f.read()
+
+    dated = parse_calendar_html(fixture, TODAY, limit=None, parser='lxml')
+    undated = re.sub(r' data-event-datetime="[^"]*"', '', fixture)
+    for name in ('html.parser', 'lxml'):
+        events = parse_calendar_html(undated, date(2000, 1, 1), limit=None, parser=name)
+        if [e['datetime'] for e in events] != [e['datetime'] for e in dated]:
+            print(f"❌ {name} does not date rows from their day header")
+            sys.exit(1)
+    print(f"✅ Rows without data-event-datetime dated from their day header "
+          f"({len({e['datetime'][:10] for e in dated})} days)\n")
+
+    print(f"{'rows':>8} {'page KB':>9} {'html.parser ms':>15} {'lxml ms':>10} {'speedup':>8}")
+    for n_rows in [int(n) for n in args.rows.split(',')]:
+        page = scale_page(fixture, n_rows).encode('utf-8')
+
+        soup_events = parse_calendar_html(page, TODAY, limit=None, parser='html.parser')
+        lxml_events = parse_calendar_html(page, TODAY, limit=None, parser='lxml')
+        if soup_events != lxml_events or len(lxml_events) != n_rows:
+            print(f"❌ Parsers disagree on {n_rows} rows")
+            sys.exit(1)
+
+        soup_time = best_time(lambda: parse_calendar_html(page, TODAY, None, 'html.parser'), args.repeat)
+        lxml_time = best_time(lambda: parse_calendar_html(page, TODAY, None, 'lxml'), args.repeat)
+        print(f"{n_rows:>8} {len(page) / 1024:>9.0f} {soup_time * 1000:>15.1f} "
+              f"{lxml_time * 1000:>10.1f} {soup_time / lxml_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
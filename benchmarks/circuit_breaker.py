@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Circuit breaker check: with every provider down, only the first calls may
+wait on the upstream; once a breaker opens, requests must get their fallback
+data in well under a millisecond, and a single probe must close the breaker
+again after the provider recovers. A cancelled half-open probe must give
+its slot back, so the next call probes again.
+
+Usage:
+    python3 benchmarks/circuit_breaker.py [--calls 200] [--upstream-latency 0.3]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Cold, isolated cache (so every request has to go upstream) and short
+# open periods so recovery is checked within a couple of seconds
+os.environ['UPSTREAM_CACHE_DIR'] = tempfile.mkdtemp(prefix='circuit-breaker-')
+os.environ['METRICS_DIR'] = tempfile.mkdtemp(prefix='circuit-breaker-metrics-')
+os.environ['BACKGROUND_REFRESH'] = '0'
+os.environ.setdefault('CIRCUIT_OPEN_SECONDS', '1')
+os.environ.setdefault('MARKET_QUOTA_PER_MINUTE', '600')
+os.environ.setdefault('COINGECKO_QUOTA_PER_MINUTE', '600')
+
+from stub_upstream import StubUpstream, load_fixture
+from app import app
+import api.market as market
+import api.digital_bonds as digital_bonds
+import api.economic_calendar as economic_calendar
+from api.circuit_breaker import MIN_CALLS, OPEN_SECONDS, CircuitBreaker, get_breaker
+
+# Open-state requests must be answered faster than this (median, seconds)
+FAIL_FAST_BUDGET = 0.001
+
+
+def calendar_source():
+    events = economic_calendar.scrape_investing_calendar()
+    return 'Investing.com' if len(events) > 5 else 'Fallback Data'
+
+
+# name -> (breaker, fixture, content type, module attribute, request, payload source when up)
+PROVIDERS = {
+    'market': ('alpha-vantage', 'alpha_vantage_global_quote.json', 'application/json',
+               (market, 'ALPHA_VANTAGE_BASE_URL'),
+               lambda: market.get_covered_bond_market_data()['data_source'], 'Alpha Vantage'),
+    'digital-bonds': ('coingecko', 'coingecko_simple_price.json', 'application/json',
+                      (digital_bonds, 'COINGECKO_BASE_URL'),
+                      lambda: digital_bonds.get_digital_assets_data()['source'], 'CoinGecko'),
+    'economic-calendar': ('investing', 'investing_calendar.html', 'text/html',
+                          (economic_calendar, 'INVESTING_CALENDAR_URL'),
+                          calendar_source, 'Investing.com'),
+}
+
+
+def timed(request):
+    started = time.perf_counter()
+    source = request()
+    return time.perf_counter() - started, source
+
+
+def check(name, calls, latency):
+    breaker_name, fixture, content_type, (module, attribute), request, live_source = PROVIDERS[name]
+    breaker = get_breaker(breaker_name)
+    stub = StubUpstream(load_fixture(fixture), content_type, delay=latency, failure_rate=1.0)
+    setattr(module, attribute, stub.start())
+
+    try:
+        # Provider down: the first calls time out or fail, then the breaker opens
+        latencies = [timed(request)[0] for _ in range(calls)]
+        hits_while_down = stub.hits
+        slow, fast = latencies[:MIN_CALLS], latencies[MIN_CALLS:]
+        fast_median = statistics.median(fast)
+        opened = breaker.state == 'open'
+
+        # Provider back: after the open period one probe closes the breaker
+        stub.failure_rate = 0.0
+        time.sleep(OPEN_SECONDS + 0.1)
+        _, source = timed(request)
+        recovered = breaker.state == 'closed' and source == live_source
+    finally:
+        stub.stop()
+
+    ok = opened and recovered and fast_median < FAIL_FAST_BUDGET
+    print(f"{'✅' if ok else '❌'} {name:<18} first {len(slow)} calls {statistics.median(slow) * 1000:8.1f}ms, "
+          f"open {fast_median * 1e6:7.1f}µs median ({len(fast)} calls), "
+          f"{hits_while_down} upstream hit(s), recovered: {recovered}")
+    return ok
+
+
+def check_cancelled_probe():
+    """A half-open probe cancelled mid-call must not keep the breaker rejecting"""
+    breaker = CircuitBreaker('cancelled-probe')
+    for _ in range(MIN_CALLS):
+        breaker.allow()
+        breaker.record(False, 'down')
+    time.sleep(OPEN_SECONDS + 0.1)
+
+    async def hang():
+        await asyncio.sleep(60)
+
+    async def ok():
+        return 'up'
+
+    async def probe():
+        try:
+            await asyncio.wait_for(breaker.call_async(hang), 0.05)
+        except asyncio.TimeoutError:
+            pass
+        return await breaker.call_async(ok)
+
+    try:
+        result = asyncio.run(probe())
+    except Exception as e:
+        result = repr(e)
+    passed = result == 'up' and breaker.state == 'closed'
+    print(f"{'✅' if passed else '❌'} cancelled probe released: next call {result}, breaker {breaker.state}")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--calls', type=int, default=200, help='Requests per provider while it is down')
+    parser.add_argument('--upstream-latency', type=float, default=0.3, help='Stub response delay (s)')
+    args = parser.parse_args()
+
+    results = [check(name, args.calls, args.upstream_latency) for name in PROVIDERS]
+    results.append(check_cancelled_probe())
+
+    health = app.test_client().get('/health').get_json()
+    states = {name: stats['state'] for name, stats in health['circuit_breakers'].items()}
+    print(f"/health circuit_breakers: {states}")
+
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tokenized asset universe benchmark: the digital bonds feed is built for
+universes of 10 to 1,000 synthetic assets against a CoinGecko stub that
+answers for the ids it is asked about. Every call must stay under the URL
+length limit, every asset must come back exactly once, and fetch time must
+grow with the number of concurrent batch rounds, not with the asset count.
+When one batch fails, the feed must keep the assets of the other batches
+and list the missing ones, without counting a CoinGecko failure.
+
+Usage:
+    python3 benchmarks/digital_universe.py [--sizes 10,100,1000] [--upstream-latency 0.2]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from urllib.parse import parse_qs, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ['UPSTREAM_CACHE_DIR'] = tempfile.mkdtemp(prefix='digital-universe-')
+os.environ['METRICS_DIR'] = tempfile.mkdtemp(prefix='digital-universe-metrics-')
+os.environ['TIMESERIES_DB'] = os.path.join(tempfile.mkdtemp(prefix='digital-universe-history-'), 'ticks.sqlite')
+os.environ.setdefault('COINGECKO_QUOTA_PER_MINUTE', '6000')
+os.environ.setdefault('COINGECKO_QUOTA_BURST', '1000')
+
+from stub_upstream import StubUpstream
+import api.digital_bonds as digital_bonds
+from api.circuit_breaker import get_breaker
+
+TYPES = ['Tokenized Bond', 'Tokenized Treasury', 'Money Market Fund', 'Private Credit', 'Commodity-Backed']
+
+
+def synthetic_assets(count):
+    return [
+        {
+            'id': f'tokenized-asset-{n:04d}-{TYPES[n % len(TYPES)].lower().replace(" ", "-")}',
+            'ticker': f'RWA{n:04d}',
+            'type': TYPES[n % len(TYPES)],
+            'currency': 'EUR' if n % 4 == 0 else 'USD',
+            'yield': f'{3 + (n % 30) / 10:.2f}%',
+            'decimals': 4
+        }
+        for n in range(count)
+    ]
+
+
+def coingecko_prices(path, data=None):
+    """/simple/price answer for the ids and currencies in the request"""
+    query = parse_qs(urlsplit(path).query)
+    currencies = query['vs_currencies'][0].split(',')
+    prices = {}
+    for n, asset_id in enumerate(query['ids'][0].split(',')):
+        prices[asset_id] = {}
+        for currency in currencies:
+            prices[asset_id].update({
+                currency: 1 + n / 1000,
+                f'{currency}_24h_change': (n % 7 - 3) / 10,
+                f'{currency}_24h_vol': 1_000 * (n + 1) ** 2
+            })
+    return json.dumps(prices)
+
+
+def check_failed_batch(size):
+    """One failed batch leaves its assets out of the feed, not the whole feed"""
+    assets = synthetic_assets(size)
+    first = assets[0]['id']
+    stub = StubUpstream(coingecko_prices, fail_if=lambda path, data: first in path)
+    digital_bonds.COINGECKO_BASE_URL = stub.start()
+    breaker = get_breaker('coingecko')
+
+    ok = True
+    fetches = {'sync': lambda: digital_bonds.fetch_digital_assets_data(assets),
+               'async': lambda: asyncio.run(digital_bonds.fetch_digital_assets_data_async(assets))}
+    batches = digital_bonds.id_batches([asset['id'] for asset in assets])
+    lost = set(batches[0].split(','))
+    expected = [asset['ticker'] for asset in assets if asset['id'] not in lost]
+    missing = [asset['ticker'] for asset in assets if asset['id'] in lost]
+    try:
+        for name, fetch in fetches.items():
+            failures = sum(not succeeded for _, succeeded in breaker._outcomes)
+            payload = fetch()
+            tickers = [row['ticker'] for row in payload['data']]
+            counted = sum(not succeeded for _, succeeded in breaker._outcomes) - failures
+            passed = len(batches) > 1 and tickers == expected and payload.get('missing') == missing and counted == 0
+            ok &= passed
+            print(f"{'✅' if passed else '❌'} {name} fetch with 1 of {len(batches)} batches failed: "
+                  f"{len(tickers)} rows, {len(payload.get('missing', []))} missing, {counted} breaker failure(s)")
+    finally:
+        stub.stop()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', default='10,100,1000')
+    parser.add_argument('--upstream-latency', type=float, default=0.2)
+    parser.add_argument('--max-url', type=int, default=2048, help='Longest URL accepted')
+    args = parser.parse_args()
+
+    stub = StubUpstream(coingecko_prices, delay=args.upstream_latency)
+    digital_bonds.COINGECKO_BASE_URL = stub.start()
+
+    ok = True
+    print(f"{'assets':>7} {'batches':>8} {'rounds':>7} {'longest URL':>12} {'fetch ms':>9} {'rows':>6}")
+    for size in (int(n) for n in args.sizes.split(',')):
+        assets = synthetic_assets(size)
+        stub.paths.clear()
+        started = time.perf_counter()
+        payload = digital_bonds.fetch_digital_assets_data(assets)
+        elapsed = time.perf_counter() - started
+
+        batches = len(stub.paths)
+        rounds = -(-batches // digital_bonds.BATCH_CONCURRENCY)
+        longest = max(len(digital_bonds.COINGECKO_BASE_URL) + len(path) for path in stub.paths)
+        tickers = [row['ticker'] for row in payload['data']]
+        complete = tickers == [asset['ticker'] for asset in assets]
+        bounded = elapsed < (rounds + 1) * args.upstream_latency + 0.5
+        passed = complete and longest <= args.max_url and bounded
+        ok &= passed
+        print(f"{size:>7,} {batches:>8} {rounds:>7} {longest:>12,} {elapsed * 1000:>9.0f} {len(tickers):>6,} "
+              f"{'✅' if passed else '❌'}")
+
+    stub.stop()
+
+    ok &= check_failed_batch(max(int(n) for n in args.sizes.split(',')))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
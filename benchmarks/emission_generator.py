@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Batch emission generator benchmark: runs generate-historical-data.py --count
+at growing sizes in both output formats and reports wall time, throughput
+and peak RSS of each run. Fails if the same seed does not reproduce the same
+output, or if peak memory grows with N instead of staying flat.
+
+Usage:
+    python3 benchmarks/emission_generator.py [--sizes 100000,1000000,3000000]
+"""
+
+import argparse
+import filecmp
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GENERATOR = os.path.join(ROOT, 'generate-historical-data.py')
+
+# Largest allowed peak RSS relative to the smallest size's
+MAX_RSS_GROWTH = 1.5
+
+
+def run_generator(count, output_format, output, seed=42):
+    """Run one generation; return (seconds, peak RSS in MB)"""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, GENERATOR, '--count', str(count), '--seed', str(seed),
+         '--format', output_format, '--output', output],
+        stderr=subprocess.DEVNULL
+    )
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - started
+    if status != 0:
+        print(f"❌ Generator exited with status {status} ({count} emissions, {output_format})")
+        sys.exit(1)
+    return elapsed, usage.ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', default='100000,1000000,3000000')
+    args = parser.parse_args()
+    sizes = [int(n) for n in args.sizes.split(',')]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        first, second = os.path.join(tmp, 'a.ndjson'), os.path.join(tmp, 'b.ndjson')
+        run_generator(10_000, 'ndjson', first)
+        run_generator(10_000, 'ndjson', second)
+        if not filecmp.cmp(first, second, shallow=False):
+            print("❌ Same seed produced different output")
+            sys.exit(1)
+        print("✅ Seeded output is reproducible")
+
+        print(f"{'format':<8} {'emissions':>10} {'seconds':>8} {'rows/s':>11} {'peak RSS MB':>12}")
+        for output_format in ('ndjson', 'snapshot'):
+            peaks = []
+            for size in sizes:
+                output = os.path.join(tmp, f"out-{output_format}-{size}")
+                elapsed, rss = run_generator(size, output_format, output)
+                peaks.append(rss)
+                print(f"{output_format:<8} {size:>10,} {elapsed:>8.2f} {size / elapsed:>11,.0f} {rss:>12.1f}")
+                os.remove(output)
+
+            if peaks[-1] > peaks[0] * MAX_RSS_GROWTH:
+                print(f"❌ Peak RSS grew from {peaks[0]:.1f}MB to {peaks[-1]:.1f}MB ({output_format})")
+                sys.exit(1)
+
+    print("✅ Memory stays flat across sizes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Endpoint throughput benchmark, fully offline: the API runs in its own
+process (gunicorn when installed, else the Werkzeug threaded server, or
+uvicorn serving the ASGI entry point) with
+Alpha Vantage, CoinGecko and Investing.com replaced by local stubs
+replaying the payloads recorded under fixtures/, with configurable latency
+and failure rates. Each route is driven by concurrent keep-alive clients,
+then all of them together; req/s and p50/p95/p99 latencies are printed and
+saved as JSON, optionally compared with the results of an earlier commit.
+
+Usage:
+    python3 benchmarks/endpoints.py [--concurrency 32] [--duration 10]
+        [--upstream-latency 0.2] [--upstream-jitter 0.1] [--failure-rate 0.05]
+        [--cache-ttl 5] [--workers 2] [--threads 8]
+        [--output results.json] [--compare baseline.json] [--tolerance 0.2]
+"""
+
+import argparse
+from datetime import datetime
+import importlib.util
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_upstream import StubUpstream, calendar_service, load_fixture
+
+ROUTES = ['/api/market', '/api/digital-bonds', '/api/economic-calendar', '/health']
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_stubs(args):
+    """Start the upstream stand-ins; return {env var: stub}"""
+    options = dict(delay=args.upstream_latency, jitter=args.upstream_jitter,
+                   failure_rate=args.failure_rate, seed=args.seed)
+    stubs = {
+        'ALPHA_VANTAGE_BASE_URL': StubUpstream(load_fixture('alpha_vantage_global_quote.json'), **options),
+        'COINGECKO_BASE_URL': StubUpstream(load_fixture('coingecko_simple_price.json'), **options),
+        'INVESTING_CALENDAR_URL': StubUpstream(load_fixture('investing_calendar.html'), 'text/html', **options),
+        'CALENDAR_SERVICE_URL': StubUpstream(calendar_service(load_fixture('investing_calendar.html')), **options),
+    }
+    return {name: (stub, stub.start()) for name, stub in stubs.items()}
+
+
+def start_server(args, stubs, port):
+    """Launch the API in a child process pointed at the stubs"""
+    env = dict(os.environ)
+    env.update({name: url for name, (_, url) in stubs.items()})
+    env.update({
+        'UPSTREAM_CACHE_DIR': tempfile.mkdtemp(prefix='endpoint-bench-'),
+        'METRICS_DIR': tempfile.mkdtemp(prefix='endpoint-bench-metrics-'),
+        'TIMESERIES_DB': os.path.join(tempfile.mkdtemp(prefix='endpoint-bench-history-'), 'ticks.sqlite'),
+        'BACKGROUND_REFRESH': '1' if args.background_refresh else '0',
+        'MARKET_CACHE_TTL': str(args.cache_ttl),
+        'DIGITAL_CACHE_TTL': str(args.cache_ttl),
+        'PYTHONUNBUFFERED': '1',
+    })
+
+    if args.server == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', 'app:app', '--bind', f'127.0.0.1:{port}',
+                   '--workers', str(args.workers), '--threads', str(args.threads),
+                   '--log-level', 'warning']
+    elif args.server == 'uvicorn':
+        command = [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', str(port),
+                   '--workers', str(args.workers), '--log-level', 'warning']
+    else:
+        command = [sys.executable, '-c',
+                   f"from app import app; app.run(host='127.0.0.1', port={port}, threaded=True)"]
+
+    server = subprocess.Popen(command, cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"API server exited with status {server.returncode}")
+        try:
+            requests.get(f'{base_url}/health', timeout=1)
+            return server, base_url
+        except requests.RequestException:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("API server did not start within 30s")
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(int(round(q / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def drive(base_url, routes, concurrency, duration):
+    """
+    Hit routes round-robin from concurrency keep-alive clients for duration seconds.
+
+    Returns:
+        dict: requests, errors, statuses, rps and latency percentiles in ms
+    """
+    latencies = []
+    statuses = {}
+    errors = 0
+    lock = threading.Lock()
+    barrier = threading.Barrier(concurrency + 1)
+    stop_at = [0.0]
+
+    def client(offset):
+        nonlocal errors
+        session = requests.Session()
+        local_latencies, local_statuses, local_errors = [], {}, 0
+        i = offset
+        barrier.wait()
+        while time.perf_counter() < stop_at[0]:
+            route = routes[i % len(routes)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                status = session.get(base_url + route, timeout=30).status_code
+            except requests.RequestException:
+                local_errors += 1
+                continue
+            local_latencies.append(time.perf_counter() - started)
+            local_statuses[status] = local_statuses.get(status, 0) + 1
+        with lock:
+            latencies.extend(local_latencies)
+            errors += local_errors
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    started = time.perf_counter()
+    stop_at[0] = started + duration
+    barrier.wait()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda value: round(value * 1000, 2) if value is not None else None
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': ms(percentile(latencies, 50)),
+        'p95_ms': ms(percentile(latencies, 95)),
+        'p99_ms': ms(percentile(latencies, 99)),
+        'max_ms': ms(latencies[-1] if latencies else None),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(results, baseline_path, tolerance):
+    """Print throughput and p95 changes against a baseline; return False on regression"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline.get('commit')} ({os.path.basename(baseline_path)}):")
+    ok = True
+    for scenario, result in results.items():
+        before = baseline['results'].get(scenario)
+        if not before or not before['rps'] or not before['p95_ms']:
+            continue
+        rps_change = result['rps'] / before['rps'] - 1
+        p95_change = result['p95_ms'] / before['p95_ms'] - 1
+        regressed = rps_change < -tolerance or p95_change > tolerance
+        ok &= not regressed
+        print(f"{'❌' if regressed else '✅'} {scenario:<24} req/s {rps_change:+7.1%}   p95 {p95_change:+7.1%}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10, help='Seconds per scenario')
+    parser.add_argument('--upstream-latency', type=float, default=0.2, help='Stub response delay (s)')
+    parser.add_argument('--upstream-jitter', type=float, default=0.1, help='Extra random stub delay (s)')
+    parser.add_argument('--failure-rate', type=float, default=0.05, help='Share of stub requests failing with 503')
+    parser.add_argument('--cache-ttl', type=int, default=5, help='Market and digital cache TTL (s)')
+    parser.add_argument('--background-refresh', action='store_true', help='Run the refresh scheduler')
+    parser.add_argument('--server', choices=['gunicorn', 'werkzeug', 'uvicorn'],
+                        default='gunicorn' if importlib.util.find_spec('gunicorn') else 'werkzeug')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn or uvicorn workers')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads per worker')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Results file (default: benchmarks/results/endpoints-<commit>.json)')
+    parser.add_argument('--compare', help='Earlier results file to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed req/s drop or p95 increase before --compare fails')
+    args = parser.parse_args()
+
+    stubs = start_stubs(args)
+    server, base_url = start_server(args, stubs, free_port())
+    try:
+        # One warm-up pass so every scenario starts with populated caches
+        for route in ROUTES:
+            requests.get(base_url + route, timeout=30)
+
+        scenarios = [(route, [route]) for route in ROUTES] + [('mixed', ROUTES)]
+        results = {}
+        print(f"{args.server} server, {args.concurrency} clients, {args.duration:g}s per scenario, "
+              f"upstream {args.upstream_latency * 1000:.0f}ms +{args.upstream_jitter * 1000:.0f}ms, "
+              f"{args.failure_rate:.0%} failures\n")
+        print(f"{'scenario':<24} {'requests':>9} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+              f"{'p99 ms':>8} {'errors':>7}  statuses")
+        for name, routes in scenarios:
+            result = results[name] = drive(base_url, routes, args.concurrency, args.duration)
+            print(f"{name:<24} {result['requests']:>9,} {result['rps']:>9,.1f} {result['p50_ms']:>8} "
+                  f"{result['p95_ms']:>8} {result['p99_ms']:>8} {result['errors']:>7}  {result['statuses']}")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+        for stub, _ in stubs.values():
+            stub.stop()
+
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'upstream': {name: {'hits': stub.hits, 'failures': stub.failures} for name, (stub, _) in stubs.items()},
+        'results': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f'endpoints-{commit}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nUpstream hits: " + ', '.join(f"{name} {v['hits']} ({v['failures']} failed)"
+                                           for name, v in report['upstream'].items()))
+    print(f"📄 Results saved to {output}")
+
+    if args.compare and not compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Event stream fan-out benchmark: idle /api/stream connections are held open
+against the API (own process, stub upstreams), then the CoinGecko stub
+starts returning new prices. Every client must receive the change once,
+while upstream calls stay independent of the client count.
+
+By default the API runs as one worker of the Procfile (gunicorn, 32
+threads): EVENTS_MAX_CLIENTS streams are accepted, the clients past them
+must be turned away with a 503 (the dashboard then polls), and /health
+must keep answering while the streams are open. --server uvicorn runs the
+opt-in asgi.py entry point, which holds thousands of streams.
+
+Usage:
+    python3 benchmarks/event_stream.py [--server gunicorn|uvicorn|werkzeug]
+        [--clients 24 (gunicorn) or 2000] [--timeout 30]
+"""
+
+import argparse
+import json
+import os
+import selectors
+import socket
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from endpoints import free_port, start_server, start_stubs
+from stub_upstream import load_fixture
+
+import requests
+
+# Threads per worker of the Procfile's gunicorn command
+PROCFILE_THREADS = 32
+
+# Streams a threaded worker accepts (api/events.py default)
+MAX_CLIENTS = int(os.environ.get('EVENTS_MAX_CLIENTS', 16))
+
+
+def connect_clients(port, count):
+    """Open count streams on digital_bonds; return {socket: received bytes}"""
+    request = (f"GET /api/stream?topics=digital_bonds HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n"
+               "Accept: text/event-stream\r\n\r\n").encode('ascii')
+    clients = {}
+    for _ in range(count):
+        sock = socket.create_connection(('127.0.0.1', port))
+        sock.sendall(request)
+        sock.setblocking(False)
+        clients[sock] = bytearray()
+    return clients
+
+
+def read_until(clients, done, timeout):
+    """Read every socket until done(buffer) holds for all of them or timeout"""
+    selector = selectors.DefaultSelector()
+    pending = set()
+    for sock, buffer in clients.items():
+        if not done(buffer):
+            selector.register(sock, selectors.EVENT_READ)
+            pending.add(sock)
+    deadline = time.time() + timeout
+    while pending and time.time() < deadline:
+        for key, _ in selector.select(timeout=0.5):
+            try:
+                data = key.fileobj.recv(65536)
+            except BlockingIOError:
+                continue
+            clients[key.fileobj] += data
+            if not data or done(clients[key.fileobj]):
+                selector.unregister(key.fileobj)
+                pending.discard(key.fileobj)
+    selector.close()
+    return len(clients) - len(pending)
+
+
+def server_rss_mb(pid):
+    try:
+        with open(f'/proc/{pid}/status', 'r', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--clients', type=int, help='Streams opened (default 24 on gunicorn, 2000 on uvicorn)')
+    parser.add_argument('--timeout', type=float, default=30, help='Seconds allowed per phase')
+    parser.add_argument('--server', choices=['gunicorn', 'uvicorn', 'werkzeug'], default='gunicorn')
+    args = parser.parse_args()
+    threaded = args.server != 'uvicorn'
+    if args.clients is None:
+        args.clients = MAX_CLIENTS + 8 if threaded else 2000
+    accepted = min(args.clients, MAX_CLIENTS) if threaded else args.clients
+
+    # endpoints.start_server options: one process, short digital cache TTL
+    args.upstream_latency, args.upstream_jitter, args.failure_rate, args.seed = 0.05, 0.0, 0.0, 42
+    args.cache_ttl, args.background_refresh, args.workers, args.threads = 1, True, 1, PROCFILE_THREADS
+
+    stubs = start_stubs(args)
+    coingecko = stubs['COINGECKO_BASE_URL'][0]
+    os.environ['EVENTS_POLL_INTERVAL'] = '0.5'
+    server, base_url = start_server(args, stubs, free_port())
+    port = int(base_url.rsplit(':', 1)[1])
+    ok = True
+    try:
+        requests.get(base_url + '/api/digital-bonds', timeout=30)
+
+        started = time.time()
+        clients = {}
+        for sock, buffer in connect_clients(port, args.clients).items():
+            clients[sock] = buffer
+            # One at a time, so the accepted ones are counted before the next arrives
+            read_until({sock: buffer}, lambda b: b'event: digital_bonds' in b or b' 503 ' in b, args.timeout)
+        rejected = [sock for sock, buffer in clients.items() if buffer.startswith(b'HTTP/1.1 503')]
+        for sock in rejected:
+            sock.close()
+            del clients[sock]
+        connected = read_until(clients, lambda b: b.count(b'event: digital_bonds') >= 1, args.timeout)
+        print(f"{connected:,}/{args.clients:,} clients got the current payload in {time.time() - started:.1f}s, "
+              f"{len(rejected):,} turned away (server RSS {server_rss_mb(server.pid):.0f} MB)")
+        ok &= connected == accepted and len(rejected) == args.clients - accepted
+
+        health_started = time.time()
+        health_ok = requests.get(base_url + '/health', timeout=5).status_code == 200
+        health_ms = (time.time() - health_started) * 1000
+        print(f"{'✅' if health_ok else '❌'} /health answered in {health_ms:.0f}ms with {connected:,} streams open")
+        ok &= health_ok
+
+        hits_before = coingecko.hits
+        time.sleep(3)  # Idle: only heartbeats and unchanged polls
+        idle_hits = coingecko.hits - hits_before
+
+        prices = json.loads(load_fixture('coingecko_simple_price.json'))
+        prices['pax-gold']['usd'] += 12.5
+        coingecko.body = json.dumps(prices).encode('utf-8')
+        changed_at = time.time()
+        updated = read_until(clients, lambda b: b.count(b'event: digital_bonds') >= 2, args.timeout)
+        fan_out = time.time() - changed_at
+        health = requests.get(base_url + '/health', timeout=30).json()['event_stream']
+        print(f"{updated:,}/{accepted:,} clients got the change within {fan_out:.1f}s of the upstream change")
+        print(f"Upstream calls: {idle_hits} while idle for 3s, {coingecko.hits} in total; "
+              f"events published: {health['published']}, clients: {health['clients']:,}")
+        ok &= updated == accepted
+        duplicates = sum(1 for buffer in clients.values() if buffer.count(b'event: digital_bonds') > 2)
+        ok &= duplicates == 0 and coingecko.hits < 50
+        print(f"{'✅' if ok else '❌'} fan-out {'passed' if ok else 'failed'} ({duplicates} clients got duplicates)")
+    finally:
+        for sock in list(locals().get('clients', {})):
+            sock.close()
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()  # Stream threads only notice the exit at their next heartbeat
+            server.wait()
+        for stub, _ in stubs.values():
+            stub.stop()
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Cold-start import budget: every entry point (the Vercel functions, the
+unified app and its ASGI server) is imported in fresh interpreters with
+-X importtime, in the default configuration. Its
+cumulative import time (best of --runs) and the number of modules it loads
+must stay within the budgets below, and the modules it only needs on
+first use (HTTP clients, calendar parsers, asyncio, the bond store and
+NumPy) or for other routes must not be loaded at all.
+
+The module counts are exact and machine-independent; the times were
+measured on a 1-CPU container, scale them with --slack on slower hosts.
+
+Usage:
+    python3 benchmarks/import_budget.py [--runs 5] [--slack 1.0]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on first upstream call or first parse, never at import
+DEFERRED = ('requests', 'urllib3', 'httpx', 'asyncio', 'bs4', 'lxml')
+
+# Loaded by the first /api/bonds* request or by the refresh scheduler's
+# first tick, never at import
+LAZY = ('numpy', 'api.bond_store', 'api.market', 'api.digital_bonds', 'api.economic_calendar')
+
+# Entry point: (import time budget in ms, module budget, modules it must not load)
+ENTRY_POINTS = {
+    'api.index': (250, 230, DEFERRED + ('api.digital_bonds', 'api.economic_calendar')),
+    'api.index_digital': (250, 235, DEFERRED + ('api.market', 'api.economic_calendar')),
+    'api.index_calendar': (250, 230, DEFERRED + ('api.market', 'api.digital_bonds')),
+    # Calendar data module, also imported by app.py and asgi.py on first use: no Flask of its own
+    'api.economic_calendar': (60, 50, DEFERRED + ('flask', 'flask_cors', 'api.market', 'api.digital_bonds')),
+    'app': (250, 230, DEFERRED + LAZY),
+    'asgi': (275, 265, ('requests', 'urllib3', 'httpx', 'bs4', 'lxml') + LAZY),
+}
+
+CHILD = ("import json, sys; before = set(sys.modules); import {module}; "
+         "print(json.dumps(sorted(set(sys.modules) - before)))")
+
+
+def import_once(module, env):
+    """Import module in a fresh interpreter; return (cumulative µs, loaded modules)"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD.format(module=module)],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    cumulative = None
+    for line in result.stderr.splitlines():
+        fields = line.split('|')
+        if line.startswith('import time:') and len(fields) == 3 and fields[2].strip() == module:
+            cumulative = int(fields[1])
+    return cumulative, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--runs', type=int, default=5, help='Imports per entry point (best one counts)')
+    parser.add_argument('--slack', type=float, default=1.0, help='Multiplier of the time budgets')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.update({
+        'UPSTREAM_CACHE_DIR': tempfile.mkdtemp(prefix='import-budget-'),
+        'METRICS_DIR': tempfile.mkdtemp(prefix='import-budget-metrics-'),
+        'TIMESERIES_DB': os.path.join(tempfile.mkdtemp(prefix='import-budget-history-'), 'ticks.sqlite'),
+        'PYTHONDONTWRITEBYTECODE': '',
+    })
+
+    ok = True
+    print(f"{'entry point':<24} {'import ms':>10} {'budget':>8} {'modules':>8} {'budget':>7}  deferred")
+    for module, (budget_ms, max_modules, forbidden) in ENTRY_POINTS.items():
+        import_once(module, env)  # Compile the bytecode caches first
+        timings, loaded = [], []
+        for _ in range(args.runs):
+            cumulative, loaded = import_once(module, env)
+            timings.append(cumulative / 1000)
+        best = min(timings)
+        budget_ms *= args.slack
+        leaked = [name for name in forbidden if name in loaded]
+        passed = best <= budget_ms and len(loaded) <= max_modules and not leaked
+        ok &= passed
+        print(f"{'✅' if passed else '❌'} {module:<22} {best:>10.1f} {budget_ms:>8.0f} {len(loaded):>8} "
+              f"{max_modules:>7}  {'loaded: ' + ', '.join(leaked) if leaked else 'ok'}")
+
+    print(f"\n{'✅' if ok else '❌'} import budget {'passed' if ok else 'exceeded'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
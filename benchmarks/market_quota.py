@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Market quota check: clients request the bond ETF basket with skewed
+popularity while Alpha Vantage (a local stub) allows only a small quota.
+Upstream calls must stay within the token bucket, and the quotes requested
+most often must be the freshest.
+
+Usage:
+    python3 benchmarks/market_quota.py [--quota 120] [--duration 20] [--clients 8]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--quota', type=float, default=120, help='Alpha Vantage calls per minute')
+    parser.add_argument('--burst', type=float, default=2, help='Token bucket capacity')
+    parser.add_argument('--ttl', type=int, default=1, help='Quote freshness window (s)')
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
+
+args = parse_args()
+os.environ['UPSTREAM_CACHE_DIR'] = tempfile.mkdtemp(prefix='market-quota-')
+os.environ['METRICS_DIR'] = tempfile.mkdtemp(prefix='market-quota-metrics-')
+os.environ['MARKET_QUOTA_PER_MINUTE'] = str(args.quota)
+os.environ['MARKET_QUOTA_BURST'] = str(args.burst)
+os.environ['MARKET_CACHE_TTL'] = str(args.ttl)
+
+from stub_upstream import StubUpstream, load_fixture
+import api.market as market
+from api.cache import cache_get
+
+
+def main():
+    stub = StubUpstream(load_fixture('alpha_vantage_global_quote.json'), delay=0.05)
+    market.ALPHA_VANTAGE_BASE_URL = stub.start()
+
+    # Zipf-like popularity: the first symbol is requested 10x more than the last
+    symbols = list(market.SYMBOLS)
+    weights = [1 / (rank + 1) for rank in range(len(symbols))]
+    ages = {symbol: [] for symbol in symbols}
+    requests_served = [0]
+    stop_at = time.time() + args.duration
+
+    # Warm the whole basket once (within the burst, the rest stays pending)
+    market.get_market_basket(symbols)
+
+    def client(seed):
+        rng = random.Random(seed)
+        served = 0
+        while time.time() < stop_at:
+            market.get_market_basket(rng.choices(symbols, weights)[:1])
+            served += 1
+            time.sleep(0.01)
+        requests_served[0] += served
+
+    threads = [threading.Thread(target=client, args=(args.seed + n,)) for n in range(args.clients)]
+    for t in threads:
+        t.start()
+    started = time.time()
+    while time.time() < stop_at:
+        now = time.time()
+        for symbol in symbols:
+            entry = cache_get(market._cache_key(symbol))
+            if entry:
+                ages[symbol].append(now - entry['stored_at'])
+        time.sleep(0.1)
+    for t in threads:
+        t.join()
+    elapsed = time.time() - started
+    stub.stop()
+
+    allowed = args.burst + args.quota / 60 * (elapsed + 1)
+    within_quota = stub.hits <= allowed
+    print(f"{requests_served[0]:,} requests, {stub.hits} upstream calls "
+          f"(quota allows {allowed:.0f} in {elapsed:.0f}s) {'✅' if within_quota else '❌'}\n")
+    print(f"{'symbol':<6} {'weight':>7} {'mean age s':>11} {'max age s':>10}")
+    mean_ages = []
+    for symbol, weight in zip(symbols, weights):
+        values = ages[symbol] or [float('inf')]
+        mean_ages.append(statistics.mean(values))
+        print(f"{symbol:<6} {weight:>7.2f} {mean_ages[-1]:>11.2f} {max(values):>10.2f}")
+
+    # Popular half of the basket must be fresher than the unpopular half
+    half = len(symbols) // 2
+    popular_first = statistics.mean(mean_ages[:half]) < statistics.mean(mean_ages[half:])
+    print(f"\n{'✅' if popular_first else '❌'} popular symbols fresher: "
+          f"{statistics.mean(mean_ages[:half]):.2f}s vs {statistics.mean(mean_ages[half:]):.2f}s")
+
+    sys.exit(0 if within_quota and popular_first else 1)
+
+
+if __name__ == '__main__':
+    main()
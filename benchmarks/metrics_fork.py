@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Metrics fork check: a process records samples, then forks workers (as
+gunicorn --preload does) that record their own. Every process must write
+a file of its own in METRICS_DIR, the workers without the parent's
+samples, and a scrape must report each sample exactly once, before and
+after the workers exit.
+
+Usage:
+    python3 benchmarks/metrics_fork.py [--workers 3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ['METRICS_DIR'] = tempfile.mkdtemp(prefix='metrics-fork-')
+
+from api import metrics
+
+
+def sample_files():
+    """Per-process sample files of METRICS_DIR"""
+    return sorted(name for name in os.listdir(metrics.METRICS_DIR)
+                  if name.endswith('.json') and name != metrics.RETIRED_FILE)
+
+
+def totals():
+    """Merged fallback_total per source"""
+    return {dict(labels)['source']: value for (name, labels), value in metrics._merged_samples().items()
+            if name == 'fallback_total'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--workers', type=int, default=3, help='Forked workers')
+    args = parser.parse_args()
+
+    metrics.inc('fallback_total', source='parent')
+    metrics.flush()
+
+    ready_r, ready_w = os.pipe()
+    exit_r, exit_w = os.pipe()
+    children = []
+    for n in range(args.workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_r)
+            os.close(exit_w)
+            metrics.inc('fallback_total', source='worker')
+            metrics.flush()
+            os.write(ready_w, b'.')
+            os.read(exit_r, 1)  # Stay alive until the parent has checked the live files
+            os._exit(0)
+        children.append(pid)
+    os.close(ready_w)
+    os.close(exit_r)
+    for _ in children:
+        os.read(ready_r, 1)
+
+    ok = True
+    files = sample_files()
+    own = metrics._own_file()
+    worker_files = [name for name in files if name != own]
+    passed = len(files) == args.workers + 1 and own in files
+    ok &= passed
+    print(f"{'✅' if passed else '❌'} {len(files)} sample files for 1 parent + {args.workers} workers: {', '.join(files)}")
+
+    leaked = [name for name in worker_files
+              if any(labels.get('source') == 'parent' for _, labels, _ in metrics._read(
+                  os.path.join(metrics.METRICS_DIR, name)))]
+    passed = not leaked
+    ok &= passed
+    print(f"{'✅' if passed else '❌'} worker files without the parent's samples"
+          f"{': ' + ', '.join(leaked) + ' leaked them' if leaked else ''}")
+
+    expected = {'parent': 1, 'worker': args.workers}
+    live = totals()
+    passed = live == expected
+    ok &= passed
+    print(f"{'✅' if passed else '❌'} merged while workers run: {live} (expected {expected})")
+
+    os.close(exit_w)
+    for pid in children:
+        os.waitpid(pid, 0)
+    exited = totals()
+    remaining = sample_files()
+    passed = exited == expected and remaining == [own]
+    ok &= passed
+    print(f"{'✅' if passed else '❌'} merged after workers exited: {exited}, files left: {', '.join(remaining)}")
+
+    print(f"\n{'✅' if ok else '❌'} metrics fork check {'passed' if ok else 'failed'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Quote history benchmark: a year of minute ticks for one series, queried
+back at day, hour and auto resolution (line and OHLC). Daily OHLC is
+checked against a NumPy computation over the raw ticks, the range query and
+the retention delete must be primary key searches, a write must drop the
+ticks older than the retention window, and an unreadable database must be
+answered with the error JSON of the other routes.
+
+Usage:
+    python3 benchmarks/quote_history.py [--days 365] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ['TIMESERIES_DB'] = os.path.join(tempfile.mkdtemp(prefix='quote-history-'), 'ticks.sqlite')
+os.environ['UPSTREAM_CACHE_DIR'] = tempfile.mkdtemp(prefix='quote-history-cache-')
+os.environ['METRICS_DIR'] = tempfile.mkdtemp(prefix='quote-history-metrics-')
+os.environ['BACKGROUND_REFRESH'] = '0'
+
+from api import timeseries
+
+SERIES = 'alpha-vantage:LQD'
+
+
+def synthetic_ticks(days, seed):
+    """One random-walk price per minute, starting at midnight UTC"""
+    rng = np.random.default_rng(seed)
+    start = 1_767_225_600.0  # 2026-01-01T00:00:00Z
+    ts = start + np.arange(days * 1440, dtype=np.float64) * 60
+    prices = 108 + np.cumsum(rng.normal(0, 0.02, ts.size))
+    volumes = rng.integers(1_000, 50_000, ts.size).astype(np.float64)
+    return ts, prices, volumes
+
+
+def expected_daily_ohlc(ts, prices, volumes):
+    day = (ts // 86400).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]])
+    ends = np.r_[starts[1:], ts.size] - 1
+    return {
+        'open': prices[starts], 'close': prices[ends],
+        'high': np.maximum.reduceat(prices, starts), 'low': np.minimum.reduceat(prices, starts),
+        'volume': np.add.reduceat(volumes, starts)
+    }
+
+
+def check_query_plans(conn):
+    """The range query and the retention delete must not scan the whole table"""
+    plans = {
+        'range query': conn.execute('EXPLAIN QUERY PLAN ' + timeseries.DOWNSAMPLE_QUERY, {
+            'series': SERIES, 'start': 0, 'end': 1, 'size': 60}).fetchall(),
+        'retention delete': conn.execute('EXPLAIN QUERY PLAN ' + timeseries.PRUNE_QUERY, (SERIES, 0)).fetchall()
+    }
+    ok = True
+    for name, rows in plans.items():
+        details = [row[-1] for row in rows]
+        scans = [d for d in details if d.startswith('SCAN') and 'ticks' in d and 'SUBQUERY' not in d]
+        searches = [d for d in details if 'PRIMARY KEY' in d]
+        passed = searches and not scans
+        ok &= bool(passed)
+        print(f"{'✅' if passed else '❌'} {name} plan: {'; '.join(details)}")
+    return ok
+
+
+def check_retention(conn, ts):
+    """A write drops the ticks of its series older than RETENTION_DAYS"""
+    cutoff = ts[ts.size // 2] - 30  # Between two ticks, so the write's own clock does not matter
+    timeseries.RETENTION_DAYS = (time.time() - cutoff) / 86400
+    timeseries.record(SERIES, 108.0, 1_000)
+    oldest, count = conn.execute('SELECT MIN(ts), COUNT(*) FROM ticks WHERE series = ?', (SERIES,)).fetchone()
+    expected = int((ts >= cutoff).sum()) + 1
+    passed = oldest >= cutoff and count == expected
+    print(f"{'✅' if passed else '❌'} retention: {count:,} ticks kept (expected {expected:,}), "
+          f"oldest {timeseries._iso(oldest)}")
+    return passed
+
+
+def check_unreadable_database():
+    """A corrupt database is a 503 with the error JSON, not an unhandled 500"""
+    from app import app
+
+    corrupt = os.path.join(tempfile.mkdtemp(prefix='quote-history-corrupt-'), 'ticks.sqlite')
+    with open(corrupt, 'wb') as f:
+        f.write(b'not a database' * 512)
+    timeseries.TIMESERIES_DB = corrupt
+    timeseries._local.conn = None
+
+    client = app.test_client()
+    ok = True
+    for path in ('/api/history', f'/api/history?series={SERIES}'):
+        response = client.get(path)
+        body = response.get_json(silent=True) or {}
+        passed = response.status_code == 503 and body.get('status') == 'error' and body.get('message')
+        ok &= bool(passed)
+        print(f"{'✅' if passed else '❌'} unreadable database: {path} -> {response.status_code} {body}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    ts, prices, volumes = synthetic_ticks(args.days, args.seed)
+    started = time.perf_counter()
+    conn = timeseries._connection()
+    with conn:
+        conn.executemany(
+            'INSERT INTO ticks (series, ts, price, volume) VALUES (?, ?, ?, ?)',
+            zip([SERIES] * ts.size, ts.tolist(), prices.tolist(), volumes.tolist())
+        )
+    print(f"Inserted {ts.size:,} minute ticks in {time.perf_counter() - started:.2f}s")
+
+    start, end = ts[0], ts[-1] + 60
+    print(f"\n{'query':<18} {'points':>7} {'best ms':>9}")
+    for resolution in ('day', 'hour', 'auto'):
+        for ohlc in (False, True):
+            timings = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                result = timeseries.query_range(SERIES, start, end, resolution, ohlc=ohlc)
+                timings.append(time.perf_counter() - t0)
+            label = f"{result['resolution']}{' ohlc' if ohlc else ''}"
+            print(f"{label:<18} {len(result['labels']):>7,} {min(timings) * 1000:>9.1f}")
+
+    daily = timeseries.query_range(SERIES, start, end, 'day', ohlc=True)
+    expected = expected_daily_ohlc(ts, prices, volumes)
+    ok = all(np.allclose(daily[column], expected[column]) for column in expected)
+    print(f"\n{'✅' if ok else '❌'} daily OHLC matches the raw ticks ({len(daily['labels'])} days)")
+
+    ok &= check_query_plans(conn)
+    ok &= check_retention(conn, ts)
+    ok &= check_unreadable_database()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
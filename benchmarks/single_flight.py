@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Single-flight check: 100 concurrent requests against a cold cache must
+cause exactly one upstream hit per source.
+
+Usage:
+    python3 benchmarks/single_flight.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Isolate the shared cache and keep the background scheduler from warming
+# it before the concurrent requests arrive
+os.environ['UPSTREAM_CACHE_DIR'] = tempfile.mkdtemp(prefix='single-flight-')
+os.environ['BACKGROUND_REFRESH'] = '0'
+os.environ['CALENDAR_DAYS'] = '1'  # One calendar chunk: one upstream call when cold
+
+from stub_upstream import StubUpstream
+from app import app
+import api.market as market
+import api.digital_bonds as digital_bonds
+import api.economic_calendar as economic_calendar
+
+CONCURRENCY = 100
+UPSTREAM_DELAY = 0.5  # Long enough for every request to arrive mid-fetch
+
+MARKET_PAYLOAD = {
+    'Global Quote': {
+        '05. price': '108.42', '06. volume': '9876543',
+        '07. latest trading day': '2026-01-09',
+        '08. previous close': '108.10', '10. change percent': '0.2960%'
+    }
+}
+
+DIGITAL_PAYLOAD = {
+    'ondo-us-dollar-yield': {'usd': 1.0871, 'usd_24h_change': 0.02, 'usd_24h_vol': 2400000},
+    'euro-coin': {'eur': 1.0003, 'eur_24h_change': 0.01, 'eur_24h_vol': 31000000},
+    'pax-gold': {'usd': 2712.4, 'usd_24h_change': -0.3, 'usd_24h_vol': 9100000}
+}
+
+CALENDAR_ROW = (
+    '<tr class="js-event-item"><td class="first left time">{time}</td>'
+    '<td class="left flagCur noWrap"><span class="ceFlags United_States us"></span> USD</td>'
+    '<td class="left textNum sentiment noWrap"><i class="grayFullBullishIcon"></i></td>'
+    '<td class="left event">Event {n}</td><td class="bold act">1.0%</td>'
+    '<td class="fore">0.9%</td><td class="prev">0.8%</td></tr>'
+)
+CALENDAR_ROWS = {'data': ''.join(CALENDAR_ROW.format(time=f"{8 + n}:30", n=n) for n in range(8))}
+
+
+def hammer(path):
+    """Issue CONCURRENCY simultaneous GETs and return their status codes"""
+    barrier = threading.Barrier(CONCURRENCY)
+    statuses = []
+
+    def worker():
+        client = app.test_client()
+        barrier.wait()
+        statuses.append(client.get(path).status_code)
+
+    threads = [threading.Thread(target=worker) for _ in range(CONCURRENCY)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return statuses
+
+
+def main():
+    stubs = {
+        '/api/market': StubUpstream(json.dumps(MARKET_PAYLOAD), delay=UPSTREAM_DELAY),
+        '/api/digital-bonds': StubUpstream(json.dumps(DIGITAL_PAYLOAD), delay=UPSTREAM_DELAY),
+        '/api/economic-calendar': StubUpstream(json.dumps(CALENDAR_ROWS), delay=UPSTREAM_DELAY),
+    }
+    market.ALPHA_VANTAGE_BASE_URL = stubs['/api/market'].start()
+    digital_bonds.COINGECKO_BASE_URL = stubs['/api/digital-bonds'].start()
+    economic_calendar.CALENDAR_SERVICE_URL = stubs['/api/economic-calendar'].start()
+
+    failed = False
+    for path, stub in stubs.items():
+        statuses = hammer(path)
+        ok = stub.hits == 1 and statuses.count(200) == CONCURRENCY
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} {path}: {CONCURRENCY} requests -> {stub.hits} upstream hit(s)")
+        stub.stop()
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
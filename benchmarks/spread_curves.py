@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Spread curve benchmark: the spreads of 1M synthetic emissions are drawn
+around a known Nelson-Siegel curve per country x rating group, then every
+group is refitted at once with api/spread_curves. The batched fit must
+stay within the time budget, agree with a per-group least squares
+reference, recover the noise level, be served from cache on the next call
+and be refitted after a single bond changes. On the real emissions, the
+groups whose bonds share one maturity must be flagged insufficient_data,
+without curve points or residuals.
+
+Usage:
+    python3 benchmarks/spread_curves.py [--size 1000000] [--as-of 2026-01-15]
+        [--noise 5] [--budget 10]
+"""
+
+import argparse
+from datetime import date
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api.bond_analytics import live_bonds
+from api.bond_store import BondStore
+from api import spread_curves
+from bond_queries import synthetic_store
+
+# Groups checked against the per-group reference
+REFERENCE_GROUPS = 25
+
+
+def curved_store(size, as_of, noise, seed):
+    """Synthetic store whose spreads follow one known curve per group"""
+    store = synthetic_store(size, seed)
+    rng = np.random.default_rng(seed)
+    rows, years = live_bonds(store, as_of)
+    ratings = len(store.categories['rating'])
+    groups = store.codes['country'].astype(np.int64) * ratings + store.codes['rating']
+    group_count = len(store.categories['country']) * ratings
+    params = np.stack([rng.uniform(30, 80, group_count), rng.uniform(-20, 20, group_count),
+                       rng.uniform(-30, 30, group_count)], axis=-1)
+    tau = rng.choice(spread_curves.TAUS, group_count)
+
+    spreads = np.array(store.numbers['spread'], dtype=np.float64)
+    g = groups[rows]
+    spreads[rows] = spread_curves.nelson_siegel(years, params[g], tau[g]) + rng.normal(0, noise, len(rows))
+    numbers = dict(store.numbers, spread=spreads)
+    return BondStore(store.size, store.categories, store.codes, numbers, store.dates, store.isin)
+
+
+def reference_fit(years, spreads):
+    """One group: explicit design matrix, solved for every tau"""
+    best = None
+    for tau in spread_curves.TAUS:
+        slope, curvature = spread_curves.nelson_siegel_basis(years, tau)
+        design = np.stack([np.ones_like(years), slope, curvature], axis=-1)
+        penalty = spread_curves.SHRINKAGE * len(years) * np.diag([1e-12, 1.0, 1.0])
+        params = np.linalg.solve(design.T @ design + penalty, design.T @ spreads)
+        residuals = spreads - design @ params
+        objective = residuals @ residuals + params @ penalty @ params
+        if best is None or objective < best[0]:
+            best = (objective, params, tau)
+    return best[1], best[2]
+
+
+def check_insufficient_groups(as_of):
+    """Single-maturity groups of the real emissions get no curve"""
+    payload = spread_curves.spread_curves({'asOf': as_of, 'per_page': str(spread_curves.MAX_PER_PAGE)})
+    flagged = [c for c in payload['curves'] if c['insufficient_data']]
+    curves = [c for c in payload['curves'] if not c['insufficient_data']]
+    groups = {(c['country'], c['rating']) for c in flagged}
+    bonds = [b for b in payload['data'] if (b['country'], b['rating']) in groups]
+    ranked = [b['residual'] is not None for b in payload['data']]
+
+    passed = (
+        all(c['maturities'] < spread_curves.MIN_GROUP_MATURITIES and not c['data'] for c in flagged)
+        and all(c['maturities'] >= spread_curves.MIN_GROUP_MATURITIES
+                and len(c['data']) == spread_curves.CURVE_POINTS for c in curves)
+        and all(b['residual'] is None and b['fitted'] is None for b in bonds)
+        and ranked == sorted(ranked, reverse=True)
+    )
+    print(f"{'✅' if passed else '❌'} real emissions: {len(flagged)} of {len(payload['curves'])} groups flagged "
+          f"insufficient_data ({len(bonds)} bonds without residual, ranked last)")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size', type=int, default=1_000_000)
+    parser.add_argument('--as-of', default='2026-01-15')
+    parser.add_argument('--noise', type=float, default=5.0, help='Spread noise around the curves (bps)')
+    parser.add_argument('--budget', type=float, default=10.0, help='Seconds allowed for a full refit')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    as_of = date.fromisoformat(args.as_of)
+
+    store = curved_store(args.size, as_of, args.noise, args.seed)
+    started = time.perf_counter()
+    fit = spread_curves.get_fit(store, as_of)
+    first = time.perf_counter() - started
+    fitted_groups = int(np.count_nonzero(fit['bonds'] >= spread_curves.MIN_GROUP_BONDS))
+    print(f"Fitted {len(fit['bonds'])} groups ({fitted_groups} Nelson-Siegel) over "
+          f"{len(fit['rows']):,} live bonds of {store.size:,} in {first:.2f}s")
+
+    # Per-group reference on the largest groups
+    spreads = store.numbers['spread'][fit['rows']]
+    largest = np.argsort(-fit['bonds'])[:REFERENCE_GROUPS]
+    started = time.perf_counter()
+    worst = 0.0
+    for g in largest:
+        in_group = fit['group'] == g
+        params, tau = reference_fit(fit['years'][in_group], spreads[in_group])
+        fitted = spread_curves.nelson_siegel(fit['years'][in_group], params, tau)
+        batched = fit['fitted'][in_group]
+        worst = max(worst, float(np.max(np.abs(batched - fitted))))
+    reference_seconds = (time.perf_counter() - started) / len(largest) * len(fit['bonds'])
+    print(f"Per-group reference: {reference_seconds:.2f}s extrapolated to all groups, "
+          f"max fitted spread difference {worst:.1e} bps ({len(largest)} groups)")
+
+    rmse = fit['rmse'][fit['bonds'] >= 100]
+    print(f"RMSE of groups with 100+ bonds: median {np.median(rmse):.2f} bps (noise {args.noise:.2f} bps)")
+
+    started = time.perf_counter()
+    cached = spread_curves.get_fit(store, as_of)
+    cached_seconds = time.perf_counter() - started
+
+    # One bond moves: a new store with new content must be refitted
+    changed_spreads = np.array(store.numbers['spread'])
+    changed_spreads[fit['rows'][0]] += 25
+    changed = BondStore(store.size, store.categories, store.codes,
+                        dict(store.numbers, spread=changed_spreads), store.dates, store.isin)
+    started = time.perf_counter()
+    refit = spread_curves.get_fit(changed, as_of)
+    refit_seconds = time.perf_counter() - started
+    print(f"Cached call {cached_seconds * 1e6:.0f}µs, refit after one bond changed {refit_seconds:.2f}s")
+
+    ok = (
+        first < args.budget
+        and worst < 1e-6
+        and abs(np.median(rmse) - args.noise) < 0.1 * args.noise
+        and cached is fit
+        and refit is not fit and refit['fitted'][0] != fit['fitted'][0]
+    )
+    ok &= check_insufficient_groups(args.as_of)
+    print(f"{'✅' if ok else '❌'} spread curves {'passed' if ok else 'failed'} (budget {args.budget:.0f}s)")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
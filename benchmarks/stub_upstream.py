@@ -0,0 +1,134 @@
+"""
+Local Upstream Stand-ins
+Tiny threaded HTTP servers that replace Alpha Vantage, CoinGecko and
+Investing.com in offline checks and benchmarks. Each stub replays a fixed
+payload (e.g. one recorded under fixtures/) or one built from the request
+path and form body after a configurable latency, fails a configurable share of requests
+(or those matching a predicate), and counts what it receives.
+"""
+
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import random
+import re
+import threading
+import time
+from urllib.parse import parse_qs
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def load_fixture(name):
+    """Raw bytes of a recorded upstream payload"""
+    with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+        return f.read()
+
+
+class StubUpstream:
+    """A local HTTP server replaying one payload for every GET or POST"""
+
+    def __init__(self, body, content_type='application/json', delay=0.0,
+                 jitter=0.0, failure_rate=0.0, failure_status=503, seed=None, fail_if=None):
+        """
+        Args:
+            body (str, bytes or callable): Payload of successful responses, or
+                a function of the request path (with query) and POST body
+                (bytes, None for a GET) returning it
+            content_type (str): Content-Type of successful responses
+            delay (float): Seconds to wait before answering
+            jitter (float): Extra random delay, uniform in [0, jitter] seconds
+            failure_rate (float): Share of requests answered with failure_status
+            failure_status (int): Status code of failed requests
+            seed (int): Seed of the latency and failure draws
+            fail_if (callable): Function of the request path and POST body
+                returning True for requests to fail whatever failure_rate
+        """
+        self.body = body.encode('utf-8') if isinstance(body, str) else body
+        self.paths = []
+        self.content_type = content_type
+        self.delay = delay
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.fail_if = fail_if
+        self.hits = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+        self._hits_lock = threading.Lock()
+        self._server = None
+
+    def start(self):
+        """Start serving on a free localhost port and return the base URL"""
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self._answer(None)
+
+            def do_POST(self):
+                self._answer(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+
+            def _answer(self, data):
+                with stub._hits_lock:
+                    stub.hits += 1
+                    delay = stub.delay + stub._random.uniform(0, stub.jitter)
+                    failed = stub._random.random() < stub.failure_rate or bool(
+                        stub.fail_if and stub.fail_if(self.path, data))
+                    stub.failures += failed
+                    stub.paths.append(self.path)
+                if delay:
+                    time.sleep(delay)
+                if failed:
+                    body, status, content_type = b'Service Unavailable', stub.failure_status, 'text/plain'
+                else:
+                    body, status, content_type = stub.body, 200, stub.content_type
+                    if callable(body):
+                        body = body(self.path, data)
+                        body = body.encode('utf-8') if isinstance(body, str) else body
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+def calendar_service(page):
+    """
+    Body function answering the calendar filtered-data service: the event
+    rows of page repeated for every day of the posted dateFrom..dateTo, with
+    their dates and row ids moved to that day.
+
+    Args:
+        page (str or bytes): Calendar page HTML (e.g. the recorded fixture)
+    """
+    page = page.decode('utf-8') if isinstance(page, bytes) else page
+    rows = re.search(r'<tbody[^>]*>(.*)</tbody>', page, re.S).group(1)
+
+    def answer(path, data):
+        form = parse_qs((data or b'').decode('utf-8'))
+        day = date.fromisoformat(form['dateFrom'][0])
+        last = date.fromisoformat(form['dateTo'][0])
+        chunks = []
+        while day <= last:
+            chunk = re.sub(r'data-event-datetime="\d{4}/\d{2}/\d{2}',
+                           f'data-event-datetime="{day:%Y/%m/%d}', rows)
+            chunks.append(re.sub(r'eventRowId_(\d+)', rf'eventRowId_{day.toordinal()}\1', chunk))
+            day += timedelta(days=1)
+        return json.dumps({'data': ''.join(chunks)})
+
+    return answer
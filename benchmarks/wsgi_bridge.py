@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+WSGI bridge check: the routes asgi.py hands to the Flask app go through
+its WSGI-over-ASGI bridge. Driven here with scripted ASGI receive/send
+calls and small WSGI apps, the bridge must pass status, headers, query and
+request body through, send streamed chunks as they are produced, stop and
+close the app's iterable when the client disconnects or stops reading,
+answer an error raised before the headers with a 500 and end the response
+of one raised after them, and honour start_response's exc_info. Two Flask
+routes (/health, the streamed /api/bonds/export) are checked end to end.
+
+Usage:
+    python3 benchmarks/wsgi_bridge.py
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ['UPSTREAM_CACHE_DIR'] = tempfile.mkdtemp(prefix='wsgi-bridge-')
+os.environ['METRICS_DIR'] = tempfile.mkdtemp(prefix='wsgi-bridge-metrics-')
+os.environ['BACKGROUND_REFRESH'] = '0'
+
+import asgi
+
+FLASK_APP = asgi.flask_app
+
+# Seconds a case may take
+CASE_TIMEOUT = 5
+
+
+def scope(path, method='GET', query=b'', headers=()):
+    return {'type': 'http', 'method': method, 'path': path, 'query_string': query, 'root_path': '',
+            'http_version': '1.1', 'scheme': 'http', 'server': ('127.0.0.1', 8000),
+            'client': ('127.0.0.1', 50000), 'headers': list(headers)}
+
+
+class Client:
+    """Scripted ASGI client: request body parts, disconnect on demand, optionally stalled"""
+
+    def __init__(self, body_parts=(b'',), stall=False):
+        self.requests = [{'type': 'http.request', 'body': part, 'more_body': i < len(body_parts) - 1}
+                         for i, part in enumerate(body_parts)]
+        self.gone = asyncio.Event()
+        self.stall = stall
+        self.messages = []  # (seconds since start, message)
+        self.started = time.monotonic()
+
+    async def receive(self):
+        if self.requests:
+            return self.requests.pop(0)
+        await self.gone.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if self.stall and message['type'] == 'http.response.body':
+            await asyncio.sleep(3600)
+        self.messages.append((time.monotonic() - self.started, message))
+
+    @property
+    def start(self):
+        return next((m for _, m in self.messages if m['type'] == 'http.response.start'), None)
+
+    @property
+    def chunks(self):
+        return [m.get('body', b'') for _, m in self.messages if m['type'] == 'http.response.body']
+
+    @property
+    def finished(self):
+        """Whether the last body message ended the response"""
+        bodies = [m for _, m in self.messages if m['type'] == 'http.response.body']
+        return bool(bodies) and not bodies[-1].get('more_body', False)
+
+
+async def call(wsgi_app, client, request_scope):
+    """Serve one request through asgi.app with wsgi_app behind the bridge"""
+    asgi.flask_app = wsgi_app
+    try:
+        await asyncio.wait_for(asgi.app(request_scope, client.receive, client.send), CASE_TIMEOUT)
+    finally:
+        asgi.flask_app = FLASK_APP
+    return client
+
+
+class Closing:
+    """Iterable of chunks that records whether the server closed it"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        self.closed = True
+
+
+async def check_headers():
+    def wsgi_app(environ, start_response):
+        start_response('201 Created', [('Content-Type', 'application/json'), ('Set-Cookie', 'a=1'),
+                                       ('Set-Cookie', 'b=2'), ('X-Trace', 'yes')])
+        return [json.dumps({'method': environ['REQUEST_METHOD'], 'query': environ['QUERY_STRING'],
+                            'header': environ.get('HTTP_X_CLIENT'), 'type': environ.get('CONTENT_TYPE'),
+                            'body': environ['wsgi.input'].read().decode('utf-8')}).encode('utf-8')]
+
+    client = await call(wsgi_app, Client([b'{"a":', b' 1}']), scope(
+        '/echo', 'POST', b'x=1&y=2', [(b'x-client', b'bench'), (b'content-type', b'application/json')]))
+    echoed = json.loads(b''.join(client.chunks))
+    headers = client.start['headers']
+    return (client.start['status'] == 201 and headers.count((b'set-cookie', b'a=1')) == 1
+            and (b'set-cookie', b'b=2') in headers and (b'x-trace', b'yes') in headers
+            and echoed == {'method': 'POST', 'query': 'x=1&y=2', 'header': 'bench',
+                           'type': 'application/json', 'body': '{"a": 1}'}
+            and client.finished), f"status {client.start['status']}, {len(headers)} headers, echoed {echoed}"
+
+
+async def check_streaming():
+    def wsgi_app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+
+        def chunks():
+            yield b'first'
+            time.sleep(0.3)
+            yield b'second'
+        return chunks()
+
+    client = await call(wsgi_app, Client(), scope('/stream'))
+    times = {m.get('body'): at for at, m in client.messages if m['type'] == 'http.response.body'}
+    gap = times.get(b'second', 0) - times.get(b'first', 0)
+    return gap >= 0.25 and client.finished, f"second chunk {gap * 1000:.0f}ms after the first"
+
+
+async def check_disconnect():
+    state = {'closed': False, 'produced': 0}
+
+    def wsgi_app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+
+        def chunks():
+            try:
+                while True:
+                    state['produced'] += 1
+                    yield b'tick\n'
+                    time.sleep(0.05)
+            finally:
+                state['closed'] = True
+        return chunks()
+
+    client = Client()
+
+    async def disconnect_soon():
+        await asyncio.sleep(0.3)
+        client.gone.set()
+
+    asyncio.ensure_future(disconnect_soon())
+    started = time.monotonic()
+    await call(wsgi_app, client, scope('/forever'))
+    elapsed = time.monotonic() - started
+    return state['closed'] and elapsed < 1.0, (f"stopped {elapsed * 1000:.0f}ms in, after "
+                                               f"{state['produced']} chunks, iterable closed: {state['closed']}")
+
+
+async def check_error_before_headers():
+    iterable = Closing(None)
+
+    def chunks():
+        raise RuntimeError('boom')
+        yield b''
+
+    def wsgi_app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        iterable.chunks = chunks()
+        return iterable
+
+    client = await call(wsgi_app, Client(), scope('/fails-early'))
+    body = json.loads(b''.join(client.chunks) or b'{}')
+    return (client.start['status'] == 500 and body.get('status') == 'error' and client.finished
+            and iterable.closed), f"status {client.start['status']}, body {body}, closed: {iterable.closed}"
+
+
+async def check_error_mid_stream():
+    iterable = Closing(None)
+
+    def chunks():
+        yield b'partial'
+        raise RuntimeError('boom')
+
+    def wsgi_app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        iterable.chunks = chunks()
+        return iterable
+
+    client = await call(wsgi_app, Client(), scope('/fails-late'))
+    return (client.start['status'] == 200 and b''.join(client.chunks) == b'partial' and client.finished
+            and iterable.closed), (f"status {client.start['status']}, body {b''.join(client.chunks)!r}, "
+                                   f"ended: {client.finished}, closed: {iterable.closed}")
+
+
+async def check_exc_info_before_headers():
+    def wsgi_app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        try:
+            raise ValueError('late failure')
+        except ValueError:
+            start_response('503 Service Unavailable', [('Content-Type', 'text/plain')], sys.exc_info())
+        return [b'unavailable']
+
+    client = await call(wsgi_app, Client(), scope('/replaced'))
+    return (client.start['status'] == 503 and b''.join(client.chunks) == b'unavailable'
+            and client.finished), f"status {client.start['status']}"
+
+
+async def check_exc_info_after_headers():
+    raised = {}
+
+    def wsgi_app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+
+        def chunks():
+            yield b'sent'
+            try:
+                raise ValueError('too late')
+            except ValueError:
+                try:
+                    start_response('500 Internal Server Error', [], sys.exc_info())
+                except ValueError as e:
+                    raised['error'] = e
+                    raise
+            yield b'never'
+        return chunks()
+
+    client = await call(wsgi_app, Client(), scope('/too-late'))
+    return ('error' in raised and client.start['status'] == 200 and b''.join(client.chunks) == b'sent'
+            and client.finished), f"re-raised: {'error' in raised}, status {client.start['status']}"
+
+
+async def check_stalled_client():
+    state = {'closed': False}
+
+    def wsgi_app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+
+        def chunks():
+            try:
+                while True:
+                    yield b'x' * 65536
+            finally:
+                state['closed'] = True
+        return chunks()
+
+    asgi.SEND_TIMEOUT = 0.5
+    started = time.monotonic()
+    try:
+        await call(wsgi_app, Client(stall=True), scope('/stalled'))
+    finally:
+        asgi.SEND_TIMEOUT = float(os.environ.get('ASGI_SEND_TIMEOUT', 30))
+    elapsed = time.monotonic() - started
+    return state['closed'] and elapsed < 2.0, (f"thread released {elapsed * 1000:.0f}ms in, "
+                                               f"iterable closed: {state['closed']}")
+
+
+async def check_flask_routes():
+    from api import bond_export
+
+    health = await call(FLASK_APP, Client(), scope('/health'))
+    bond_export.EXPORT_CHUNK_ROWS = 100  # Several chunks out of the bundled emissions
+    export = await call(FLASK_APP, Client(), scope('/api/bonds/export', query=b'format=ndjson'))
+    rows = b''.join(export.chunks).splitlines()
+    content_type = dict(health.start['headers']).get(b'content-type')
+    passed = (health.start['status'] == 200 and content_type == b'application/json' and health.finished
+              and export.start['status'] == 200 and len(export.chunks) > 2 and len(rows) > 100
+              and all(json.loads(row) for row in rows) and export.finished)
+    return passed, f"/health {health.start['status']}, export {len(rows)} rows in {len(export.chunks)} messages"
+
+
+CHECKS = {
+    'status, headers, query and body': check_headers,
+    'chunks sent as produced': check_streaming,
+    'client disconnect': check_disconnect,
+    'error before the headers': check_error_before_headers,
+    'error mid-stream': check_error_mid_stream,
+    'exc_info before the headers': check_exc_info_before_headers,
+    'exc_info after the headers': check_exc_info_after_headers,
+    'stalled client': check_stalled_client,
+    'Flask routes': check_flask_routes,
+}
+
+
+async def run_checks():
+    ok = True
+    for name, check in CHECKS.items():
+        try:
+            passed, detail = await check()
+        except Exception as e:
+            passed, detail = False, repr(e)
+        ok &= passed
+        print(f"{'✅' if passed else '❌'} {name}: {detail}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.parse_args()
+
+    ok = asyncio.run(run_checks())
+    print(f"\n{'✅' if ok else '❌'} WSGI bridge {'passed' if ok else 'failed'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -167,6 +167,43 @@ class DigitalAssetsTerminal {
         const data = await this.fetchData();
         this.renderTable(data);
 
+        // Live updates when the API serves /api/stream, polling otherwise
+        this.subscribe();
+    }
+
+    getStreamUrl() {
+        return this.apiUrl.replace('/api/digital-bonds', '/api/stream?topics=digital_bonds');
+    }
+
+    subscribe() {
+        if (!window.EventSource) {
+            this.startPolling();
+            return;
+        }
+
+        const source = new EventSource(this.getStreamUrl());
+        let connected = false;
+
+        source.addEventListener('digital_bonds', (event) => {
+            connected = true;
+            const data = JSON.parse(event.data);
+            if (data.status === 'success') {
+                console.log('📡 Live digital assets update');
+                this.setCache(data);
+                this.renderTable(data);
+            }
+        });
+
+        source.onerror = () => {
+            // Stream not available (e.g. serverless deployment): poll instead
+            if (!connected) {
+                source.close();
+                this.startPolling();
+            }
+        };
+    }
+
+    startPolling() {
         // Auto-refresh every 5 minutes
         setInterval(async () => {
             console.log('🔄 Auto-refreshing digital assets data...');
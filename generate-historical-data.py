@@ -2,10 +2,19 @@
 """
 Generate realistic Traditional Covered Bonds data for 2010-2026
 Creates ~480 emissions with historically accurate characteristics
+
+With --count N, generates N emissions for load testing instead: same
+issuer, country, period and amount distributions, drawn in seeded NumPy
+batches and streamed chunk by chunk, so memory stays flat whatever N.
+    python3 generate-historical-data.py --count 5000000 --seed 7 --format ndjson
+    python3 generate-historical-data.py --count 5000000 --format snapshot --index
 """
 
+import argparse
 import json
+import os
 import random
+import sys
 from datetime import datetime, timedelta
 
 # Émetteurs principaux par pays
@@ -99,6 +108,38 @@ PERIODS = {
     "2024-2026": {"coupon_range": (2.75, 4.0), "spread_range": (40, 60), "green_prob": 0.15},
 }
 
+# Montants par devise (millions)
+AMOUNTS = {
+    "SEK": [2000, 3000, 4000, 5000, 6000],
+    "DKK": [1500, 2000, 2500, 3000, 3500],
+    "NOK": [1000, 1500, 2000, 2500],
+    "GBP": [300, 500, 750, 1000],
+    "EUR": [250, 500, 750, 1000, 1250, 1500, 2000],
+}
+
+COUNTRY_CODES = {
+    "Germany": "DE", "France": "FR", "Spain": "ES", "Netherlands": "NL",
+    "Sweden": "SE", "Denmark": "DK", "Norway": "NO", "Canada": "CA",
+    "UK": "GB", "Italy": "IT", "Austria": "AT", "Belgium": "BE", "Portugal": "PT"
+}
+
+# Distribution par année
+EMISSIONS_PER_YEAR = {
+    2010: 20, 2011: 22, 2012: 24, 2013: 26, 2014: 28,
+    2015: 30, 2016: 32, 2017: 34, 2018: 36, 2019: 38,
+    2020: 40, 2021: 42, 2022: 44, 2023: 46
+}
+
+# Distribution géographique (en pourcentage)
+COUNTRY_WEIGHTS = {
+    "Germany": 0.35, "France": 0.25, "Sweden": 0.10, "Denmark": 0.05,
+    "Netherlands": 0.08, "Spain": 0.05, "Norway": 0.03, "Canada": 0.04,
+    "UK": 0.03, "Italy": 0.01, "Austria": 0.005, "Belgium": 0.005, "Portugal": 0.005
+}
+
+# Date de référence du statut (Upcoming / Active / Mature)
+TODAY = datetime(2026, 1, 12)
+
 def get_period_params(year):
     """Get parameters for a specific year"""
     if year <= 2011:
@@ -120,12 +161,7 @@ def get_period_params(year):
 
 def generate_isin(country, year, index):
     """Generate a realistic ISIN"""
-    country_codes = {
-        "Germany": "DE", "France": "FR", "Spain": "ES", "Netherlands": "NL",
-        "Sweden": "SE", "Denmark": "DK", "Norway": "NO", "Canada": "CA",
-        "UK": "GB", "Italy": "IT", "Austria": "AT", "Belgium": "BE", "Portugal": "PT"
-    }
-    code = country_codes.get(country, "XX")
+    code = COUNTRY_CODES.get(country, "XX")
     return f"{code}{random.randint(1000, 9999)}{year % 100:02d}{index:04d}"
 
 def generate_emission(country, issuer_data, issue_date, index):
@@ -138,16 +174,7 @@ def generate_emission(country, issuer_data, issue_date, index):
     
     # Montant (varie selon la devise)
     currency = CURRENCIES[country]
-    if currency == "SEK":
-        amount = random.choice([2000, 3000, 4000, 5000, 6000])
-    elif currency == "DKK":
-        amount = random.choice([1500, 2000, 2500, 3000, 3500])
-    elif currency == "NOK":
-        amount = random.choice([1000, 1500, 2000, 2500])
-    elif currency == "GBP":
-        amount = random.choice([300, 500, 750, 1000])
-    else:  # EUR
-        amount = random.choice([250, 500, 750, 1000, 1250, 1500, 2000])
+    amount = random.choice(AMOUNTS[currency])
     
     # Maturité (3-10 ans)
     maturity_years = random.choice([3, 5, 7, 10])
@@ -158,10 +185,9 @@ def generate_emission(country, issuer_data, issue_date, index):
     spread = random.randint(*params["spread_range"])
     
     # Statut
-    today = datetime(2026, 1, 12)
-    if issue_date > today:
+    if issue_date > TODAY:
         status = "Upcoming"
-    elif maturity_date < today:
+    elif maturity_date < TODAY:
         status = "Mature"
     else:
         status = "Active"
@@ -192,28 +218,14 @@ def generate_all_emissions():
     emissions = []
     index = 0
     
-    # Distribution par année
-    emissions_per_year = {
-        2010: 20, 2011: 22, 2012: 24, 2013: 26, 2014: 28,
-        2015: 30, 2016: 32, 2017: 34, 2018: 36, 2019: 38,
-        2020: 40, 2021: 42, 2022: 44, 2023: 46
-    }
-    
-    # Distribution géographique (en pourcentage)
-    country_weights = {
-        "Germany": 0.35, "France": 0.25, "Sweden": 0.10, "Denmark": 0.05,
-        "Netherlands": 0.08, "Spain": 0.05, "Norway": 0.03, "Canada": 0.04,
-        "UK": 0.03, "Italy": 0.01, "Austria": 0.005, "Belgium": 0.005, "Portugal": 0.005
-    }
-    
     for year in range(2010, 2024):
-        num_emissions = emissions_per_year[year]
+        num_emissions = EMISSIONS_PER_YEAR[year]
         
         for _ in range(num_emissions):
             # Sélectionner un pays selon les poids
             country = random.choices(
-                list(country_weights.keys()),
-                weights=list(country_weights.values())
+                list(COUNTRY_WEIGHTS.keys()),
+                weights=list(COUNTRY_WEIGHTS.values())
             )[0]
             
             # Sélectionner un émetteur
@@ -231,7 +243,265 @@ def generate_all_emissions():
     
     return emissions
 
+# ----------------------------------------------------------------------
+# Batch generation (--count)
+# ----------------------------------------------------------------------
+
+# Field order of the emission records
+RECORD_FIELDS = ("issuer", "amount", "currency", "type", "issueDate", "maturity",
+                 "coupon", "spread", "status", "rating", "greenBond", "country", "isin")
+
+CATEGORICAL_FIELDS = ("issuer", "currency", "type", "status", "rating", "country", "greenBond")
+
+MATURITY_YEARS = [3, 5, 7, 10]
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+class EmissionTables:
+    """Lookup tables turning the distributions above into NumPy arrays"""
+
+    def __init__(self, np):
+        self.years = np.array(sorted(EMISSIONS_PER_YEAR), dtype=np.int32)
+        per_year = np.array([EMISSIONS_PER_YEAR[y] for y in self.years], dtype=np.float64)
+        self.year_p = per_year / per_year.sum()
+
+        countries = list(COUNTRY_WEIGHTS)
+        weights = np.array(list(COUNTRY_WEIGHTS.values()), dtype=np.float64)
+        self.country_p = weights / weights.sum()
+
+        # Dictionaries of each categorical column, sorted as in the bond store
+        types = set()
+        for issuers in ISSUERS.values():
+            for issuer in issuers:
+                types.add(issuer["type"])
+                types.add(issuer["type"] if "Green" in issuer["type"] else f"Green {issuer['type']}")
+        self.categories = {
+            "issuer": sorted({i["name"] for issuers in ISSUERS.values() for i in issuers}),
+            "currency": sorted(AMOUNTS),
+            "type": sorted(types),
+            "status": ["Active", "Mature", "Upcoming"],
+            "rating": sorted({i["rating"] for issuers in ISSUERS.values() for i in issuers}),
+            "country": sorted(countries),
+            "greenBond": [False, True],
+        }
+        code = {field: {v: c for c, v in enumerate(values)} for field, values in self.categories.items()}
+
+        # Country (in COUNTRY_WEIGHTS order) -> dictionary code, currency, ISIN prefix
+        self.country_code = np.array([code["country"][c] for c in countries], dtype=np.int32)
+        self.country_currency = np.array([code["currency"][CURRENCIES[c]] for c in countries], dtype=np.int32)
+        self.country_prefix = np.array(
+            [list(COUNTRY_CODES.get(c, "XX").encode()) for c in countries], dtype=np.uint8
+        )
+
+        # Issuers flattened country by country
+        flat = [issuer for c in countries for issuer in ISSUERS[c]]
+        self.issuer_count = np.array([len(ISSUERS[c]) for c in countries], dtype=np.int64)
+        self.issuer_offset = np.concatenate(([0], np.cumsum(self.issuer_count)[:-1]))
+        self.issuer_name = np.array([code["issuer"][i["name"]] for i in flat], dtype=np.int32)
+        self.issuer_rating = np.array([code["rating"][i["rating"]] for i in flat], dtype=np.int32)
+        self.issuer_type = np.array([code["type"][i["type"]] for i in flat], dtype=np.int32)
+        self.issuer_green_type = np.array(
+            [code["type"][i["type"] if "Green" in i["type"] else f"Green {i['type']}"] for i in flat],
+            dtype=np.int32
+        )
+
+        # Amount choices per currency code, padded to the longest list
+        width = max(len(a) for a in AMOUNTS.values())
+        self.amounts = np.zeros((len(AMOUNTS), width), dtype=np.float64)
+        self.amount_count = np.zeros(len(AMOUNTS), dtype=np.int64)
+        for currency, amounts in AMOUNTS.items():
+            self.amounts[code["currency"][currency], :len(amounts)] = amounts
+            self.amount_count[code["currency"][currency]] = len(amounts)
+
+        # Period parameters per year of EMISSIONS_PER_YEAR
+        params = [get_period_params(int(y)) for y in self.years]
+        self.coupon_low = np.array([p["coupon_range"][0] for p in params])
+        self.coupon_high = np.array([p["coupon_range"][1] for p in params])
+        self.spread_low = np.array([p["spread_range"][0] for p in params], dtype=np.int64)
+        self.spread_high = np.array([p["spread_range"][1] for p in params], dtype=np.int64)
+        self.green_prob = np.array([p["green_prob"] for p in params])
+
+        self.status_code = {s: code["status"][s] for s in self.categories["status"]}
+
+def generate_emission_batches(count, seed=42, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Generate count emissions as columnar NumPy batches.
+
+    Rows come year by year like generate_all_emissions(): the number of
+    emissions per year is drawn once, then each chunk covers the next slice
+    of that ordering. The same seed and chunk size give the same output.
+
+    Args:
+        count (int): Number of emissions
+        seed (int): Random seed
+        chunk_size (int): Rows per batch
+
+    Yields:
+        dict: field -> array for the chunk; categorical fields hold int32
+        codes into tables.categories, dates are datetime64[D], isin is S12
+    """
+    import numpy as np
+
+    tables = EmissionTables(np)
+    rng = np.random.default_rng(seed)
+    year_ends = np.cumsum(rng.multinomial(count, tables.year_p))
+    today = np.datetime64(TODAY.date(), "D")
+
+    for start in range(0, count, chunk_size):
+        index = np.arange(start, min(start + chunk_size, count), dtype=np.int64)
+        n = len(index)
+        period = np.searchsorted(year_ends, index, side="right")
+        years = tables.years[period]
+
+        country = rng.choice(len(tables.country_p), size=n, p=tables.country_p)
+        issuer = tables.issuer_offset[country] + (rng.random(n) * tables.issuer_count[country]).astype(np.int64)
+        currency = tables.country_currency[country]
+
+        months = rng.integers(0, 12, size=n)
+        days = rng.integers(0, 28, size=n)
+        issue_date = ((years - 1970) * 12 + months).astype("datetime64[M]").astype("datetime64[D]") + days
+        maturity = issue_date + 365 * np.array(MATURITY_YEARS)[rng.integers(0, len(MATURITY_YEARS), size=n)]
+
+        is_green = rng.random(n) < tables.green_prob[period]
+        amount_pick = (rng.random(n) * tables.amount_count[currency]).astype(np.int64)
+        coupon = np.round(rng.uniform(tables.coupon_low[period], tables.coupon_high[period]), 3)
+        spread = rng.integers(tables.spread_low[period], tables.spread_high[period] + 1).astype(np.float64)
+
+        status = np.full(n, tables.status_code["Active"], dtype=np.int32)
+        status[maturity < today] = tables.status_code["Mature"]
+        status[issue_date > today] = tables.status_code["Upcoming"]
+
+        # ISIN: country prefix, issue year and the 8-digit row number, so
+        # codes stay 12 characters long and unique up to 100M emissions
+        isin = np.empty((n, 12), dtype=np.uint8)
+        isin[:, :2] = tables.country_prefix[country]
+        isin[:, 2] = 48 + (years % 100) // 10
+        isin[:, 3] = 48 + years % 10
+        isin[:, 4:] = 48 + (index[:, None] // 10 ** np.arange(7, -1, -1)) % 10
+
+        yield {
+            "issuer": tables.issuer_name[issuer],
+            "amount": tables.amounts[currency, amount_pick],
+            "currency": currency,
+            "type": np.where(is_green, tables.issuer_green_type[issuer], tables.issuer_type[issuer]),
+            "issueDate": issue_date,
+            "maturity": maturity,
+            "coupon": coupon,
+            "spread": spread,
+            "status": status,
+            "rating": tables.issuer_rating[issuer],
+            "greenBond": is_green.astype(np.int32),
+            "country": tables.country_code[country],
+            "isin": isin.view("S12").ravel(),
+        }
+
+def write_ndjson(batches, categories, out):
+    """Write batches as one JSON emission per line, same fields as the JSON file"""
+    # JSON encoding of every dictionary value, computed once
+    encoded = {
+        field: [json.dumps(v, ensure_ascii=False) for v in values]
+        for field, values in categories.items()
+    }
+    line = ", ".join(f'"{field}": %s' for field in RECORD_FIELDS)
+    line = "{" + line + "}\n"
+
+    count = 0
+    for batch in batches:
+        columns = []
+        for field in RECORD_FIELDS:
+            values = batch[field]
+            if field in encoded:
+                values = [encoded[field][c] for c in values.tolist()]
+            elif field in ("amount", "spread"):
+                values = values.astype("int64").tolist()
+            elif field == "coupon":
+                values = values.tolist()
+            else:
+                values = ['"%s"' % v for v in values.astype(str).tolist()]
+            columns.append(values)
+        out.write("".join(line % row for row in zip(*columns)))
+        count += len(columns[0])
+    return count
+
+def write_snapshot(batches, categories, count, path):
+    """
+    Write batches as a bond store snapshot (api/snapshot.py), column by
+    column as chunks arrive. The API maps it at startup instead of parsing.
+    """
+    import numpy as np
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from api.snapshot import SnapshotWriter
+
+    def column_name(field):
+        if field in CATEGORICAL_FIELDS:
+            return f"codes.{field}"
+        if field in ("issueDate", "maturity"):
+            return f"dates.{field}"
+        if field == "isin":
+            return "isin"
+        return f"numbers.{field}"
+
+    dtypes = {column_name(f): np.int32 if f in CATEGORICAL_FIELDS else np.float64 for f in RECORD_FIELDS}
+    dtypes.update({"dates.issueDate": np.int32, "dates.maturity": np.int32, "isin": "S12"})
+    lengths = {name: count for name in dtypes}
+
+    with SnapshotWriter(path, count, categories, lengths, dtypes) as writer:
+        for batch in batches:
+            for field, values in batch.items():
+                if field in ("issueDate", "maturity"):
+                    values = values.astype(np.int32)  # days since 1970-01-01
+                writer.write(column_name(field), values)
+
+def index_snapshot(path):
+    """Store the bond store's posting lists in the snapshot (memory grows with N)"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from api.bond_store import BondStore
+
+    BondStore.from_snapshot(path).to_snapshot(path)
+
+def generate_batch_output(count, seed, output_format, output, chunk_size, index=False):
+    """Generate count emissions into output, as NDJSON or a snapshot"""
+    import numpy as np
+
+    categories = EmissionTables(np).categories
+    batches = generate_emission_batches(count, seed=seed, chunk_size=chunk_size)
+
+    if output_format == "snapshot":
+        # Not the API's snapshot path: a newer snapshot there would be served
+        output = output or "traditional-bonds-loadtest.snapshot"
+        write_snapshot(batches, categories, count, output)
+        if index:
+            index_snapshot(output)
+    elif output == "-":
+        write_ndjson(batches, categories, sys.stdout)
+    else:
+        output = output or "traditional-bonds-historical-data.ndjson"
+        with open(output, "w", encoding="utf-8") as f:
+            write_ndjson(batches, categories, f)
+    return output
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate Traditional Covered Bonds emissions")
+    parser.add_argument("--count", type=int,
+                        help="Number of emissions to generate in batch mode (default: the ~480 historical set)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (batch mode)")
+    parser.add_argument("--format", choices=["ndjson", "snapshot"], default="ndjson",
+                        help="Batch output: NDJSON lines or a binary bond store snapshot")
+    parser.add_argument("--output", help="Output file or directory ('-' for NDJSON on stdout)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per batch")
+    parser.add_argument("--index", action="store_true",
+                        help="Also store the query indexes in the snapshot, so workers map them "
+                             "instead of building them (needs memory proportional to N)")
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    args = parse_args()
+    if args.count is not None:
+        output = generate_batch_output(args.count, args.seed, args.format, args.output,
+                                       args.chunk_size, args.index)
+        print(f"Generated {args.count} emissions (seed {args.seed}) into {output}", file=sys.stderr)
+        sys.exit(0)
+
     print("Generating Traditional Covered Bonds data (2010-2023)...")
     emissions = generate_all_emissions()
     
@@ -1,125 +1,330 @@
 #!/usr/bin/env python3
 """
-Merge historical data (2010-2023) with existing data (2024-2026)
-and create the complete traditional-bonds-data.js file
+Merge new emissions (e.g. the generated 2010-2023 history) into the
+dataset of traditional-bonds-data.js, keyed by ISIN, and write the result
+as the JS bundle, as JSON and as a binary snapshot for the API.
+
+The JS file is tokenized once (strings, comments and nested literals are
+handled properly, so a brace inside a string cannot split an object) and
+each emission keeps the exact source text it was parsed from. Merging then
+only touches what changed: new ISINs are appended, emissions whose fields
+differ are re-rendered, every other emission is copied through verbatim,
+and nothing is rewritten at all when the run brings no change. Outputs are
+written record by record to a temporary file, then atomically replaced.
+
+Usage:
+    python3 merge-data.py [traditional-bonds-historical-data.json | emissions.ndjson ...]
 """
 
+import argparse
+import itertools
 import json
+import os
 import re
+import stat
+import sys
+import tempfile
+
+DATA_ARRAY = 'traditionalBondsData'
+
+# Snapshot the API maps at startup (BONDS_SNAPSHOT_FILE of api/bond_store.py)
+API_SNAPSHOT = os.environ.get('BONDS_SNAPSHOT_FILE', os.path.splitext(os.environ.get(
+    'BONDS_DATA_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'traditional-bonds-historical-data.json')
+))[0] + '.snapshot')
+
+# Field order of rendered emissions
+RECORD_FIELDS = ('issuer', 'amount', 'currency', 'type', 'issueDate', 'maturity',
+                 'coupon', 'spread', 'status', 'rating', 'greenBond', 'country', 'isin')
+
+TOKEN = re.compile(r'''
+    (?P<space>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+  | (?P<number>-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<name>[A-Za-z_$][\w$]*)
+  | (?P<punct>[{}\[\]:,=;])
+''', re.VERBOSE | re.DOTALL)
+
+LITERALS = {'true': True, 'false': False, 'null': None, 'undefined': None}
+
+
+class JSSyntaxError(ValueError):
+    pass
+
+
+class Tokenizer:
+    """Yields (kind, text, start, end) over JS source, skipping whitespace and comments"""
+
+    def __init__(self, source, pos=0):
+        self.source = source
+        self.pos = pos
+        self.peeked = None
+
+    def next(self):
+        if self.peeked is not None:
+            token, self.peeked = self.peeked, None
+            return token
+        while self.pos < len(self.source):
+            match = TOKEN.match(self.source, self.pos)
+            if match is None:
+                raise JSSyntaxError(f"Unexpected character at offset {self.pos}: {self.source[self.pos]!r}")
+            self.pos = match.end()
+            if match.lastgroup not in ('space', 'comment'):
+                return match.lastgroup, match.group(), match.start(), match.end()
+        return None, '', self.pos, self.pos
+
+    def peek(self):
+        if self.peeked is None:
+            self.peeked = self.next()
+        return self.peeked
+
+    def expect(self, text):
+        token = self.next()
+        if token[1] != text:
+            raise JSSyntaxError(f"Expected {text!r} at offset {token[2]}, found {token[1]!r}")
+        return token
+
+
+def _string_value(text):
+    if text[0] == "'":
+        text = '"' + text[1:-1].replace("\\'", "'").replace('"', '\\"') + '"'
+    return json.loads(text)
+
+
+def parse_value(tokens):
+    """Parse one JS literal (object, array, string, number, true/false/null)"""
+    kind, text, start, _ = tokens.next()
+    if text == '{':
+        value = {}
+        while tokens.peek()[1] != '}':
+            key_kind, key, _, _ = tokens.next()
+            if key_kind not in ('name', 'string', 'number'):
+                raise JSSyntaxError(f"Bad object key {key!r} at offset {start}")
+            tokens.expect(':')
+            value[_string_value(key) if key_kind == 'string' else key] = parse_value(tokens)
+            if tokens.peek()[1] == ',':
+                tokens.next()
+        tokens.next()
+        return value
+    if text == '[':
+        value = []
+        while tokens.peek()[1] != ']':
+            value.append(parse_value(tokens))
+            if tokens.peek()[1] == ',':
+                tokens.next()
+        tokens.next()
+        return value
+    if kind == 'string':
+        return _string_value(text)
+    if kind == 'number':
+        number = float(text)
+        return int(number) if re.fullmatch(r'-?\d+', text) else number
+    if kind == 'name' and text in LITERALS:
+        return LITERALS[text]
+    raise JSSyntaxError(f"Unexpected token {text!r} at offset {start}")
+
+
+class JSDataset:
+    """
+    The emissions array of the JS bundle, with the source text around it.
+
+    Attributes:
+        head (str): Source before the first emission (header comment, 'const ... = [')
+        records (list): (leading text, object text, parsed dict) per emission,
+            the leading text holding the separator and comments before it
+        tail (str): Source from the end of the last emission on ('];', other consts)
+    """
+
+    def __init__(self, source, array_name=DATA_ARRAY):
+        declaration = re.search(rf'\b(?:const|let|var)\s+{array_name}\s*=\s*\[', source)
+        if declaration is None:
+            raise JSSyntaxError(f"No '{array_name}' array found")
+
+        tokens = Tokenizer(source, declaration.end())
+        self.records = []
+        previous_end = declaration.end()
+        while True:
+            kind, text, start, _ = tokens.peek()
+            if text == ']':
+                break
+            if text != '{':
+                raise JSSyntaxError(f"Expected an emission object at offset {start}, found {text!r}")
+            record = parse_value(tokens)
+            end = tokens.pos if tokens.peeked is None else tokens.peeked[2]
+            self.records.append((source[previous_end:start], source[start:end], record))
+            previous_end = end
+            if tokens.peek()[1] == ',':
+                previous_end = tokens.next()[3]
+
+        self.head = source[:declaration.end()]
+        self.tail = source[previous_end:]
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(f.read())
+
+
+def record_key(record):
+    """Merge key: the ISIN, or issuer and issue date for emissions without one yet"""
+    return record.get('isin') or f"{record.get('issuer')}|{record.get('issueDate')}"
+
+
+def iter_emissions(path):
+    """Stream emissions from a JSON array file or an NDJSON file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == '[':
+            yield from json.load(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def render_js(record, indent='    '):
+    """Emission as a JS object literal, in the layout of traditional-bonds-data.js"""
+    fields = [f for f in RECORD_FIELDS if f in record] + [f for f in record if f not in RECORD_FIELDS]
+    lines = [f"{indent}    {field}: {json.dumps(record[field], ensure_ascii=False)}" for field in fields]
+    return '{\n' + ',\n'.join(lines) + f'\n{indent}}}'
+
+
+def merge(dataset, emissions):
+    """
+    Upsert emissions into the dataset by record_key().
+
+    Returns:
+        tuple: (entries, stats) where entries is a list of
+        [leading text, object text or None if it must be rendered, record]
+        and stats counts 'added', 'updated' and 'unchanged' emissions
+    """
+    entries = [[lead, text, record] for lead, text, record in dataset.records]
+    index = {record_key(entry[2]): entry for entry in entries}
+    stats = {'added': 0, 'updated': 0}
+
+    for emission in emissions:
+        key = record_key(emission)
+        entry = index.get(key)
+        if entry is None:
+            entry = index[key] = ['\n    ', None, emission]
+            entries.append(entry)
+            stats['added'] += 1
+        elif any(entry[2].get(field) != value for field, value in emission.items()):
+            # Fields absent from the new emission (e.g. notes) are kept
+            if entry[1] is not None:
+                stats['updated'] += 1
+            entry[1], entry[2] = None, {**entry[2], **emission}
+
+    stats['unchanged'] = sum(1 for entry in entries if entry[1] is not None)
+    return entries, stats
+
+
+def _atomic_write(path, write):
+    """Stream content through write(f) into a temporary file, then move it into place"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.merge-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            write(f)
+        # Keep the permissions of the file being replaced (mkstemp uses 0600)
+        mode = stat.S_IMODE(os.stat(path).st_mode) if os.path.exists(path) else 0o644
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_js(path, dataset, entries):
+    head = re.sub(r'(// Total: )\d+( emissions)', rf'\g<1>{len(entries)}\g<2>', dataset.head, count=1)
+
+    def write(f):
+        f.write(head)
+        for i, (lead, text, record) in enumerate(entries):
+            f.write(lead)
+            f.write(text if text is not None else render_js(record))
+            if i < len(entries) - 1:
+                f.write(',')
+        f.write(dataset.tail)
+
+    _atomic_write(path, write)
+
+
+def write_json(path, entries):
+    def write(f):
+        f.write('[')
+        for i, (_, _, record) in enumerate(entries):
+            f.write(',\n  ' if i else '\n  ')
+            f.write(json.dumps(record, ensure_ascii=False))
+        f.write('\n]\n')
+
+    _atomic_write(path, write)
+
+
+def write_snapshot(path, entries):
+    """Binary snapshot the API maps at startup instead of parsing the JSON"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from api.bond_store import BondStore
+
+    BondStore.from_records([record for _, _, record in entries]).to_snapshot(path)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Merge emissions into traditional-bonds-data.js')
+    parser.add_argument('inputs', nargs='*', default=['traditional-bonds-historical-data.json'],
+                        help='JSON array or NDJSON files of emissions to merge')
+    parser.add_argument('--dataset', default='traditional-bonds-data.js',
+                        help='JS bundle holding the current dataset')
+    parser.add_argument('--js-output', help='JS bundle to write (default: update --dataset in place)')
+    parser.add_argument('--json-output', default='traditional-bonds-data.json',
+                        help="JSON copy of the merged emissions ('' to skip)")
+    parser.add_argument('--snapshot-output', default=API_SNAPSHOT,
+                        help="Binary bond store snapshot of the merged emissions, by default the one "
+                             "the API maps ('' to skip)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    js_output = args.js_output or args.dataset
+
+    dataset = JSDataset.from_file(args.dataset)
+    print(f"Found {len(dataset.records)} existing emissions in {args.dataset}")
+
+    emissions = itertools.chain.from_iterable(iter_emissions(path) for path in args.inputs)
+    entries, stats = merge(dataset, emissions)
+    print(f"Merged {', '.join(args.inputs)}: {stats['added']} added, "
+          f"{stats['updated']} updated, {stats['unchanged']} unchanged")
+
+    changed = stats['added'] or stats['updated']
+    if changed or not os.path.exists(js_output):
+        write_js(js_output, dataset, entries)
+        print(f"\n✅ Wrote {js_output}")
+    if args.json_output and (changed or not os.path.exists(args.json_output)):
+        write_json(args.json_output, entries)
+        print(f"✅ Wrote {args.json_output}")
+    if args.snapshot_output and (changed or not os.path.exists(args.snapshot_output)):
+        write_snapshot(args.snapshot_output, entries)
+        print(f"✅ Wrote {args.snapshot_output}")
+    if not changed:
+        print("\nNo change since the last merge")
+
+    records = [record for _, _, record in entries]
+    green = sum(1 for r in records if r.get('greenBond'))
+    print(f"\n📊 Total emissions: {len(records)}")
+    if records:
+        print(f"🌱 Green bonds: {green} ({green / len(records) * 100:.1f}%)")
+        dates = [r['issueDate'] for r in records if r.get('issueDate')]
+        print(f"📅 Date range: {min(dates)} to {max(dates)}")
+
 
-# Charger les données historiques
-with open('traditional-bonds-historical-data.json', 'r') as f:
-    historical_data = json.load(f)
-
-# Charger les données existantes 2024-2026 depuis traditional-bonds-data.js
-with open('traditional-bonds-data.js', 'r') as f:
-    existing_content = f.read()
-
-# Extraire les données 2024-2026 existantes
-# On cherche le tableau traditionalBondsData
-match = re.search(r'const traditionalBondsData = \[(.*?)\];', existing_content, re.DOTALL)
-if match:
-    # Parser manuellement les objets JavaScript
-    existing_data_str = match.group(1)
-    # Pour simplifier, on va juste compter combien il y en a
-    existing_count = existing_data_str.count('"issuer":') + existing_data_str.count('issuer:')
-    print(f"Found {existing_count} existing emissions (2024-2026)")
-else:
-    print("Could not find existing data")
-    existing_count = 0
-
-# Extraire les données secondaires et news
-secondary_match = re.search(r'const traditionalSecondaryMarket = \{(.*?)\};', existing_content, re.DOTALL)
-news_match = re.search(r'const traditionalNews = \[(.*?)\];', existing_content, re.DOTALL)
-
-secondary_data = secondary_match.group(0) if secondary_match else ""
-news_data = news_match.group(0) if news_match else ""
-
-# Créer le nouveau fichier JavaScript
-js_content = '''// ============================================
-// TRADITIONAL COVERED BONDS DATA
-// Historical Market Data 2010-2026
-// Total: ''' + str(len(historical_data) + existing_count) + ''' emissions
-// ============================================
-
-// ============================================
-// PRIMARY MARKET - EMISSIONS (2010-2026)
-// ============================================
-const traditionalBondsData = [
-'''
-
-# Ajouter les données historiques (2010-2023)
-for i, emission in enumerate(historical_data):
-    js_content += '    {\n'
-    js_content += f'        issuer: "{emission["issuer"]}",\n'
-    js_content += f'        amount: {emission["amount"]},\n'
-    js_content += f'        currency: "{emission["currency"]}",\n'
-    js_content += f'        type: "{emission["type"]}",\n'
-    js_content += f'        issueDate: "{emission["issueDate"]}",\n'
-    js_content += f'        maturity: "{emission["maturity"]}",\n'
-    js_content += f'        coupon: {emission["coupon"]},\n'
-    js_content += f'        spread: {emission["spread"]},\n'
-    js_content += f'        status: "{emission["status"]}",\n'
-    js_content += f'        rating: "{emission["rating"]}",\n'
-    js_content += f'        greenBond: {str(emission["greenBond"]).lower()},\n'
-    js_content += f'        country: "{emission["country"]}",\n'
-    js_content += f'        isin: "{emission["isin"]}"\n'
-    js_content += '    },\n'
-
-# Ajouter un commentaire pour séparer
-js_content += '\n    // ============================================\n'
-js_content += '    // EMISSIONS 2024-2026 (Current Period)\n'
-js_content += '    // ============================================\n'
-
-# Extraire et ajouter les données 2024-2026 existantes
-if match:
-    # On va extraire chaque objet individuellement
-    objects = []
-    current_obj = ""
-    brace_count = 0
-    in_object = False
-    
-    for char in existing_data_str:
-        if char == '{':
-            brace_count += 1
-            in_object = True
-        if in_object:
-            current_obj += char
-        if char == '}':
-            brace_count -= 1
-            if brace_count == 0 and in_object:
-                objects.append(current_obj)
-                current_obj = ""
-                in_object = False
-    
-    # Ajouter chaque objet
-    for i, obj in enumerate(objects):
-        js_content += '    ' + obj.strip()
-        if i < len(objects) - 1:
-            js_content += ','
-        js_content += '\n'
-
-js_content += '];\n\n'
-
-# Ajouter les données secondaires et news
-js_content += '// ============================================\n'
-js_content += '// SECONDARY MARKET DATA\n'
-js_content += '// ============================================\n'
-js_content += secondary_data + '\n\n'
-
-js_content += '// ============================================\n'
-js_content += '// NEWS DATA\n'
-js_content += '// ============================================\n'
-js_content += news_data + '\n'
-
-# Sauvegarder le nouveau fichier
-output_file = 'traditional-bonds-data-new.js'
-with open(output_file, 'w', encoding='utf-8') as f:
-    f.write(js_content)
-
-print(f"\n✅ Successfully created {output_file}")
-print(f"📊 Total emissions: {len(historical_data) + existing_count}")
-print(f"   - Historical (2010-2023): {len(historical_data)}")
-print(f"   - Current (2024-2026): {existing_count}")
-print(f"\n🌱 Green bonds: {sum(1 for e in historical_data if e['greenBond'])} ({sum(1 for e in historical_data if e['greenBond'])/len(historical_data)*100:.1f}%)")
-print(f"\n📅 Date range: {min(e['issueDate'] for e in historical_data)} to 2026-xx-xx")
+if __name__ == '__main__':
+    try:
+        main()
+    except (OSError, JSSyntaxError) as e:
+        print(f"❌ Merge failed: {e}")
+        sys.exit(1)